@@ -15,8 +15,8 @@ start() {
 format() {
   echo "Running formatter..."
   uv sync
-  uv run -- ruff check src/ tests/ scripts/ --fix
-  uv run -- ruff format src/ tests/ scripts/
+  uv run -- ruff check src/ tests/ scripts/ benchmarks/ --fix
+  uv run -- ruff format src/ tests/ scripts/ benchmarks/
 }
 
 lint() {
@@ -32,6 +32,12 @@ test() {
   uv run -- pytest ./tests "$@"
 }
 
+benchmark() {
+  echo "Running benchmarks..."
+  uv sync
+  uv run -m benchmarks.run "$@"
+}
+
 validate() {
   lint
   test
@@ -141,6 +147,7 @@ help() {
   echo "  format            Format code"
   echo "  lint              Lint code"
   echo "  test              Run tests"
+  echo "  benchmark         Run load benchmarks of the books routes"
   echo "  validate          Validate code"
   echo "  docker_smoketest  Run Docker smoke test"
   echo "  deploy            Deploy to Cloud Run"
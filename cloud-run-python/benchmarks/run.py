@@ -0,0 +1,401 @@
+#!/usr/bin/env uv run
+"""
+Load benchmark of every books route. Drives the app built by `create_runtime`
+in-process at fixed concurrency levels against an in-memory Firestore and a
+temporary SQLite database, and reports throughput, latency percentiles and
+memory allocated per request.
+Usage: uv run -m benchmarks.run [--concurrency 1 10 50] [--requests 1000]
+           [--backend firestore sqlite]
+           [--output benchmarks/results/latest.json] [--baseline <file>]
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import platform
+import statistics
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from httpx import ASGITransport, AsyncClient
+
+from src.adapter import storage
+from src.modules.books import encode_page_token
+from src.runtime import create_runtime
+from src.settings import Settings
+
+BOOKS = 1_000
+ALLOCATION_REQUESTS = 200
+WARMUP_REQUESTS = 50
+SEED_BATCH_SIZE = 500
+DEFAULT_OUTPUT = Path(__file__).parent / "results" / "latest.json"
+
+SEED_BOOKS = [
+    {"id": f"book-{i:05d}", "title": f"Title {i}", "author": f"Author {i % 100}"}
+    for i in range(BOOKS)
+]
+IMPORT_BODY = b"".join(
+    json.dumps({"title": f"Imported {i}", "author": "Importer"}).encode() + b"\n"
+    for i in range(100)
+)
+
+
+def book_id(i: int) -> str:
+    return SEED_BOOKS[i % BOOKS]["id"]
+
+
+def page_token(i: int) -> str:
+    # NOTE: Spread the requests over all pages of the collection.
+    return encode_page_token(book_id(i * 50 % (BOOKS - 50)))
+
+
+# NOTE: A request is the method, URL and keyword arguments of `client.request`.
+type Request = tuple[str, str, dict[str, Any]]
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    request: Callable[[int], Request]
+
+
+SCENARIOS = [
+    Scenario("list", lambda _: ("GET", "/v1/books?limit=50", {})),
+    Scenario(
+        "list_page",
+        lambda i: (
+            "GET",
+            f"/v1/books?limit=50&include_total=false&page_token={page_token(i)}",
+            {},
+        ),
+    ),
+    Scenario(
+        "export_ndjson",
+        lambda _: ("GET", "/v1/books", {"headers": {"Accept": "application/x-ndjson"}}),
+    ),
+    Scenario("get", lambda i: ("GET", f"/v1/books/{book_id(i)}", {})),
+    Scenario(
+        "batch_get",
+        lambda i: (
+            "POST",
+            "/v1/books:batchGet",
+            {"json": {"ids": [book_id(i * 10 + j) for j in range(10)]}},
+        ),
+    ),
+    Scenario(
+        "create",
+        lambda i: (
+            "POST",
+            "/v1/books",
+            {"json": {"title": f"New {i}", "author": "Bench"}},
+        ),
+    ),
+    Scenario(
+        "update",
+        lambda i: (
+            "PATCH",
+            f"/v1/books/{book_id(i)}",
+            {"json": {"title": f"Updated {i}"}},
+        ),
+    ),
+    Scenario("delete", lambda i: ("DELETE", f"/v1/books/deleted-{i}", {})),
+    Scenario(
+        "import", lambda _: ("POST", "/v1/books:import", {"content": IMPORT_BODY})
+    ),
+]
+
+
+# //////////////////////////////////////////////////////////////////////////////
+
+
+def percentile(sorted_values: list[float], quantile: float) -> float:
+    """
+    Return the value below which `quantile` of the values fall (nearest rank).
+
+    Args:
+        sorted_values (list[float]): The values in ascending order.
+        quantile (float): The quantile between 0 and 1.
+    Returns:
+        float: The percentile.
+    """
+    index = max(
+        0, min(len(sorted_values) - 1, round(quantile * len(sorted_values)) - 1)
+    )
+    return sorted_values[index]
+
+
+async def send(client: AsyncClient, request: Request) -> int:
+    """
+    Send a request and read the whole response body.
+
+    Args:
+        client (AsyncClient): The client wired to the app.
+        request (Request): The request to send.
+    Returns:
+        int: The response status code.
+    """
+    method, url, kwargs = request
+    response = await client.request(method, url, **kwargs)
+    return response.status_code
+
+
+async def measure_load(
+    client: AsyncClient, scenario: Scenario, requests: int, concurrency: int
+) -> dict[str, Any]:
+    """
+    Send `requests` requests with `concurrency` concurrent workers and measure
+    the throughput and the latency of every request.
+
+    Args:
+        client (AsyncClient): The client wired to the app.
+        scenario (Scenario): The requests to send.
+        requests (int): The number of requests.
+        concurrency (int): The number of concurrent requests.
+    Returns:
+        dict[str, Any]: The throughput, latency percentiles and error count.
+    """
+    counter = itertools.count()
+    latencies: list[float] = []
+    errors = 0
+
+    async def worker() -> None:
+        nonlocal errors
+        while (i := next(counter)) < requests:
+            request = scenario.request(i)
+            start = time.perf_counter()
+            status = await send(client, request)
+            latencies.append(time.perf_counter() - start)
+            errors += status >= 400
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    duration = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "requests_per_second": round(requests / duration, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+    }
+
+
+async def measure_allocations(
+    client: AsyncClient, scenario: Scenario, requests: int
+) -> dict[str, Any]:
+    """
+    Send `requests` requests one after another with tracemalloc enabled and
+    measure the peak memory each request allocated on top of what was already
+    allocated before it.
+
+    Args:
+        client (AsyncClient): The client wired to the app.
+        scenario (Scenario): The requests to send.
+        requests (int): The number of requests.
+    Returns:
+        dict[str, Any]: The mean peak and retained memory per request.
+    """
+    peaks: list[int] = []
+    tracemalloc.start()
+    try:
+        initial, _ = tracemalloc.get_traced_memory()
+        for i in range(requests):
+            request = scenario.request(i)
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            await send(client, request)
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+        final, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "peak_alloc_kib": round(statistics.fmean(peaks) / 1024, 2),
+        "retained_kib": round((final - initial) / requests / 1024, 2),
+    }
+
+
+async def run_scenario(
+    scenario: Scenario, settings: Settings, requests: int, concurrency: int
+) -> dict[str, Any]:
+    """
+    Run a scenario against a fresh app and database, so writes of earlier runs
+    don't change the data later runs read.
+
+    Args:
+        scenario (Scenario): The requests to send.
+        settings (Settings): The settings of the app, including the storage
+            backend and the latency of the fake Firestore.
+        requests (int): The number of requests.
+        concurrency (int): The number of concurrent requests.
+    Returns:
+        dict[str, Any]: The measurements of the run.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        path = str(Path(directory) / "books.db")
+        app = create_runtime(settings.model_copy(update={"SQLITE_PATH": path}))
+        async with app.router.lifespan_context(app):
+            repository = storage.get_repository()
+            for start in range(0, BOOKS, SEED_BATCH_SIZE):
+                await repository.set_many(
+                    (book["id"], book)
+                    for book in SEED_BOOKS[start : start + SEED_BATCH_SIZE]
+                )
+            async with AsyncClient(
+                transport=ASGITransport(app=app), base_url="http://bench"
+            ) as client:
+                for i in range(WARMUP_REQUESTS):
+                    await send(client, scenario.request(i))
+                result = await measure_load(client, scenario, requests, concurrency)
+                if concurrency == 1:
+                    result |= await measure_allocations(
+                        client, scenario, min(requests, ALLOCATION_REQUESTS)
+                    )
+    return {
+        "backend": settings.BOOK_STORAGE,
+        "scenario": scenario.name,
+        "concurrency": concurrency,
+        **result,
+    }
+
+
+# //////////////////////////////////////////////////////////////////////////////
+
+
+def result_key(result: dict[str, Any]) -> tuple[str, str, int]:
+    """
+    Identify the run of a result, to compare it with earlier runs.
+
+    Args:
+        result (dict[str, Any]): The measurements of a run.
+    Returns:
+        tuple[str, str, int]: The backend, scenario and concurrency.
+    """
+    # NOTE: Results saved before the SQLite backend existed ran on Firestore.
+    backend = result.get("backend", "firestore")
+    return backend, result["scenario"], result["concurrency"]
+
+
+def print_results(
+    results: list[dict[str, Any]], baseline: dict[tuple[str, str, int], dict[str, Any]]
+) -> None:
+    """
+    Print the results as a table, with the change to the baseline if given.
+
+    Args:
+        results (list[dict[str, Any]]): The measurements of every run.
+        baseline (dict[tuple[str, str, int], dict[str, Any]]): Earlier
+            measurements by backend, scenario and concurrency.
+    """
+    print(
+        f"{'backend':<9} {'scenario':<14} {'conc':>4} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8}"
+        f" {'p99 ms':>8} {'alloc KiB':>9} {'errors':>6}"
+    )
+    for result in results:
+        alloc = result.get("peak_alloc_kib")
+        line = (
+            f"{result['backend']:<9} {result['scenario']:<14}"
+            f" {result['concurrency']:>4}"
+            f" {result['requests_per_second']:>9.1f} {result['p50_ms']:>8.3f}"
+            f" {result['p95_ms']:>8.3f} {result['p99_ms']:>8.3f}"
+            f" {alloc if alloc is not None else '':>9} {result['errors']:>6}"
+        )
+        previous = baseline.get(result_key(result))
+        if previous is not None:
+            rps = result["requests_per_second"] / previous["requests_per_second"] - 1
+            p95 = result["p95_ms"] / previous["p95_ms"] - 1
+            line += f"  req/s {rps:+.1%}, p95 {p95:+.1%}"
+        print(line)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--requests", type=int, default=1_000)
+    parser.add_argument(
+        "--scenario",
+        choices=[scenario.name for scenario in SCENARIOS],
+        nargs="+",
+        help="Only run the given scenarios.",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=["firestore", "sqlite"],
+        nargs="+",
+        default=["firestore", "sqlite"],
+        help="The storage backends to run against.",
+    )
+    parser.add_argument(
+        "--latency-ms", type=float, default=0.0, help="Latency of every Firestore RPC."
+    )
+    parser.add_argument(
+        "--jitter-ms", type=float, default=0.0, help="Maximum latency deviation."
+    )
+    parser.add_argument(
+        "--create-batch-window-ms",
+        type=float,
+        default=0.0,
+        help="Commit concurrent creates together within this window.",
+    )
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", type=Path, help="Earlier results to compare.")
+    args = parser.parse_args()
+
+    baseline: dict[tuple[str, str, int], dict[str, Any]] = {}
+    if args.baseline is not None:
+        for result in json.loads(args.baseline.read_text())["results"]:
+            baseline[result_key(result)] = result
+
+    settings = Settings(
+        FIRESTORE_FAKE_ENABLED=True,
+        FIRESTORE_FAKE_LATENCY_MS=args.latency_ms,
+        FIRESTORE_FAKE_JITTER_MS=args.jitter_ms,
+        BOOK_CREATE_BATCH_WINDOW_MS=args.create_batch_window_ms,
+    )
+    results = []
+    for backend in args.backend:
+        backend_settings = settings.model_copy(update={"BOOK_STORAGE": backend})
+        for scenario in SCENARIOS:
+            if args.scenario and scenario.name not in args.scenario:
+                continue
+            for concurrency in args.concurrency:
+                results.append(
+                    await run_scenario(
+                        scenario, backend_settings, args.requests, concurrency
+                    )
+                )
+
+    print_results(results, baseline)
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(
+        json.dumps(
+            {
+                "created": datetime.now(UTC).isoformat(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "books": BOOKS,
+                "latency_ms": args.latency_ms,
+                "jitter_ms": args.jitter_ms,
+                "create_batch_window_ms": args.create_batch_window_ms,
+                "results": results,
+            },
+            indent=2,
+        )
+        + "\n"
+    )
+    print(f"\nSaved results to {args.output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,237 @@
+#!/usr/bin/env uv run
+"""
+Script to measure the overhead of the Cloud Logging utilities.
+Usage: uv run -m scripts.benchmark_cloud_logging
+"""
+
+import asyncio
+import json
+import logging
+import re
+import time
+from collections.abc import Callable
+from typing import Any
+
+from starlette.applications import Starlette
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.types import ASGIApp, Message
+
+from src.utils.cloud_logging import (
+    CloudLoggingFormatter,
+    CloudLoggingMiddleware,
+    trace_context,
+)
+
+REQUESTS = 20_000
+CONCURRENCY = 50
+TRACEPARENT = b"00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+PARSE_DURATION = 0.5
+TRACE_HEADERS: dict[str, str | None] = {
+    "valid": TRACEPARENT.decode(),
+    "invalid": "not-a-valid-header",
+    "missing": None,
+}
+XCLOUD_HEADERS: dict[str, str | None] = {
+    "valid": "105445aa7843bc8bf206b12000100000/1;o=1",
+    "invalid": "%%%",
+    "missing": None,
+}
+
+
+def legacy_parse_trace_parent(header: str | None) -> tuple[Any, Any, bool]:
+    """The previous traceparent parser, which built its pattern on every call."""
+    trace_id = span_id = None
+    trace_sampled = False
+    if header:
+        try:
+            VERSION_PART = r"(?!ff)[a-f\d]{2}"
+            TRACE_ID_PART = r"(?![0]{32})[a-f\d]{32}"
+            PARENT_ID_PART = r"(?![0]{16})[a-f\d]{16}"
+            FLAGS_PART = r"[a-f\d]{2}"
+            regex = (
+                f"^\\s?({VERSION_PART})-({TRACE_ID_PART})-({PARENT_ID_PART})"
+                f"-({FLAGS_PART})(-.*)?\\s?$"
+            )
+            match = re.match(regex, header)
+            trace_id = match.group(2)  # type: ignore[union-attr]
+            span_id = match.group(3)  # type: ignore[union-attr]
+            trace_sampled = bool(int(match.group(4), 16) & 1)  # type: ignore[union-attr]
+        except (IndexError, AttributeError):
+            pass
+    return trace_id, span_id, trace_sampled
+
+
+def legacy_parse_xcloud_trace(header: str | None) -> tuple[Any, Any, bool]:
+    """The previous X-Cloud-Trace-Context parser, using re.match per call."""
+    trace_id = span_id = None
+    trace_sampled = False
+    if header:
+        regexp = r"([\w-]+)?(\/?([\w-]+))?(;?o=(\d))?"
+        match = re.match(regexp, header)
+        trace_id = match.group(1)  # type: ignore[union-attr]
+        span_id = match.group(3)  # type: ignore[union-attr]
+        trace_sampled = match.group(5) == "1"  # type: ignore[union-attr]
+        try:
+            span_id_int = int(span_id)
+            span_id = f"{span_id_int:016x}" if 0 < span_id_int < 2**64 else None
+        except (ValueError, TypeError):
+            span_id = None
+    return trace_id, span_id, trace_sampled
+
+
+class LegacyCloudLoggingFormatter(CloudLoggingFormatter):
+    """The previous formatter, which encoded the parsed record dictionary."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        logging.Formatter.format(self, record)
+        return json.dumps(self.parse_record(record))
+
+
+def make_record(labels: dict[str, Any] | None) -> logging.LogRecord:
+    """Build an error record like the exception handlers emit it."""
+    record = logging.LogRecord(
+        "app", logging.ERROR, "", 0, "Handled HTTP error: %s", ("404",), None
+    )
+    if labels is not None:
+        record.labels = labels
+    return record
+
+
+def bench_call(fn: Callable[[Any], object], arg: Any) -> float:
+    """Run `fn(arg)` repeatedly for PARSE_DURATION seconds and return µs per call."""
+    calls = 0
+    start = time.perf_counter()
+    while (elapsed := time.perf_counter() - start) < PARSE_DURATION:
+        for _ in range(100):
+            fn(arg)
+        calls += 100
+    return elapsed / calls * 1_000_000
+
+
+class BaseHTTPCloudLoggingMiddleware(BaseHTTPMiddleware):
+    """The previous, BaseHTTPMiddleware based implementation for comparison."""
+
+    async def dispatch(self, request: Request, call_next: Any) -> Any:
+        parser = CloudLoggingMiddleware(self.app)
+        header = request.headers.get("Traceparent")
+        trace_id, span_id, trace_sampled = parser.parse_trace_parent(header)
+        if trace_id is None:
+            header = request.headers.get("X-Cloud-Trace-Context")
+            trace_id, span_id, trace_sampled = parser.parse_xcloud_trace(header)
+        trace_context.set(
+            {"trace_id": trace_id, "span_id": span_id, "trace_sampled": trace_sampled}
+        )
+        return await call_next(request)
+
+
+def make_app() -> Starlette:
+    """Build a minimal app that answers every request with a short body."""
+
+    async def homepage(_: Request) -> PlainTextResponse:
+        return PlainTextResponse("ok")
+
+    return Starlette(routes=[Route("/", homepage)])
+
+
+async def bench_requests(app: ASGIApp) -> float:
+    """
+    Send REQUESTS requests through `app` with CONCURRENCY concurrent callers,
+    bypassing any HTTP client, and return requests per second.
+    """
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/",
+        "raw_path": b"/",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"test"), (b"traceparent", TRACEPARENT)],
+        "server": ("test", 80),
+        "client": ("test", 1234),
+    }
+
+    async def receive() -> Message:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(_: Message) -> None:
+        pass
+
+    async def worker(count: int) -> None:
+        for _ in range(count):
+            await app(dict(scope), receive, send)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(REQUESTS // CONCURRENCY) for _ in range(CONCURRENCY)))
+    return REQUESTS / (time.perf_counter() - start)
+
+
+def main_parsers() -> None:
+    middleware = CloudLoggingMiddleware(make_app())
+    parsers: dict[str, tuple[Callable[[str | None], object], dict[str, str | None]]] = {
+        "legacy traceparent": (legacy_parse_trace_parent, TRACE_HEADERS),
+        "traceparent": (middleware.parse_trace_parent, TRACE_HEADERS),
+        "legacy x-cloud-trace-context": (legacy_parse_xcloud_trace, XCLOUD_HEADERS),
+        "x-cloud-trace-context": (middleware.parse_xcloud_trace, XCLOUD_HEADERS),
+    }
+    print("Header parsing (µs/op)")
+    for name, (parse, headers) in parsers.items():
+        timings = "  ".join(
+            f"{case} {bench_call(parse, header):>6.2f}"
+            for case, header in headers.items()
+        )
+        print(f"  {name:<30} {timings}")
+
+
+def main_formatters() -> None:
+    formatters = {
+        "legacy formatter": LegacyCloudLoggingFormatter(project="project"),
+        "CloudLoggingFormatter": CloudLoggingFormatter(project="project"),
+    }
+    cases: dict[str, tuple[dict[str, Any] | None, dict[str, Any] | None]] = {
+        "plain": (None, None),
+        "traced": (
+            {"trace_id": "0af7651916cd43dd", "span_id": "b7ad", "trace_sampled": True},
+            None,
+        ),
+        "traced + labels": (
+            {"trace_id": "0af7651916cd43dd", "span_id": "b7ad", "trace_sampled": True},
+            {"route": "/v1/books", "status": 404},
+        ),
+    }
+    print("Formatting (records/s)")
+    for name, formatter in formatters.items():
+        results = []
+        for case, (ctx, labels) in cases.items():
+            token = trace_context.set(ctx)
+            try:
+                us = bench_call(formatter.format, make_record(labels))
+            finally:
+                trace_context.reset(token)
+            results.append(f"{case} {1_000_000 / us:>8.0f}")
+        print(f"  {name:<30} {'  '.join(results)}")
+
+
+async def main() -> None:
+    apps: dict[str, ASGIApp] = {
+        "no middleware": make_app(),
+        "BaseHTTPMiddleware": BaseHTTPCloudLoggingMiddleware(make_app()),
+        "CloudLoggingMiddleware": CloudLoggingMiddleware(make_app()),
+    }
+    print(f"Middleware ({REQUESTS} requests, concurrency {CONCURRENCY})")
+    for name, app in apps.items():
+        # NOTE: Warm up once so imports and caches don't skew the first run.
+        await bench_requests(app)
+        rps = await bench_requests(app)
+        print(f"  {name:<30} {rps:>10.0f} req/s")
+
+
+if __name__ == "__main__":
+    main_parsers()
+    main_formatters()
+    asyncio.run(main())
@@ -0,0 +1,175 @@
+from collections.abc import AsyncGenerator, Iterable
+from datetime import datetime
+from typing import Any, Protocol
+
+# //////////////////////////////////////////////////////////////////////////////
+
+# NOTE: Firestore accepts at most 500 writes per batch.
+MAX_BATCH_WRITES = 500
+
+
+class NotFound(Exception):
+    """
+    Exception raised when a document to update does not exist.
+
+    Attributes:
+        document_id (str): The ID of the missing document.
+    """
+
+    def __init__(self, document_id: str):
+        self.document_id = document_id
+        super().__init__(f"No document to update: {document_id}")
+
+
+class WriteError(Exception):
+    """
+    Exception raised when a batch of writes failed. None of the writes of the
+    batch were applied.
+    """
+
+
+class Document(Protocol):
+    """
+    A stored book. Firestore document snapshots satisfy this protocol, so the
+    Firestore repository returns them without copying.
+    """
+
+    @property
+    def id(self) -> str: ...
+
+    @property
+    def update_time(self) -> datetime | None: ...
+
+    def to_dict(self) -> dict[str, Any] | None: ...
+
+
+class Record:
+    """
+    A stored book, as returned by repositories other than Firestore.
+
+    Attributes:
+        id (str): The document ID.
+        data (dict[str, Any]): The document data.
+        update_time (datetime | None): When the document was last written.
+    """
+
+    __slots__ = ("id", "data", "update_time")
+
+    def __init__(
+        self, id: str, data: dict[str, Any], update_time: datetime | None
+    ) -> None:
+        self.id = id
+        self.data = data
+        self.update_time = update_time
+
+    def to_dict(self) -> dict[str, Any]:
+        return self.data
+
+
+class BookRepository(Protocol):
+    """
+    Storage of books. Every method is a single round trip to the backend.
+    """
+
+    async def get(self, book_id: str) -> Document | None:
+        """
+        Read a single book.
+
+        Args:
+            book_id (str): The ID of the book.
+        Returns:
+            Document | None: The book, or None if it does not exist.
+        """
+        ...
+
+    def get_many(self, book_ids: list[str]) -> AsyncGenerator[Document]:
+        """
+        Read several books at once. Books that don't exist are skipped.
+
+        Args:
+            book_ids (list[str]): The IDs of the books.
+        Returns:
+            AsyncGenerator[Document]: The existing books, in no particular order.
+        """
+        ...
+
+    def scan(self, after: str | None, limit: int) -> AsyncGenerator[Document]:
+        """
+        Read books ordered by their ID.
+
+        Args:
+            after (str | None): Only return books with a greater ID.
+            limit (int): The maximum number of books to return.
+        Returns:
+            AsyncGenerator[Document]: The books, as they are read.
+        """
+        ...
+
+    def stream(self) -> AsyncGenerator[Document]:
+        """
+        Read all books without holding them in memory at once.
+
+        Returns:
+            AsyncGenerator[Document]: The books, as they are read.
+        """
+        ...
+
+    async def count(self) -> int:
+        """
+        Count all books without reading them.
+
+        Returns:
+            int: The number of books.
+        """
+        ...
+
+    async def set(self, book_id: str, data: dict[str, Any]) -> None:
+        """
+        Create or replace a book.
+
+        Args:
+            book_id (str): The ID of the book.
+            data (dict[str, Any]): The book data.
+        """
+        ...
+
+    async def set_many(self, books: Iterable[tuple[str, dict[str, Any]]]) -> None:
+        """
+        Create or replace several books atomically.
+
+        Args:
+            books (Iterable[tuple[str, dict[str, Any]]]): The IDs and data of
+                the books. At most MAX_BATCH_WRITES per call.
+        Raises:
+            WriteError: If the books could not be written.
+        """
+        ...
+
+    async def update(self, book_id: str, data: dict[str, Any]) -> datetime | None:
+        """
+        Update fields of an existing book.
+
+        Args:
+            book_id (str): The ID of the book.
+            data (dict[str, Any]): The fields to update.
+        Returns:
+            datetime | None: When the book was updated.
+        Raises:
+            NotFound: If the book does not exist.
+        """
+        ...
+
+    async def delete(self, book_id: str) -> None:
+        """
+        Delete a book. Deleting a missing book is not an error.
+
+        Args:
+            book_id (str): The ID of the book.
+        """
+        ...
+
+    def close(self) -> None:
+        """
+        Release the resources of the repository.
+        """
+        ...
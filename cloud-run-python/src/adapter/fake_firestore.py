@@ -0,0 +1,370 @@
+import asyncio
+import random
+from collections import Counter
+from collections.abc import AsyncIterator, Iterable, Mapping
+from datetime import UTC, datetime
+from typing import Any
+
+from google.cloud import exceptions
+
+from src.adapter.book_repository import MAX_BATCH_WRITES
+
+# //////////////////////////////////////////////////////////////////////////////
+
+# Collections by name, holding the data and update time of every document by ID
+type Store = dict[str, dict[str, tuple[dict[str, Any], datetime]]]
+
+
+class FakeSnapshot:
+    """
+    Document snapshot as returned by reads.
+
+    Attributes:
+        id (str): The document ID.
+        exists (bool): Whether the document exists.
+        update_time (datetime | None): When the document was last written.
+    """
+
+    __slots__ = ("id", "exists", "update_time", "_data")
+
+    def __init__(
+        self, id: str, data: dict[str, Any] | None, update_time: datetime | None
+    ) -> None:
+        self.id = id
+        self.exists = data is not None
+        self.update_time = update_time
+        self._data = data
+
+    def to_dict(self) -> dict[str, Any] | None:
+        return dict(self._data) if self._data is not None else None
+
+
+class FakeWriteResult:
+    """
+    Result of a single write.
+
+    Attributes:
+        update_time (datetime): When the write was applied.
+    """
+
+    __slots__ = ("update_time",)
+
+    def __init__(self, update_time: datetime) -> None:
+        self.update_time = update_time
+
+
+class FakeAggregationResult:
+    """
+    Result of an aggregation, e.g. a count.
+
+    Attributes:
+        alias (str): The alias of the aggregation.
+        value (int): The aggregated value.
+    """
+
+    __slots__ = ("alias", "value")
+
+    def __init__(self, alias: str, value: int) -> None:
+        self.alias = alias
+        self.value = value
+
+
+# //////////////////////////////////////////////////////////////////////////////
+
+
+class FakeDocument:
+    """
+    Reference to a single document.
+    """
+
+    def __init__(self, client: "FakeClient", collection: str, id: str) -> None:
+        self.client = client
+        self.collection = collection
+        self.id = id
+
+    async def get(self) -> FakeSnapshot:
+        await self.client.rpc("get")
+        return self.snapshot()
+
+    async def set(self, data: dict[str, Any]) -> FakeWriteResult:
+        await self.client.rpc("set")
+        return self.client.apply([("set", self, data)])[0]
+
+    async def update(self, data: dict[str, Any]) -> FakeWriteResult:
+        await self.client.rpc("update")
+        return self.client.apply([("update", self, data)])[0]
+
+    async def delete(self) -> FakeWriteResult:
+        await self.client.rpc("delete")
+        return self.client.apply([("delete", self, {})])[0]
+
+    def snapshot(self) -> FakeSnapshot:
+        """
+        Read the document without a round trip.
+
+        Returns:
+            FakeSnapshot: The current state of the document.
+        """
+        entry = self.client.store.get(self.collection, {}).get(self.id)
+        if entry is None:
+            return FakeSnapshot(self.id, None, None)
+        return FakeSnapshot(self.id, entry[0], entry[1])
+
+
+class FakeAggregation:
+    """
+    Count aggregation over a query.
+    """
+
+    def __init__(self, query: "FakeQuery", alias: str) -> None:
+        self.query = query
+        self.alias = alias
+
+    async def get(self) -> list[list[FakeAggregationResult]]:
+        await self.query.client.rpc("count")
+        return [[FakeAggregationResult(self.alias, len(self.query.ids()))]]
+
+
+class FakeQuery:
+    """
+    Collection reference or query. Documents can only be ordered by their ID,
+    which is also the default order of Firestore.
+    """
+
+    def __init__(
+        self,
+        client: "FakeClient",
+        collection: str,
+        after: str | None = None,
+        limit_to: int | None = None,
+    ) -> None:
+        self.client = client
+        self.collection = collection
+        self.after = after
+        self.limit_to = limit_to
+
+    def document(self, id: str) -> FakeDocument:
+        return FakeDocument(self.client, self.collection, id)
+
+    def order_by(self, field: str) -> "FakeQuery":
+        if field != "__name__":
+            raise ValueError("Only ordering by __name__ is supported")
+        return self
+
+    def start_after(self, fields: Mapping[str, str]) -> "FakeQuery":
+        return FakeQuery(
+            self.client, self.collection, fields["__name__"], self.limit_to
+        )
+
+    def limit(self, count: int) -> "FakeQuery":
+        return FakeQuery(self.client, self.collection, self.after, count)
+
+    def count(self, alias: str | None = None) -> FakeAggregation:
+        return FakeAggregation(self, alias or "count")
+
+    def ids(self) -> list[str]:
+        """
+        Return the IDs of the matching documents in order.
+
+        Returns:
+            list[str]: The document IDs.
+        """
+        ids = sorted(self.client.store.get(self.collection, {}))
+        if self.after is not None:
+            ids = [id for id in ids if id > self.after]
+        return ids[: self.limit_to] if self.limit_to is not None else ids
+
+    async def stream(self) -> AsyncIterator[FakeSnapshot]:
+        """
+        Stream the matching documents. The documents arrive in responses of
+        `stream_batch_size` documents, each of which takes one RPC latency.
+
+        Yields:
+            FakeSnapshot: The next document.
+        """
+        client = self.client
+        ids = self.ids()
+        if not ids:
+            await client.rpc("stream")
+        for index, id in enumerate(ids):
+            if index % client.stream_batch_size == 0:
+                await client.rpc("stream")
+            yield self.document(id).snapshot()
+
+
+class FakeBatch:
+    """
+    Write batch, applied atomically on commit.
+    """
+
+    def __init__(self, client: "FakeClient") -> None:
+        self.client = client
+        self.writes: list[tuple[str, FakeDocument, dict[str, Any]]] = []
+
+    def set(self, ref: FakeDocument, data: dict[str, Any]) -> None:
+        self.writes.append(("set", ref, data))
+
+    def update(self, ref: FakeDocument, data: dict[str, Any]) -> None:
+        self.writes.append(("update", ref, data))
+
+    def delete(self, ref: FakeDocument) -> None:
+        self.writes.append(("delete", ref, {}))
+
+    async def commit(self) -> list[FakeWriteResult]:
+        await self.client.rpc("commit")
+        if len(self.writes) > MAX_BATCH_WRITES:
+            raise exceptions.BadRequest(  # type: ignore[no-untyped-call]
+                f"A batch can contain at most {MAX_BATCH_WRITES} writes"
+            )
+        return self.client.apply(self.writes)
+
+
+# //////////////////////////////////////////////////////////////////////////////
+
+
+class FakeClient:
+    """
+    In-memory stand-in for the Firestore AsyncClient, for local development and
+    performance testing without network access. It implements the parts of the
+    client API used by the modules: collections, documents, streams,
+    `get_all`, batches, ordering by ID, limits, cursors and counts.
+
+    Every RPC waits `latency` seconds (or the per-RPC value in `rpc_latency`),
+    plus or minus a uniformly distributed `jitter`, so concurrent requests
+    interleave like they would against Firestore. RPCs fail with
+    ServiceUnavailable at `failure_rate`, or with the errors queued by
+    `inject_failure`. Random values come from a generator seeded with `seed`,
+    so runs are reproducible.
+
+    Attributes:
+        store (Store): The documents of every collection.
+        rpcs (Counter[str]): The number of RPCs by name, e.g. `get` or `commit`.
+        latency (float): The default RPC latency in seconds.
+        rpc_latency (Mapping[str, float]): RPC latency by RPC name in seconds.
+        jitter (float): The maximum deviation from the latency in seconds.
+        failure_rate (float): The probability that an RPC fails.
+        stream_batch_size (int): The number of documents per stream response.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        rpc_latency: Mapping[str, float] | None = None,
+        jitter: float = 0.0,
+        failure_rate: float = 0.0,
+        seed: int = 0,
+        stream_batch_size: int = 100,
+    ) -> None:
+        self.store: Store = {}
+        self.rpcs: Counter[str] = Counter()
+        self.latency = latency
+        self.rpc_latency = dict(rpc_latency or {})
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.stream_batch_size = stream_batch_size
+        self._random = random.Random(seed)
+        self._failures: dict[str, list[Exception]] = {}
+
+    def collection(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    def document(self, collection: str, id: str) -> FakeDocument:
+        return FakeDocument(self, collection, id)
+
+    def batch(self) -> FakeBatch:
+        return FakeBatch(self)
+
+    async def get_all(
+        self, refs: Iterable[FakeDocument]
+    ) -> AsyncIterator[FakeSnapshot]:
+        refs = list(refs)
+        await self.rpc("get_all")
+        for ref in refs:
+            yield ref.snapshot()
+
+    def close(self) -> None:
+        pass
+
+    def add(self, collection: str, id: str, data: dict[str, Any]) -> None:
+        """
+        Store a document without a round trip, e.g. to seed test data.
+
+        Args:
+            collection (str): The collection name.
+            id (str): The document ID.
+            data (dict[str, Any]): The document data.
+        """
+        self.store.setdefault(collection, {})[id] = (dict(data), datetime.now(UTC))
+
+    def inject_failure(self, rpc: str, error: Exception, count: int = 1) -> None:
+        """
+        Fail the next `count` RPCs with the given name.
+
+        Args:
+            rpc (str): The RPC name, e.g. `get` or `commit`.
+            error (Exception): The error to raise.
+            count (int): The number of RPCs to fail.
+        """
+        self._failures.setdefault(rpc, []).extend([error] * count)
+
+    async def rpc(self, name: str) -> None:
+        """
+        Simulate the round trip of an RPC: count it, wait for its latency and
+        raise an injected failure, if any. Always yields to the event loop,
+        like a network call.
+
+        Args:
+            name (str): The RPC name.
+        Raises:
+            exceptions.GoogleCloudError: If a failure was injected.
+        """
+        self.rpcs[name] += 1
+        delay = self.rpc_latency.get(name, self.latency)
+        if self.jitter:
+            delay += self._random.uniform(-self.jitter, self.jitter)
+        await asyncio.sleep(max(delay, 0.0))
+
+        failures = self._failures.get(name)
+        if failures:
+            raise failures.pop(0)
+        if self.failure_rate and self._random.random() < self.failure_rate:
+            raise exceptions.ServiceUnavailable(  # type: ignore[no-untyped-call]
+                f"Injected failure of {name}"
+            )
+
+    def apply(
+        self, writes: list[tuple[str, FakeDocument, dict[str, Any]]]
+    ) -> list[FakeWriteResult]:
+        """
+        Apply writes atomically. Updates of missing documents fail the whole
+        batch, like in Firestore.
+
+        Args:
+            writes (list[tuple[str, FakeDocument, dict[str, Any]]]): The kind
+                of write (`set`, `update` or `delete`), document and data.
+        Returns:
+            list[FakeWriteResult]: One result per write.
+        Raises:
+            exceptions.NotFound: If an updated document does not exist.
+        """
+        exists: dict[tuple[str, str], bool] = {}
+        for kind, ref, _ in writes:
+            key = (ref.collection, ref.id)
+            if key not in exists:
+                exists[key] = ref.id in self.store.get(ref.collection, {})
+            if kind == "update" and not exists[key]:
+                raise exceptions.NotFound(  # type: ignore[no-untyped-call]
+                    f"No document to update: {ref.id}"
+                )
+            exists[key] = kind != "delete"
+
+        now = datetime.now(UTC)
+        for kind, ref, data in writes:
+            documents = self.store.setdefault(ref.collection, {})
+            if kind == "set":
+                documents[ref.id] = (dict(data), now)
+            elif kind == "update":
+                documents[ref.id] = ({**documents[ref.id][0], **data}, now)
+            else:
+                documents.pop(ref.id, None)
+        return [FakeWriteResult(now) for _ in writes]
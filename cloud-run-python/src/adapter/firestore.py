@@ -3,6 +3,9 @@ from typing import Any, cast
 from google.cloud import exceptions as firestore_exceptions
 from google.cloud import firestore
 
+from src.adapter.fake_firestore import FakeClient
+from src.adapter.instrumentation import FirestoreStats, InstrumentedClient
+
 # //////////////////////////////////////////////////////////////////////////////
 
 # Re-export exceptions for use in modules
@@ -11,6 +14,9 @@ exceptions = firestore_exceptions
 # Shared Firestore client instance
 client: firestore.AsyncClient | None = None
 
+# Operation stats of the shared client since the app started
+stats = FirestoreStats()
+
 
 def init_client() -> firestore.AsyncClient:
     """
@@ -25,9 +31,39 @@ def init_client() -> firestore.AsyncClient:
     return client
 
 
+def init_fake_client(
+    latency: float = 0.0,
+    rpc_latency: dict[str, float] | None = None,
+    jitter: float = 0.0,
+    failure_rate: float = 0.0,
+    seed: int = 0,
+) -> firestore.AsyncClient:
+    """
+    Initialize the shared client with an in-memory fake instead of Firestore,
+    e.g. for local performance testing. See `FakeClient` for the arguments.
+
+    Returns:
+        firestore.AsyncClient: The initialized fake client.
+    """
+    global client
+    if client is None:
+        fake = FakeClient(
+            latency=latency,
+            rpc_latency=rpc_latency,
+            jitter=jitter,
+            failure_rate=failure_rate,
+            seed=seed,
+        )
+        # NOTE: The fake implements the parts of the client API used by the
+        # modules, so it is typed as the client itself.
+        client = cast(firestore.AsyncClient, fake)
+    return client
+
+
 def get_client() -> firestore.AsyncClient:
     """
-    Return the initialized Firestore client.
+    Return the initialized Firestore client, instrumented to record every
+    operation in `stats`.
 
     Returns:
         firestore.AsyncClient: The Firestore client instance.
@@ -36,7 +72,9 @@ def get_client() -> firestore.AsyncClient:
     """
     if client is None:
         raise RuntimeError("Firestore client is not initialized")
-    return client
+    # NOTE: The wrapper mirrors the parts of the client API used by the modules,
+    # so it is typed as the client itself.
+    return cast(firestore.AsyncClient, InstrumentedClient(client, stats))
 
 
 def close_client() -> None:
@@ -0,0 +1,90 @@
+from collections.abc import AsyncGenerator, Iterable
+from contextlib import aclosing
+from datetime import datetime
+from typing import Any, cast
+
+from src.adapter import book_repository, firestore
+
+# //////////////////////////////////////////////////////////////////////////////
+
+COLLECTION = "books"
+
+
+class FirestoreBookRepository:
+    """
+    Books stored in the `books` collection of Firestore. The shared client is
+    read on every call, so the repository works with whatever client the app
+    lifespan initialized. Streams are closed as soon as the caller closes the
+    returned iterator, so their stats are recorded within the request.
+    """
+
+    async def get(self, book_id: str) -> book_repository.Document | None:
+        client = firestore.get_client()
+        doc = await client.collection(COLLECTION).document(book_id).get()
+        return doc if doc.exists else None
+
+    async def get_many(
+        self, book_ids: list[str]
+    ) -> AsyncGenerator[book_repository.Document]:
+        client = firestore.get_client()
+        collection = client.collection(COLLECTION)
+        refs = [collection.document(book_id) for book_id in book_ids]
+        async with aclosing(client.get_all(refs)) as docs:
+            async for doc in docs:
+                if doc.exists:
+                    yield doc
+
+    async def scan(
+        self, after: str | None, limit: int
+    ) -> AsyncGenerator[book_repository.Document]:
+        client = firestore.get_client()
+        query = client.collection(COLLECTION).order_by("__name__")
+        if after is not None:
+            query = query.start_after({"__name__": after})
+        async with aclosing(query.limit(limit).stream()) as docs:
+            async for doc in docs:
+                yield doc
+
+    async def stream(self) -> AsyncGenerator[book_repository.Document]:
+        client = firestore.get_client()
+        async with aclosing(client.collection(COLLECTION).stream()) as docs:
+            async for doc in docs:
+                yield doc
+
+    async def count(self) -> int:
+        client = firestore.get_client()
+        query = cast(Any, client.collection(COLLECTION)).count(alias="total")
+        results = await query.get()
+        return int(results[0][0].value)
+
+    async def set(self, book_id: str, data: dict[str, Any]) -> None:
+        client = firestore.get_client()
+        await client.document(COLLECTION, book_id).set(data)
+
+    async def set_many(self, books: Iterable[tuple[str, dict[str, Any]]]) -> None:
+        client = firestore.get_client()
+        collection = client.collection(COLLECTION)
+        try:
+            batch = client.batch()
+            for book_id, data in books:
+                batch.set(collection.document(book_id), data)
+            await batch.commit()
+        except firestore.exceptions.GoogleCloudError as e:
+            raise book_repository.WriteError(str(e)) from e
+
+    async def update(self, book_id: str, data: dict[str, Any]) -> datetime | None:
+        client = firestore.get_client()
+        try:
+            result = await client.document(COLLECTION, book_id).update(data)
+        except firestore.exceptions.NotFound:
+            raise book_repository.NotFound(book_id)
+        update_time: datetime | None = result.update_time
+        return update_time
+
+    async def delete(self, book_id: str) -> None:
+        client = firestore.get_client()
+        await client.document(COLLECTION, book_id).delete()
+
+    def close(self) -> None:
+        # NOTE: The shared client is closed by `firestore.close_client`.
+        pass
@@ -0,0 +1,351 @@
+import time
+from collections.abc import AsyncIterator, Iterable
+from typing import Any
+
+from src.utils.metrics import Histogram
+from src.utils.server_timing import server_timing
+
+# //////////////////////////////////////////////////////////////////////////////
+
+# NOTE: Upper bounds in seconds. Firestore calls from Cloud Run usually take a
+# few milliseconds; long streams and batch commits take longer.
+LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+)
+
+
+class OperationStats:
+    """
+    Counters of a single kind of Firestore operation.
+
+    Attributes:
+        calls (int): Number of calls.
+        errors (int): Number of calls that raised an exception.
+        documents (int): Number of documents read.
+        latency (Histogram): Call durations in seconds.
+    """
+
+    __slots__ = ("calls", "errors", "documents", "latency")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.errors = 0
+        self.documents = 0
+        self.latency = Histogram(LATENCY_BUCKETS)
+
+    def snapshot(self) -> dict[str, Any]:
+        """
+        Return the counters and latency percentiles, e.g. for a stats endpoint.
+        Percentiles are the upper bound of the bucket they fall into.
+
+        Returns:
+            dict[str, Any]: The counters and latencies in milliseconds.
+        """
+        latency = self.latency
+        percentiles: dict[str, float | None] = {}
+        for name, quantile in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+            percentiles[name] = None
+            cumulative = 0
+            for bound, count in zip(latency.bounds, latency.counts, strict=False):
+                cumulative += count
+                if latency.count and cumulative >= quantile * latency.count:
+                    percentiles[name] = bound * 1000
+                    break
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "documents": self.documents,
+            "latency_ms": {
+                "mean": latency.sum / latency.count * 1000 if latency.count else None,
+                **percentiles,
+            },
+        }
+
+
+class FirestoreStats:
+    """
+    Counters of all Firestore operations since the app started. Updated from
+    the event loop only, so no locking is needed.
+
+    Attributes:
+        operations (dict[str, OperationStats]): Counters by operation, e.g.
+            `get` or `stream`.
+    """
+
+    def __init__(self) -> None:
+        self.operations: dict[str, OperationStats] = {}
+
+    def record(
+        self, operation: str, duration: float, documents: int = 0, error: bool = False
+    ) -> None:
+        """
+        Record a finished call, both in the counters and in the Server-Timing
+        phases of the current request.
+
+        Args:
+            operation (str): The operation, e.g. `get`.
+            duration (float): The call duration in seconds.
+            documents (int): The number of documents read.
+            error (bool): Whether the call raised an exception.
+        """
+        stats = self.operations.get(operation)
+        if stats is None:
+            stats = self.operations[operation] = OperationStats()
+        stats.calls += 1
+        stats.documents += documents
+        stats.errors += error
+        stats.latency.observe(duration)
+
+        timings = server_timing.get()
+        if timings is not None:
+            timings.add("firestore", duration)
+            timings.increment("firestore_calls")
+            timings.increment("firestore_documents", documents)
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        """
+        Return the counters of every operation.
+
+        Returns:
+            dict[str, dict[str, Any]]: The counters by operation.
+        """
+        return {
+            operation: stats.snapshot()
+            for operation, stats in sorted(self.operations.items())
+        }
+
+
+# //////////////////////////////////////////////////////////////////////////////
+
+
+def unwrap(ref: Any) -> Any:
+    """
+    Return the Firestore object behind an instrumented wrapper.
+
+    Args:
+        ref (Any): An instrumented wrapper or a Firestore object.
+    Returns:
+        Any: The Firestore object.
+    """
+    return ref.target if isinstance(ref, InstrumentedDocument) else ref
+
+
+async def record_stream(
+    stats: FirestoreStats, operation: str, docs: AsyncIterator[Any]
+) -> AsyncIterator[Any]:
+    """
+    Record a streaming operation. Only the time spent waiting for documents
+    counts as latency, not the time the consumer spends between them. Closing
+    the returned iterator also closes `docs`, e.g. the underlying gRPC stream.
+
+    Args:
+        stats (FirestoreStats): The stats to record to.
+        operation (str): The operation, e.g. `stream`.
+        docs (AsyncIterator[Any]): The document snapshots.
+    Yields:
+        Any: The next document snapshot.
+    """
+    duration = 0.0
+    documents = 0
+    error = False
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                doc = await anext(docs)
+            except StopAsyncIteration:
+                return
+            except Exception:
+                error = True
+                raise
+            finally:
+                duration += time.perf_counter() - start
+            documents += 1
+            yield doc
+    finally:
+        stats.record(operation, duration, documents, error)
+        aclose = getattr(docs, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+
+class InstrumentedDocument:
+    """
+    Document reference that records its reads and writes.
+    """
+
+    __slots__ = ("target", "stats")
+
+    def __init__(self, target: Any, stats: FirestoreStats) -> None:
+        self.target = target
+        self.stats = stats
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.target, name)
+
+    async def get(self, *args: Any, **kwargs: Any) -> Any:
+        return await self._call("get", 1, self.target.get(*args, **kwargs))
+
+    async def set(self, *args: Any, **kwargs: Any) -> Any:
+        return await self._call("set", 0, self.target.set(*args, **kwargs))
+
+    async def update(self, *args: Any, **kwargs: Any) -> Any:
+        return await self._call("update", 0, self.target.update(*args, **kwargs))
+
+    async def delete(self, *args: Any, **kwargs: Any) -> Any:
+        return await self._call("delete", 0, self.target.delete(*args, **kwargs))
+
+    async def _call(self, operation: str, documents: int, call: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            result = await call
+        except Exception:
+            self.stats.record(operation, time.perf_counter() - start, error=True)
+            raise
+        self.stats.record(operation, time.perf_counter() - start, documents)
+        return result
+
+
+class InstrumentedAggregation:
+    """
+    Aggregation query that records its execution.
+    """
+
+    __slots__ = ("target", "stats")
+
+    def __init__(self, target: Any, stats: FirestoreStats) -> None:
+        self.target = target
+        self.stats = stats
+
+    async def get(self, *args: Any, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            result = await self.target.get(*args, **kwargs)
+        except Exception:
+            self.stats.record("count", time.perf_counter() - start, error=True)
+            raise
+        self.stats.record("count", time.perf_counter() - start)
+        return result
+
+
+class InstrumentedQuery:
+    """
+    Collection reference or query that records its streams. Methods that
+    refine the query return a new instrumented query.
+    """
+
+    __slots__ = ("target", "stats")
+
+    def __init__(self, target: Any, stats: FirestoreStats) -> None:
+        self.target = target
+        self.stats = stats
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.target, name)
+
+    def document(self, *path: str) -> InstrumentedDocument:
+        return InstrumentedDocument(self.target.document(*path), self.stats)
+
+    def order_by(self, *args: Any, **kwargs: Any) -> "InstrumentedQuery":
+        return InstrumentedQuery(self.target.order_by(*args, **kwargs), self.stats)
+
+    def start_after(self, *args: Any, **kwargs: Any) -> "InstrumentedQuery":
+        return InstrumentedQuery(self.target.start_after(*args, **kwargs), self.stats)
+
+    def limit(self, *args: Any, **kwargs: Any) -> "InstrumentedQuery":
+        return InstrumentedQuery(self.target.limit(*args, **kwargs), self.stats)
+
+    def where(self, *args: Any, **kwargs: Any) -> "InstrumentedQuery":
+        return InstrumentedQuery(self.target.where(*args, **kwargs), self.stats)
+
+    def count(self, *args: Any, **kwargs: Any) -> InstrumentedAggregation:
+        return InstrumentedAggregation(self.target.count(*args, **kwargs), self.stats)
+
+    def stream(self, *args: Any, **kwargs: Any) -> AsyncIterator[Any]:
+        return record_stream(
+            self.stats, "stream", aiter(self.target.stream(*args, **kwargs))
+        )
+
+
+class InstrumentedBatch:
+    """
+    Write batch that records its commit.
+    """
+
+    __slots__ = ("target", "stats")
+
+    def __init__(self, target: Any, stats: FirestoreStats) -> None:
+        self.target = target
+        self.stats = stats
+
+    def set(self, ref: Any, *args: Any, **kwargs: Any) -> "InstrumentedBatch":
+        self.target.set(unwrap(ref), *args, **kwargs)
+        return self
+
+    def update(self, ref: Any, *args: Any, **kwargs: Any) -> "InstrumentedBatch":
+        self.target.update(unwrap(ref), *args, **kwargs)
+        return self
+
+    def delete(self, ref: Any, *args: Any, **kwargs: Any) -> "InstrumentedBatch":
+        self.target.delete(unwrap(ref), *args, **kwargs)
+        return self
+
+    async def commit(self, *args: Any, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            result = await self.target.commit(*args, **kwargs)
+        except Exception:
+            self.stats.record("commit", time.perf_counter() - start, error=True)
+            raise
+        self.stats.record("commit", time.perf_counter() - start)
+        return result
+
+
+class InstrumentedClient:
+    """
+    Firestore client that records the count, latency, documents read and
+    errors of every operation in `stats`, and adds them to the Server-Timing
+    phases of the current request. Anything not instrumented is passed through
+    to the wrapped client.
+
+    Attributes:
+        target (Any): The wrapped Firestore client.
+        stats (FirestoreStats): The stats to record to.
+    """
+
+    __slots__ = ("target", "stats")
+
+    def __init__(self, target: Any, stats: FirestoreStats) -> None:
+        self.target = target
+        self.stats = stats
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.target, name)
+
+    def collection(self, *path: str) -> InstrumentedQuery:
+        return InstrumentedQuery(self.target.collection(*path), self.stats)
+
+    def document(self, *path: str) -> InstrumentedDocument:
+        return InstrumentedDocument(self.target.document(*path), self.stats)
+
+    def batch(self) -> InstrumentedBatch:
+        return InstrumentedBatch(self.target.batch(), self.stats)
+
+    def get_all(
+        self, refs: Iterable[Any], *args: Any, **kwargs: Any
+    ) -> AsyncIterator[Any]:
+        targets = [unwrap(ref) for ref in refs]
+        return record_stream(
+            self.stats, "get_all", aiter(self.target.get_all(targets, *args, **kwargs))
+        )
@@ -0,0 +1,212 @@
+import asyncio
+import json
+import sqlite3
+import threading
+from collections.abc import AsyncGenerator, Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from datetime import UTC, datetime
+from typing import Any
+
+from src.adapter.book_repository import NotFound, Record, WriteError
+from src.utils.server_timing import timed
+
+# //////////////////////////////////////////////////////////////////////////////
+
+# NOTE: Without a rowid, the table is stored as a B-tree ordered by the primary
+# key, so lookups by ID and pages ordered by ID are a single index range scan.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS books (
+    id TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    update_time TEXT NOT NULL
+) WITHOUT ROWID
+"""
+
+# NOTE: Books are streamed in pages, so no read transaction stays open while
+# the consumer processes them.
+STREAM_PAGE_SIZE = 500
+
+
+def record_from_row(row: tuple[str, str, str]) -> Record:
+    """
+    Build a record from a row of the books table.
+
+    Args:
+        row (tuple[str, str, str]): The ID, JSON data and update time.
+    Returns:
+        Record: The stored book.
+    """
+    return Record(row[0], json.loads(row[1]), datetime.fromisoformat(row[2]))
+
+
+class SQLiteBookRepository:
+    """
+    Books stored in a local SQLite database, e.g. to compare storage engines or
+    run read-heavy workloads without Firestore. The database runs in WAL mode,
+    so reads never wait for writes. Reads run on a pool of `readers` threads
+    with one connection each; writes run on a single thread, as SQLite only
+    allows one writer at a time anyway.
+
+    Attributes:
+        path (str): The path of the database file. Created if it doesn't exist.
+    """
+
+    def __init__(self, path: str, readers: int = 4) -> None:
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: list[sqlite3.Connection] = []
+        self._readers = ThreadPoolExecutor(readers, "sqlite-reader")
+        self._writer = ThreadPoolExecutor(1, "sqlite-writer")
+
+        connection = sqlite3.connect(path)
+        try:
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.execute(SCHEMA)
+            connection.commit()
+        finally:
+            connection.close()
+
+    # //////////////////////////////////////////////////////////////////////////
+
+    async def get(self, book_id: str) -> Record | None:
+        return await self._read(self._get, book_id)
+
+    async def get_many(self, book_ids: list[str]) -> AsyncGenerator[Record]:
+        for record in await self._read(self._get_many, book_ids):
+            yield record
+
+    async def scan(self, after: str | None, limit: int) -> AsyncGenerator[Record]:
+        for record in await self._read(self._scan, after, limit):
+            yield record
+
+    async def stream(self) -> AsyncGenerator[Record]:
+        after: str | None = None
+        while True:
+            records = await self._read(self._scan, after, STREAM_PAGE_SIZE)
+            for record in records:
+                yield record
+            if len(records) < STREAM_PAGE_SIZE:
+                return
+            after = records[-1].id
+
+    async def count(self) -> int:
+        return await self._read(self._count)
+
+    async def set(self, book_id: str, data: dict[str, Any]) -> None:
+        await self._write(self._set_many, [(book_id, data)])
+
+    async def set_many(self, books: Iterable[tuple[str, dict[str, Any]]]) -> None:
+        await self._write(self._set_many, list(books))
+
+    async def update(self, book_id: str, data: dict[str, Any]) -> datetime | None:
+        return await self._write(self._update, book_id, data)
+
+    async def delete(self, book_id: str) -> None:
+        await self._write(self._delete, book_id)
+
+    def close(self) -> None:
+        self._readers.shutdown()
+        self._writer.shutdown()
+        with self._lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections.clear()
+
+    # //////////////////////////////////////////////////////////////////////////
+
+    async def _read[T](self, fn: Callable[..., T], *args: Any) -> T:
+        with timed("sqlite"):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._readers, fn, *args)
+
+    async def _write[T](self, fn: Callable[..., T], *args: Any) -> T:
+        with timed("sqlite"):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._writer, fn, *args)
+
+    def _connection(self) -> sqlite3.Connection:
+        """
+        Return the connection of the current thread, opening it on first use.
+
+        Returns:
+            sqlite3.Connection: The connection in autocommit mode.
+        """
+        connection: sqlite3.Connection | None = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self.path, isolation_level=None, check_same_thread=False
+            )
+            # NOTE: In WAL mode, NORMAL only syncs at checkpoints. A power loss
+            # may roll back the last transactions, but never corrupts the file.
+            connection.execute("PRAGMA synchronous = NORMAL")
+            connection.execute("PRAGMA busy_timeout = 5000")
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+
+    def _get(self, book_id: str) -> Record | None:
+        row = (
+            self._connection()
+            .execute("SELECT id, data, update_time FROM books WHERE id = ?", (book_id,))
+            .fetchone()
+        )
+        return record_from_row(row) if row is not None else None
+
+    def _get_many(self, book_ids: list[str]) -> list[Record]:
+        placeholders = ", ".join("?" * len(book_ids))
+        rows = (
+            self._connection()
+            .execute(
+                f"SELECT id, data, update_time FROM books WHERE id IN ({placeholders})",
+                book_ids,
+            )
+            .fetchall()
+        )
+        return [record_from_row(row) for row in rows]
+
+    def _scan(self, after: str | None, limit: int) -> list[Record]:
+        rows = (
+            self._connection()
+            .execute(
+                "SELECT id, data, update_time FROM books WHERE id > ? ORDER BY id LIMIT ?",
+                (after or "", limit),
+            )
+            .fetchall()
+        )
+        return [record_from_row(row) for row in rows]
+
+    def _count(self) -> int:
+        row = self._connection().execute("SELECT COUNT(*) FROM books").fetchone()
+        return int(row[0])
+
+    def _set_many(self, books: list[tuple[str, dict[str, Any]]]) -> None:
+        update_time = datetime.now(UTC).isoformat()
+        connection = self._connection()
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            connection.executemany(
+                "INSERT OR REPLACE INTO books (id, data, update_time) VALUES (?, ?, ?)",
+                [(book_id, json.dumps(data), update_time) for book_id, data in books],
+            )
+            connection.execute("COMMIT")
+        except sqlite3.Error as e:
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+            raise WriteError(str(e)) from e
+
+    def _update(self, book_id: str, data: dict[str, Any]) -> datetime:
+        update_time = datetime.now(UTC)
+        # NOTE: json_patch merges the fields into the stored data, so the update
+        # is a single statement without reading the book first.
+        cursor = self._connection().execute(
+            "UPDATE books SET data = json_patch(data, ?), update_time = ? WHERE id = ?",
+            (json.dumps(data), update_time.isoformat(), book_id),
+        )
+        if cursor.rowcount == 0:
+            raise NotFound(book_id)
+        return update_time
+
+    def _delete(self, book_id: str) -> None:
+        self._connection().execute("DELETE FROM books WHERE id = ?", (book_id,))
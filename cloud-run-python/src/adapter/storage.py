@@ -0,0 +1,42 @@
+from src.adapter.book_repository import BookRepository
+from src.adapter.firestore_repository import FirestoreBookRepository
+
+# //////////////////////////////////////////////////////////////////////////////
+
+# Shared book repository instance. Defaults to Firestore, which reads the shared
+# Firestore client on every call.
+repository: BookRepository = FirestoreBookRepository()
+
+
+def init_repository(book_repository: BookRepository) -> BookRepository:
+    """
+    Replace the shared book repository for the app lifecycle.
+
+    Args:
+        book_repository (BookRepository): The repository to use.
+    Returns:
+        BookRepository: The shared repository.
+    """
+    global repository
+    repository = book_repository
+    return repository
+
+
+def get_repository() -> BookRepository:
+    """
+    Return the shared book repository.
+
+    Returns:
+        BookRepository: The shared repository.
+    """
+    return repository
+
+
+def close_repository() -> None:
+    """
+    Close the shared book repository during app shutdown and fall back to the
+    Firestore repository.
+    """
+    global repository
+    repository.close()
+    repository = FirestoreBookRepository()
@@ -6,6 +6,23 @@ from src.settings import settings
 # Create the FastAPI app using the runtime factory function
 app = create_runtime()
 
+# NOTE: With the log queue enabled, loggers write to the "queue" handler, which
+# forwards records to the "default" handler on a background thread.
+log_handler = "queue" if settings.LOG_QUEUE_ENABLED else "default"
+log_handlers: dict[str, dict[str, object]] = {
+    "default": {
+        "formatter": "default",
+        "class": "logging.StreamHandler",
+        "stream": "ext://sys.stdout",
+    },
+}
+if settings.LOG_QUEUE_ENABLED:
+    log_handlers["queue"] = {
+        "class": "src.utils.cloud_logging.CloudLoggingQueueHandler",
+        "handlers": ["default"],
+        "queue": {"()": "queue.Queue", "maxsize": settings.LOG_QUEUE_MAX_SIZE},
+    }
+
 if __name__ == "__main__":
     uvicorn.run(
         "src.main:app",
@@ -22,17 +39,15 @@ if __name__ == "__main__":
                     "project": settings.PROJECT,
                 },
             },
-            "handlers": {
-                "default": {
-                    "formatter": "default",
-                    "class": "logging.StreamHandler",
-                    "stream": "ext://sys.stdout",
-                },
-            },
+            "handlers": log_handlers,
             "loggers": {
-                "app": {"handlers": ["default"], "level": "DEBUG", "propagate": False},
+                "app": {
+                    "handlers": [log_handler],
+                    "level": "DEBUG",
+                    "propagate": False,
+                },
                 "uvicorn": {
-                    "handlers": ["default"],
+                    "handlers": [log_handler],
                     "level": "INFO",
                     "propagate": False,
                 },
@@ -1,8 +1,24 @@
+import asyncio
+import base64
+import binascii
+import logging
 import uuid
+from collections.abc import AsyncIterable, AsyncIterator
+from contextlib import aclosing
+from datetime import datetime
+from typing import Annotated, Any
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, StringConstraints, ValidationError
 
-from src.adapter import firestore
+from src.adapter import book_repository, storage
+from src.utils.server_timing import timed
+from src.utils.singleflight import SingleFlight
+from src.utils.ttl_cache import TTLCache
+from src.utils.write_coalescer import WriteCoalescer
+
+# //////////////////////////////////////////////////////////////////////////////
+
+logger = logging.getLogger("app")
 
 # //////////////////////////////////////////////////////////////////////////////
 
@@ -21,6 +37,19 @@ class BookNotFound(Exception):
         super().__init__(f"Book with ID '{book_id}' not found")
 
 
+class InvalidPageToken(Exception):
+    """
+    Exception raised when a page token cannot be decoded into a cursor.
+
+    Attributes:
+        page_token (str): The page token that could not be decoded.
+    """
+
+    def __init__(self, page_token: str):
+        self.page_token = page_token
+        super().__init__(f"Invalid page token '{page_token}'")
+
+
 # //////////////////////////////////////////////////////////////////////////////
 
 
@@ -28,40 +57,197 @@ class Book(BaseModel):
     id: str
     title: str
     author: str
+    # NOTE: The last time the document was written. Used to derive ETags and
+    # never serialized.
+    update_time: datetime | None = Field(default=None, exclude=True)
+
+
+def book_from_snapshot(doc: Any) -> Book:
+    """
+    Build a book from a stored document, e.g. a Firestore document snapshot,
+    falling back to empty strings for missing fields.
+
+    Args:
+        doc (Any): The document to convert.
+    Returns:
+        Book: The book stored in the document.
+    """
+    with timed("model"):
+        data = doc.to_dict() or {}
+        return Book(
+            id=doc.id,
+            title=data.get("title", ""),
+            author=data.get("author", ""),
+            update_time=doc.update_time,
+        )
 
 
 class BookList(BaseModel):
     books: list[Book]
-    total: int
+    total: int | None
+    next_page_token: str | None = None
+
 
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
 
-async def list_books() -> BookList:
+
+def encode_page_token(book_id: str) -> str:
     """
-    List all books in the database.
+    Encode the ID of the last book on a page into an opaque page token.
 
+    Args:
+        book_id (str): The ID of the last book on the current page.
     Returns:
-        BookList: A list of books and the total count.
+        str: The URL-safe page token.
     """
-    client = firestore.get_client()
-    books: list[Book] = []
-    async for doc in client.collection("books").stream():
-        data = doc.to_dict() or {}
-        books.append(
-            Book(
-                id=doc.id,
-                title=data.get("title", ""),
-                author=data.get("author", ""),
-            )
+    return base64.urlsafe_b64encode(book_id.encode()).decode().rstrip("=")
+
+
+def decode_page_token(page_token: str) -> str:
+    """
+    Decode an opaque page token back into the book ID to start after.
+
+    Args:
+        page_token (str): The page token returned by a previous list call.
+    Returns:
+        str: The ID of the last book on the previous page.
+    Raises:
+        InvalidPageToken: If the token is not a valid page token.
+    """
+    try:
+        padding = "=" * (-len(page_token) % 4)
+        book_id = base64.urlsafe_b64decode(page_token + padding).decode()
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidPageToken(page_token)
+    if not book_id or "/" in book_id:
+        raise InvalidPageToken(page_token)
+    return book_id
+
+
+async def stream_books() -> AsyncIterator[Book]:
+    """
+    Stream every book in the storage backend one at a time. Unlike
+    `list_books`, nothing is collected in memory, which makes this suitable for
+    exporting all books.
+
+    Yields:
+        Book: The next stored book.
+    """
+    async for doc in storage.get_repository().stream():
+        yield book_from_snapshot(doc)
+
+
+async def count_books() -> int:
+    """
+    Count all books in the storage backend without reading them, e.g. with a
+    count aggregation in Firestore or `COUNT(*)` in SQLite.
+
+    Returns:
+        int: The number of stored books.
+    """
+    return await storage.get_repository().count()
+
+
+async def list_books(
+    limit: int = DEFAULT_PAGE_SIZE,
+    page_token: str | None = None,
+    include_total: bool = True,
+) -> BookList:
+    """
+    List one page of books in the database, ordered by their ID. Each call
+    reads at most `limit + 1` documents; the extra document only tells us
+    whether another page follows. The total is counted with an aggregation
+    query that runs concurrently with the page fetch.
+
+    Args:
+        limit (int): The maximum number of books to return.
+        page_token (str | None): The token of the page to return, as returned
+            in `next_page_token` by a previous call.
+        include_total (bool): Whether to count all books in the database.
+    Returns:
+        BookList: A page of books, the total count (or None if not requested)
+            and the token of the next page.
+    Raises:
+        InvalidPageToken: If the page token cannot be decoded.
+    """
+    after = decode_page_token(page_token) if page_token is not None else None
+
+    async def fetch_page() -> tuple[list[Book], str | None]:
+        books: list[Book] = []
+        # NOTE: Close the scan before returning early, so the stream is
+        # finished (and recorded) while the request is still running.
+        async with aclosing(storage.get_repository().scan(after, limit + 1)) as docs:
+            async for doc in docs:
+                if len(books) == limit:
+                    return books, encode_page_token(books[-1].id)
+                books.append(book_from_snapshot(doc))
+        return books, None
+
+    total: int | None = None
+    if include_total:
+        (books, next_page_token), total = await asyncio.gather(
+            fetch_page(), count_books()
         )
-    return BookList(books=books, total=len(books))
+    else:
+        books, next_page_token = await fetch_page()
+    return BookList(books=books, total=total, next_page_token=next_page_token)
 
 
 # //////////////////////////////////////////////////////////////////////////////
 
 
+# Shared read-through cache for `get_book`. Stays disabled until `init_cache`
+# is called during the app lifespan.
+cache: TTLCache[str, Book] | None = None
+
+# Coalesces concurrent `get_book` reads for the same ID into one storage read.
+book_reads: SingleFlight[str, Book] = SingleFlight()
+
+
+def init_cache(ttl: float, max_entries: int) -> TTLCache[str, Book] | None:
+    """
+    Initialize the shared book cache. A non-positive TTL or size disables it.
+
+    Args:
+        ttl (float): Seconds a cached book stays fresh.
+        max_entries (int): Maximum number of books kept in memory.
+    Returns:
+        TTLCache[str, Book] | None: The initialized cache, or None if disabled.
+    """
+    global cache
+    cache = TTLCache(ttl, max_entries) if ttl > 0 and max_entries > 0 else None
+    return cache
+
+
+def close_cache() -> None:
+    """
+    Drop the shared book cache during app shutdown.
+    """
+    global cache
+    if cache is not None:
+        cache.clear()
+        cache = None
+
+
+def invalidate_cached_book(book_id: str) -> None:
+    """
+    Evict a book from the shared cache after it was written. Any read still in
+    flight for the book is detached so later readers see the write.
+
+    Args:
+        book_id (str): The ID of the book to evict.
+    """
+    book_reads.forget(book_id)
+    if cache is not None:
+        cache.invalidate(book_id)
+
+
 async def get_book(book_id: str) -> Book:
     """
-    Retrieve a book by its ID.
+    Retrieve a book by its ID. Books are served from the shared cache while
+    fresh. Otherwise, concurrent callers for the same ID share a single
+    database read.
 
     Args:
         book_id (str): The ID of the book to retrieve.
@@ -70,15 +256,96 @@ async def get_book(book_id: str) -> Book:
     Raises:
         BookNotFound: If no book with the given ID exists.
     """
-    client = firestore.get_client()
-    doc = await client.collection("books").document(book_id).get()
-    if not doc.exists:
-        raise BookNotFound(book_id)
-    data = doc.to_dict() or {}
-    return Book(
-        id=doc.id,
-        title=data.get("title", ""),
-        author=data.get("author", ""),
+    if cache is not None:
+        cached = cache.get(book_id)
+        if cached is not None:
+            return cached
+    return await book_reads.do(book_id, lambda: fetch_book(book_id))
+
+
+async def fetch_book(book_id: str) -> Book:
+    """
+    Read a book from the database and store it in the shared cache, unless a
+    write invalidated the book while the read was in flight.
+
+    Args:
+        book_id (str): The ID of the book to read.
+    Returns:
+        Book: The book with the specified ID.
+    Raises:
+        BookNotFound: If no book with the given ID exists.
+    """
+    loading = cache
+    load = loading.begin_load(book_id) if loading is not None else 0
+    book: Book | None = None
+    try:
+        doc = await storage.get_repository().get(book_id)
+        if doc is None:
+            raise BookNotFound(book_id)
+        book = book_from_snapshot(doc)
+        return book
+    finally:
+        if loading is not None:
+            loading.finish_load(book_id, load, book)
+
+
+# //////////////////////////////////////////////////////////////////////////////
+
+MAX_BATCH_GET_IDS = 100
+
+# NOTE: Firestore document IDs must not be empty or contain slashes.
+BookId = Annotated[str, StringConstraints(min_length=1, pattern=r"^[^/]+$")]
+
+
+class BatchGetBooks(BaseModel):
+    ids: list[BookId] = Field(min_length=1, max_length=MAX_BATCH_GET_IDS)
+
+
+class BookBatch(BaseModel):
+    books: list[Book]
+    missing: list[str]
+
+
+async def batch_get_books(book_ids: list[str]) -> BookBatch:
+    """
+    Retrieve several books by their IDs. Fresh books are served from the
+    shared cache; all others are read with a single `get_many` call.
+
+    Args:
+        book_ids (list[str]): The IDs of the books to retrieve. Duplicates are
+            only returned once.
+    Returns:
+        BookBatch: The found books in request order and the IDs of all books
+            that do not exist.
+    """
+    book_ids = list(dict.fromkeys(book_ids))
+    found: dict[str, Book] = {}
+    if cache is not None:
+        for book_id in book_ids:
+            cached = cache.get(book_id)
+            if cached is not None:
+                found[book_id] = cached
+
+    pending = [book_id for book_id in book_ids if book_id not in found]
+    if pending:
+        loading = cache
+        loads = (
+            {book_id: loading.begin_load(book_id) for book_id in pending}
+            if loading is not None
+            else {}
+        )
+        try:
+            async for doc in storage.get_repository().get_many(pending):
+                book = book_from_snapshot(doc)
+                found[book.id] = book
+        finally:
+            if loading is not None:
+                for book_id, load in loads.items():
+                    loading.finish_load(book_id, load, found.get(book_id))
+
+    return BookBatch(
+        books=[found[book_id] for book_id in book_ids if book_id in found],
+        missing=[book_id for book_id in book_ids if book_id not in found],
     )
 
 
@@ -90,26 +357,201 @@ class CreateBook(BaseModel):
     author: str | None = None
 
 
-async def create_book(payload: CreateBook) -> Book:
+def new_book(payload: CreateBook) -> Book:
     """
-    Create a new book record in the database.
+    Build a new book with a generated ID, filling in default values for
+    missing fields.
 
     Args:
         payload (CreateBook): The data for the new book.
     Returns:
-        Book: The created book with its assigned ID.
+        Book: The new book, not yet persisted.
     """
-    client = firestore.get_client()
     book_id = str(uuid.uuid4())
-    book = Book(
+    return Book(
         id=book_id,
         title=payload.title or f"Title {book_id}",
         author=payload.author or f"Author {book_id}",
     )
-    await client.document("books", book.id).set(book.model_dump())
+
+
+# Shared coalescer for the writes of `create_book`. Stays disabled until
+# `init_create_batching` is called during the app lifespan.
+create_writes: WriteCoalescer[tuple[str, dict[str, Any]]] | None = None
+
+
+async def write_books(books: list[tuple[str, dict[str, Any]]]) -> None:
+    """
+    Write a batch of created books atomically.
+
+    Args:
+        books (list[tuple[str, dict[str, Any]]]): The IDs and data of the books.
+    Raises:
+        WriteError: If the books could not be written.
+    """
+    await storage.get_repository().set_many(books)
+
+
+async def write_book(book: tuple[str, dict[str, Any]]) -> None:
+    """
+    Write a single created book, e.g. after its batch failed.
+
+    Args:
+        book (tuple[str, dict[str, Any]]): The ID and data of the book.
+    """
+    await storage.get_repository().set(*book)
+
+
+def init_create_batching(
+    window: float, max_items: int
+) -> WriteCoalescer[tuple[str, dict[str, Any]]] | None:
+    """
+    Initialize the shared coalescer for created books. A non-positive window or
+    fewer than two items per batch disables it.
+
+    Args:
+        window (float): Seconds to wait for more creates after the first one.
+        max_items (int): The number of creates that are written right away.
+            Capped at the Firestore limit of writes per batch.
+    Returns:
+        WriteCoalescer[tuple[str, dict[str, Any]]] | None: The initialized
+            coalescer, or None if disabled.
+    """
+    global create_writes
+    create_writes = (
+        WriteCoalescer(
+            write_books,
+            write_book,
+            window,
+            min(max_items, book_repository.MAX_BATCH_WRITES),
+        )
+        if window > 0 and max_items > 1
+        else None
+    )
+    return create_writes
+
+
+async def close_create_batching() -> None:
+    """
+    Write the pending creates and drop the shared coalescer during app
+    shutdown.
+    """
+    global create_writes
+    if create_writes is not None:
+        await create_writes.close()
+        create_writes = None
+
+
+async def create_book(payload: CreateBook) -> Book:
+    """
+    Create a new book record in the database. With create batching enabled,
+    concurrent creates are committed together as one batched write.
+
+    Args:
+        payload (CreateBook): The data for the new book.
+    Returns:
+        Book: The created book with its assigned ID.
+    """
+    book = new_book(payload)
+    if create_writes is not None:
+        with timed("write_batch"):
+            await create_writes.submit((book.id, book.model_dump()))
+    else:
+        await storage.get_repository().set(book.id, book.model_dump())
+    invalidate_cached_book(book.id)
     return book
 
 
+# //////////////////////////////////////////////////////////////////////////////
+
+IMPORT_BATCH_SIZE = book_repository.MAX_BATCH_WRITES
+IMPORT_MAX_IN_FLIGHT = 4
+
+
+class ImportFailure(BaseModel):
+    line: int
+    message: str
+
+
+class BookImport(BaseModel):
+    created: int
+    failures: list[ImportFailure]
+
+
+async def import_books(
+    lines: AsyncIterable[bytes],
+    batch_size: int = IMPORT_BATCH_SIZE,
+    max_in_flight: int = IMPORT_MAX_IN_FLIGHT,
+) -> BookImport:
+    """
+    Create books from a stream of JSON encoded `CreateBook` rows. Rows are
+    validated as they arrive and written with batched writes. At most
+    `max_in_flight` batches are committed concurrently; once that limit is
+    reached, no further rows are read until a batch completes.
+
+    Args:
+        lines (AsyncIterable[bytes]): One JSON object per item.
+        batch_size (int): The number of books written per batch.
+        max_in_flight (int): The maximum number of concurrent batch commits.
+    Returns:
+        BookImport: The number of created books and the rows that failed,
+            identified by their 1-based line number.
+    """
+    repository = storage.get_repository()
+    slots = asyncio.Semaphore(max_in_flight)
+    commits: set[asyncio.Task[None]] = set()
+    failures: list[ImportFailure] = []
+    created = 0
+
+    async def commit(rows: list[tuple[int, Book]]) -> None:
+        nonlocal created
+        try:
+            await repository.set_many((book.id, book.model_dump()) for _, book in rows)
+            created += len(rows)
+        except Exception as e:
+            # NOTE: Not only a WriteError (e.g. a RetryError of the client),
+            # so a failed batch never loses the report of the other batches.
+            logger.error("Failed to import batch of %d books: %s", len(rows), e)
+            failures.extend(
+                ImportFailure(line=line, message="Failed to write book")
+                for line, _ in rows
+            )
+        finally:
+            slots.release()
+
+    async def flush(rows: list[tuple[int, Book]]) -> None:
+        await slots.acquire()
+        task = asyncio.create_task(commit(rows))
+        commits.add(task)
+        task.add_done_callback(commits.discard)
+
+    rows: list[tuple[int, Book]] = []
+    try:
+        line_number = 0
+        async for line in lines:
+            line_number += 1
+            try:
+                payload = CreateBook.model_validate_json(line)
+            except ValidationError as e:
+                message = "; ".join(
+                    f"{'.'.join(str(loc) for loc in error['loc']) or 'row'}: {error['msg']}"
+                    for error in e.errors(include_input=False)
+                )
+                failures.append(ImportFailure(line=line_number, message=message))
+                continue
+            rows.append((line_number, new_book(payload)))
+            if len(rows) >= batch_size:
+                await flush(rows)
+                rows = []
+        if rows:
+            await flush(rows)
+    finally:
+        await asyncio.gather(*commits)
+
+    failures.sort(key=lambda failure: failure.line)
+    return BookImport(created=created, failures=failures)
+
+
 # //////////////////////////////////////////////////////////////////////////////
 
 
@@ -118,34 +560,40 @@ class UpdateBook(BaseModel):
     author: str | None = None
 
 
+UPDATABLE_FIELDS = frozenset(UpdateBook.model_fields)
+
+
 async def update_book(book_id: str, payload: UpdateBook) -> Book:
     """
-    Update an existing book record in the database. Every invocation fetches at
-    least the current book data to ensure the returned book reflects the latest
-    state, even if no updates are applied.
+    Update an existing book record in the database. The update is sent without
+    reading the book first; the repository rejects updates of missing books, so
+    existence is checked as part of the write. If the payload sets every field,
+    the response is built from the payload alone. Otherwise, the book is read
+    back after the write so the response reflects its latest state.
 
     Args:
         id (str): The ID of the book to update.
         payload (UpdateBook): The data to update for the book.
     Returns:
         Book: The updated book.
+    Raises:
+        BookNotFound: If no book with the given ID exists.
     """
-    client = firestore.get_client()
-    doc_ref = client.document("books", book_id)
-    doc = await doc_ref.get()
-    if not doc.exists:
-        raise BookNotFound(book_id)
-
-    current = doc.to_dict() or {}
+    repository = storage.get_repository()
     updates = payload.model_dump(exclude_unset=True, exclude_none=True)
     if updates:
-        await doc_ref.update(updates)
-
-    return Book(
-        id=book_id,
-        **{k: v for k, v in current.items() if k != "id" and k not in updates},
-        **updates,
-    )
+        try:
+            update_time = await repository.update(book_id, updates)
+        except book_repository.NotFound:
+            raise BookNotFound(book_id)
+        invalidate_cached_book(book_id)
+        if updates.keys() >= UPDATABLE_FIELDS:
+            return Book(id=book_id, **updates, update_time=update_time)
+
+    doc = await repository.get(book_id)
+    if doc is None:
+        raise BookNotFound(book_id)
+    return book_from_snapshot(doc)
 
 
 # //////////////////////////////////////////////////////////////////////////////
@@ -159,5 +607,5 @@ async def delete_book(book_id: str) -> None:
     Args:
         id (str): The ID of the book to delete.
     """
-    client = firestore.get_client()
-    await client.document("books", book_id).delete()
+    await storage.get_repository().delete(book_id)
+    invalidate_cached_book(book_id)
@@ -1,13 +1,124 @@
-from fastapi import APIRouter, HTTPException
+from datetime import datetime
+from typing import Annotated
+
+from fastapi import APIRouter, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 
 from src.modules import books
+from src.utils import ndjson
+from src.utils.accept import select_media_type
+from src.utils.etag import etag_matches, make_etag
+from src.utils.server_timing import ServerTimingRoute
+
+router = APIRouter(prefix="/books", tags=["books"], route_class=ServerTimingRoute)
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# NOTE: Query parameters of a page of books, which a full NDJSON export has no
+# use for.
+PAGE_PARAMS = ("limit", "page_token", "include_total")
+
+
+def book_etag(book: books.Book) -> str | None:
+    """
+    Derive the ETag of a book from its document update time.
+
+    Args:
+        book (books.Book): The book to tag.
+    Returns:
+        str | None: The ETag, or None if the update time is unknown.
+    """
+    if book.update_time is None:
+        return None
+    return make_etag(book.id, book.update_time.isoformat())
+
+
+def book_list_etag(book_list: books.BookList) -> str | None:
+    """
+    Derive the ETag of a page of books from the IDs on the page and their most
+    recent update time. Any added, removed or updated book changes the tag.
+
+    Args:
+        book_list (books.BookList): The page of books to tag.
+    Returns:
+        str | None: The ETag, or None if an update time is unknown.
+    """
+    last_update_time: datetime | None = None
+    for book in book_list.books:
+        if book.update_time is None:
+            return None
+        if last_update_time is None or book.update_time > last_update_time:
+            last_update_time = book.update_time
+    return make_etag(
+        book_list.total,
+        book_list.next_page_token,
+        last_update_time.isoformat() if last_update_time else None,
+        *(book.id for book in book_list.books),
+    )
 
-router = APIRouter(prefix="/books", tags=["books"])
 
+def not_modified(etag: str, vary: str | None = None) -> Response:
+    """
+    Build an empty 304 response for a client that holds the current version.
 
-@router.get("")
-async def get_books() -> books.BookList:
-    return await books.list_books()
+    Args:
+        etag (str): The ETag of the current version.
+        vary (str | None): The Vary header the full response would carry.
+    Returns:
+        Response: The 304 Not Modified response.
+    """
+    headers = {"ETag": etag}
+    if vary is not None:
+        headers["Vary"] = vary
+    return Response(status_code=304, headers=headers)
+
+
+@router.get("", response_model=books.BookList)
+async def get_books(
+    request: Request,
+    response: Response,
+    limit: Annotated[
+        int, Query(ge=1, le=books.MAX_PAGE_SIZE)
+    ] = books.DEFAULT_PAGE_SIZE,
+    page_token: str | None = None,
+    include_total: bool = True,
+    accept: Annotated[str | None, Header()] = None,
+    if_none_match: Annotated[str | None, Header()] = None,
+) -> books.BookList | Response:
+    # NOTE: Clients preferring NDJSON get the whole collection streamed, so
+    # memory stays flat and the first byte does not wait for the last document.
+    # Page parameters are rejected instead of silently exporting everything.
+    # NOTE: Both representations share a URL, so caches must key on Accept.
+    response.headers["Vary"] = "Accept"
+    if (
+        accept is not None
+        and select_media_type(accept, ["application/json", NDJSON_MEDIA_TYPE])
+        == NDJSON_MEDIA_TYPE
+    ):
+        ignored = [name for name in PAGE_PARAMS if name in request.query_params]
+        if ignored:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Not supported for NDJSON exports: {', '.join(ignored)}",
+            )
+        return StreamingResponse(
+            ndjson.encode_lines(books.stream_books()),
+            media_type=NDJSON_MEDIA_TYPE,
+            headers={"Vary": "Accept"},
+        )
+    try:
+        book_list = await books.list_books(
+            limit=limit, page_token=page_token, include_total=include_total
+        )
+    except books.InvalidPageToken as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    etag = book_list_etag(book_list)
+    if etag is not None:
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag, vary="Accept")
+        response.headers["ETag"] = etag
+    return book_list
 
 
 @router.post("")
@@ -15,13 +126,37 @@ async def create_book(payload: books.CreateBook) -> books.Book:
     return await books.create_book(payload)
 
 
-@router.get("/{book_id}")
-async def get_book(book_id: str) -> books.Book:
+@router.post(":import")
+async def import_books(request: Request) -> books.BookImport:
+    try:
+        return await books.import_books(ndjson.iter_lines(request.stream()))
+    except ndjson.LineTooLong as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+
+@router.post(":batchGet")
+async def batch_get_books(payload: books.BatchGetBooks) -> books.BookBatch:
+    return await books.batch_get_books(payload.ids)
+
+
+@router.get("/{book_id}", response_model=books.Book)
+async def get_book(
+    book_id: str,
+    response: Response,
+    if_none_match: Annotated[str | None, Header()] = None,
+) -> books.Book | Response:
     try:
-        return await books.get_book(book_id)
+        book = await books.get_book(book_id)
     except books.BookNotFound as e:
         raise HTTPException(status_code=404, detail=str(e))
 
+    etag = book_etag(book)
+    if etag is not None:
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        response.headers["ETag"] = etag
+    return book
+
 
 @router.patch("/{book_id}")
 async def update_book(book_id: str, payload: books.UpdateBook) -> books.Book:
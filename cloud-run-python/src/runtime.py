@@ -4,18 +4,31 @@ from contextlib import asynccontextmanager
 from fastapi import APIRouter, FastAPI, HTTPException
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 
-from src.adapter import firestore
+from src.adapter import firestore, storage
+from src.adapter.sqlite_repository import SQLiteBookRepository
+from src.modules import books as books_module
 from src.routes import books
 from src.settings import Settings, settings
-from src.utils.cloud_logging import CloudLoggingMiddleware
+from src.utils.cache_control import CacheControlMiddleware
+from src.utils.cloud_logging import (
+    CloudLoggingMiddleware,
+    start_log_queues,
+    stop_log_queues,
+)
+from src.utils.compression import CompressionMiddleware
 from src.utils.exception_handlers import (
+    close_log_sampler,
     handle_general_exception,
     handle_http_exception,
     handle_validation_exception,
+    init_log_sampler,
 )
+from src.utils.metrics import CONTENT_TYPE, HttpMetrics, MetricsMiddleware
+from src.utils.profiling import ProfilingMiddleware
 from src.utils.secure_headers import SecureHeadersMiddleware
+from src.utils.server_timing import ServerTimingMiddleware
 
 
 def create_runtime(runtime_settings: Settings | None = None) -> FastAPI:
@@ -23,8 +36,8 @@ def create_runtime(runtime_settings: Settings | None = None) -> FastAPI:
     Factory function to create and configure the FastAPI app.
     This function initializes the FastAPI app, sets up middleware, exception
     handlers, and includes API routes. It also manages the lifespan of the app,
-    ensuring that the Firestore database connection is properly initialized and
-    closed.
+    ensuring that the storage backend, the book cache, the
+    create batching and the log queues are properly initialized and closed.
 
     Args:
         runtime_settings (Settings | None): Optional settings to override the default settings.
@@ -35,12 +48,53 @@ def create_runtime(runtime_settings: Settings | None = None) -> FastAPI:
 
     @asynccontextmanager
     async def lifespan(_: FastAPI) -> AsyncIterator[None]:
-        firestore.init_client()
+        start_log_queues()
+        if active_settings.BOOK_STORAGE == "sqlite":
+            storage.init_repository(
+                SQLiteBookRepository(
+                    active_settings.SQLITE_PATH, active_settings.SQLITE_READERS
+                )
+            )
+        elif active_settings.FIRESTORE_FAKE_ENABLED:
+            firestore.init_fake_client(
+                latency=active_settings.FIRESTORE_FAKE_LATENCY_MS / 1000,
+                rpc_latency={
+                    name: latency / 1000
+                    for name, latency in active_settings.FIRESTORE_FAKE_RPC_LATENCY_MS.items()
+                },
+                jitter=active_settings.FIRESTORE_FAKE_JITTER_MS / 1000,
+                failure_rate=active_settings.FIRESTORE_FAKE_FAILURE_RATE,
+                seed=active_settings.FIRESTORE_FAKE_SEED,
+            )
+        else:
+            firestore.init_client()
+        books_module.init_cache(
+            active_settings.BOOK_CACHE_TTL_SECONDS,
+            active_settings.BOOK_CACHE_MAX_ENTRIES,
+        )
+        books_module.init_create_batching(
+            active_settings.BOOK_CREATE_BATCH_WINDOW_MS / 1000,
+            active_settings.BOOK_CREATE_BATCH_MAX_ITEMS,
+        )
+        init_log_sampler(
+            active_settings.LOG_SAMPLE_LIMIT,
+            active_settings.LOG_SAMPLE_WINDOW_SECONDS,
+        )
         try:
             yield
         finally:
+            close_log_sampler()
+            await books_module.close_create_batching()
+            books_module.close_cache()
+            storage.close_repository()
             firestore.close_client()
+            stop_log_queues()
 
+    # NOTE: No custom `default_response_class` is set on purpose. With the
+    # default one, FastAPI serializes response models straight to JSON bytes in
+    # pydantic-core, which a custom class would replace by the slower
+    # `jsonable_encoder` + `json.dumps` round trip.
+    # See scripts/benchmark_serialization.py
     app = FastAPI(
         title=active_settings.NAME,
         docs_url=None,
@@ -55,8 +109,31 @@ def create_runtime(runtime_settings: Settings | None = None) -> FastAPI:
         },
     )
 
+    if active_settings.PROFILING_ENABLED and active_settings.PROFILING_TOKEN:
+        # NOTE: Added before CloudLoggingMiddleware, so it runs inside of it and
+        # the profile is logged with the trace context of the request.
+        app.add_middleware(
+            ProfilingMiddleware,
+            token=active_settings.PROFILING_TOKEN,
+            limit=active_settings.PROFILING_LIMIT,
+        )
     app.add_middleware(CloudLoggingMiddleware)
     app.add_middleware(SecureHeadersMiddleware)
+    app.add_middleware(
+        CacheControlMiddleware,
+        policies=active_settings.api_cache_control_policies,
+        disabled=active_settings.PYTHON_ENV == "development",
+    )
+    app.add_middleware(
+        CompressionMiddleware,
+        levels=active_settings.COMPRESSION_LEVELS,
+        minimum_size=active_settings.COMPRESSION_MINIMUM_SIZE,
+    )
+    if active_settings.SERVER_TIMING_ENABLED:
+        app.add_middleware(
+            ServerTimingMiddleware,
+            log_labels=active_settings.SERVER_TIMING_LOG_LABELS,
+        )
     app.add_middleware(
         CORSMiddleware,
         allow_origins=active_settings.all_cors_origins,
@@ -69,6 +146,31 @@ def create_runtime(runtime_settings: Settings | None = None) -> FastAPI:
     async def health() -> JSONResponse:
         return JSONResponse({"message": "ok"}, status_code=200)
 
+    if active_settings.METRICS_ENABLED:
+        # NOTE: Added last, so the measured duration covers every middleware.
+        metrics = HttpMetrics()
+        app.add_middleware(MetricsMiddleware, metrics=metrics)
+
+        @app.get("/metrics", tags=["metrics"])
+        async def get_metrics() -> PlainTextResponse:
+            return PlainTextResponse(metrics.render(), media_type=CONTENT_TYPE)
+
+    if active_settings.DEBUG_STATS_ENABLED:
+
+        @app.get("/debug/stats", tags=["debug"])
+        async def get_debug_stats() -> JSONResponse:
+            cache = books_module.cache
+            create_writes = books_module.create_writes
+            return JSONResponse(
+                {
+                    "firestore": firestore.stats.snapshot(),
+                    "book_cache": cache.stats() if cache is not None else None,
+                    "create_batching": (
+                        create_writes.stats() if create_writes is not None else None
+                    ),
+                }
+            )
+
     router = APIRouter()
     router.include_router(books.router)
     app.include_router(router, prefix=active_settings.API_V1_PREFIX)
@@ -3,6 +3,8 @@ from typing import Literal
 from pydantic import computed_field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+from src.utils.cache_control import CachePolicy
+
 
 class Settings(BaseSettings):
     """
@@ -39,5 +41,89 @@ class Settings(BaseSettings):
     def all_cors_origins(self) -> list[str]:
         return [str(origin).rstrip("/") for origin in self.CORS_ORIGINS]
 
+    # NOTE: Where books are stored. With `sqlite`, books are kept in a local
+    # database file at SQLITE_PATH instead of Firestore, read by SQLITE_READERS
+    # threads, e.g. to compare storage engines or run read-heavy workloads.
+    BOOK_STORAGE: Literal["firestore", "sqlite"] = "firestore"
+    SQLITE_PATH: str = "books.db"
+    SQLITE_READERS: int = 4
+
+    # NOTE: Replace Firestore with an in-memory fake for local development and
+    # performance testing. Every RPC takes FIRESTORE_FAKE_LATENCY_MS (or the
+    # value for its name in FIRESTORE_FAKE_RPC_LATENCY_MS, e.g. `get`), +/-
+    # FIRESTORE_FAKE_JITTER_MS, and fails at FIRESTORE_FAKE_FAILURE_RATE.
+    FIRESTORE_FAKE_ENABLED: bool = False
+    FIRESTORE_FAKE_LATENCY_MS: float = 0.0
+    FIRESTORE_FAKE_RPC_LATENCY_MS: dict[str, float] = {}
+    FIRESTORE_FAKE_JITTER_MS: float = 0.0
+    FIRESTORE_FAKE_FAILURE_RATE: float = 0.0
+    FIRESTORE_FAKE_SEED: int = 0
+
+    # NOTE: Set either value to 0 to disable the in-memory book cache.
+    BOOK_CACHE_TTL_SECONDS: float = 30.0
+    BOOK_CACHE_MAX_ENTRIES: int = 1024
+
+    # NOTE: Creates arriving within BOOK_CREATE_BATCH_WINDOW_MS of each other
+    # are committed as one batched write, or as soon as
+    # BOOK_CREATE_BATCH_MAX_ITEMS (at most 500) are pending. Set the window to 0
+    # to write every create on its own.
+    BOOK_CREATE_BATCH_WINDOW_MS: float = 0.0
+    BOOK_CREATE_BATCH_MAX_ITEMS: int = 100
+
+    # NOTE: When enabled, log records are written by a background thread, so
+    # the event loop never blocks on stdout. Records are dropped once the queue
+    # holds LOG_QUEUE_MAX_SIZE records.
+    LOG_QUEUE_ENABLED: bool = False
+    LOG_QUEUE_MAX_SIZE: int = 10_000
+
+    # NOTE: The exception handlers log the first LOG_SAMPLE_LIMIT errors per
+    # handler, route and error type within LOG_SAMPLE_WINDOW_SECONDS, followed
+    # by a summary of the suppressed ones. Set either value to 0 to log all.
+    LOG_SAMPLE_LIMIT: int = 10
+    LOG_SAMPLE_WINDOW_SECONDS: float = 60.0
+
+    # NOTE: Send the time spent in Firestore, building models and serializing
+    # responses in the Server-Timing header. Optionally also log it per request.
+    SERVER_TIMING_ENABLED: bool = True
+    SERVER_TIMING_LOG_LABELS: bool = False
+
+    # NOTE: Serve request metrics in the Prometheus text format on /metrics.
+    # Off by default, as the endpoint is not authenticated.
+    METRICS_ENABLED: bool = False
+
+    # NOTE: Serve Firestore operation stats and cache counters as JSON on
+    # /debug/stats. Off by default, as it exposes internals of the service.
+    DEBUG_STATS_ENABLED: bool = False
+
+    # NOTE: Requests that send PROFILING_TOKEN in the X-Profile-Token header are
+    # profiled with cProfile and the PROFILING_LIMIT hottest functions logged.
+    # Profiling is only possible if enabled and a token is set.
+    PROFILING_ENABLED: bool = False
+    PROFILING_TOKEN: str = ""
+    PROFILING_LIMIT: int = 30
+
+    # NOTE: Cache-Control policies keyed by route template, relative to
+    # API_V1_PREFIX. Disabled in development, where every matched route is sent
+    # with `no-store`.
+    CACHE_CONTROL_POLICIES: dict[str, CachePolicy] = {
+        "/books": CachePolicy(max_age=300, s_maxage=600, stale_while_revalidate=60),
+        "/books/{book_id}": CachePolicy(
+            max_age=300, s_maxage=600, stale_while_revalidate=60
+        ),
+    }
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def api_cache_control_policies(self) -> dict[str, CachePolicy]:
+        return {
+            f"{self.API_V1_PREFIX}{path}": policy
+            for path, policy in self.CACHE_CONTROL_POLICIES.items()
+        }
+
+    # NOTE: Compression level per content coding, most preferred first. `br`
+    # and `zstd` are only used if `brotli` or `zstandard` is installed.
+    COMPRESSION_LEVELS: dict[str, int] = {"zstd": 3, "br": 4, "gzip": 6}
+    COMPRESSION_MINIMUM_SIZE: int = 500
+
 
 settings = Settings()
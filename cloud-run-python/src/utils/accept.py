@@ -0,0 +1,41 @@
+def select_media_type(accept: str, media_types: list[str]) -> str | None:
+    """
+    Pick the media type to respond with from the Accept request header. Each
+    media type gets the quality of the most specific range matching it, e.g.
+    `application/json` before `application/*` before `*/*`. The client's
+    quality values win; ties are broken by the order of `media_types`.
+    See https://www.rfc-editor.org/rfc/rfc9110#name-accept
+
+    Args:
+        accept (str): The Accept request header.
+        media_types (list[str]): The supported media types, most preferred
+            first.
+    Returns:
+        str | None: The selected media type, or None if the client accepts
+            none of them.
+    """
+    qualities: dict[str, float] = {}
+    for item in accept.lower().split(","):
+        media_range, *params = item.split(";")
+        quality = 1.0
+        for param in params:
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        media_range = media_range.strip()
+        if media_range:
+            qualities[media_range] = quality
+
+    selected: str | None = None
+    best = 0.0
+    for media_type in media_types:
+        main_type = media_type.partition("/")[0]
+        quality = qualities.get(
+            media_type, qualities.get(f"{main_type}/*", qualities.get("*/*", 0.0))
+        )
+        if quality > best:
+            selected, best = media_type, quality
+    return selected
@@ -0,0 +1,109 @@
+from pydantic import BaseModel
+from starlette.datastructures import MutableHeaders
+from starlette.routing import compile_path
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# //////////////////////////////////////////////////////////////////////////////
+
+# NOTE: Only responses with these status codes are stored by shared caches
+# without further instructions, so other responses are left untouched.
+# See https://www.rfc-editor.org/rfc/rfc9110#name-overview-of-status-codes
+CACHEABLE_STATUS_CODES = frozenset({200, 203, 204, 206, 300, 301, 304, 308})
+
+NO_CACHE = "no-cache, no-store, must-revalidate"
+
+
+class CachePolicy(BaseModel):
+    """
+    Caching policy for the responses of a single route.
+
+    Attributes:
+        max_age (int | None): Seconds a browser may reuse the response.
+        s_maxage (int | None): Seconds a shared cache (e.g. Cloud CDN) may
+            reuse the response.
+        stale_while_revalidate (int | None): Seconds a stale response may be
+            served while it is revalidated in the background.
+        private (bool): Whether only the browser, not shared caches, may store
+            the response.
+        no_store (bool): Whether the response must not be stored at all.
+    """
+
+    max_age: int | None = None
+    s_maxage: int | None = None
+    stale_while_revalidate: int | None = None
+    private: bool = False
+    no_store: bool = False
+
+    def header_value(self) -> str:
+        """
+        Render the policy as a Cache-Control header value.
+
+        Returns:
+            str: The Cache-Control header value.
+        """
+        if self.no_store:
+            return "no-store"
+        directives = ["private" if self.private else "public"]
+        if self.max_age is not None:
+            directives.append(f"max-age={self.max_age}")
+        if self.s_maxage is not None and not self.private:
+            directives.append(f"s-maxage={self.s_maxage}")
+        if self.stale_while_revalidate is not None:
+            directives.append(f"stale-while-revalidate={self.stale_while_revalidate}")
+        return ", ".join(directives)
+
+
+# //////////////////////////////////////////////////////////////////////////////
+
+
+class CacheControlMiddleware:
+    """
+    Middleware that sets the Cache-Control header of GET and HEAD responses
+    according to a policy per route template (e.g. `/v1/books/{book_id}`).
+    Responses that already carry a Cache-Control header are left untouched.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        policies: dict[str, CachePolicy],
+        disabled: bool = False,
+    ) -> None:
+        self.app = app
+        # NOTE: Compile every route template and render every header value once
+        # instead of on each request.
+        self.policies = [
+            (compile_path(path)[0], NO_CACHE if disabled else policy.header_value())
+            for path, policy in policies.items()
+        ]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            return await self.app(scope, receive, send)
+
+        value = next(
+            (value for regex, value in self.policies if regex.match(scope["path"])),
+            None,
+        )
+        if value is None:
+            return await self.app(scope, receive, send)
+
+        async def custom_send(message: Message) -> None:
+            """
+            Custom send function that adds the Cache-Control header of the
+            matched route.
+
+            Args:
+                message (Message): The message to send.
+            """
+            if (
+                message["type"] == "http.response.start"
+                and message["status"] in CACHEABLE_STATUS_CODES
+            ):
+                headers = MutableHeaders(scope=message)
+                if "Cache-Control" not in headers:
+                    headers["Cache-Control"] = value
+
+            await send(message)
+
+        await self.app(scope, receive, custom_send)
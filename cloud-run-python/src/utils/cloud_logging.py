@@ -1,11 +1,19 @@
+import copy
 import json
 import logging
+import logging.handlers
 import re
+import time
 from contextvars import ContextVar
+from json.encoder import encode_basestring_ascii
+from queue import Empty, Full, Queue
 from typing import Any
 
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+# NOTE: Same as `json.dumps(labels, ensure_ascii=False)`, without creating a new
+# encoder for every record.
+labels_encoder = json.JSONEncoder(ensure_ascii=False)
 
 
 class CloudLoggingFormatter(logging.Formatter):
@@ -24,10 +32,61 @@ class CloudLoggingFormatter(logging.Formatter):
     def __init__(self, fmt: str = "", project: str | None = None):
         logging.Formatter.__init__(self, fmt)
         self.project = project
+        # NOTE: Constant fragments of the output are rendered once, so format()
+        # only has to encode the values that change per record.
+        self.trace_prefix = (
+            f"projects/{project}/traces/" if project is not None else None
+        )
+        self.record_prefixes = {
+            level: f'{{"severity": {encode_basestring_ascii(severity)}, "message": '
+            for level, severity in self.severity_map.items()
+        }
 
     def format(self, record: logging.LogRecord) -> str:
-        logging.Formatter.format(self, record)
-        return json.dumps(self.parse_record(record))
+        """
+        Render the log record as the same JSON document as
+        `json.dumps(self.parse_record(record))`, without building the
+        intermediate dictionary.
+
+        Args:
+            record (logging.LogRecord): The log record to format.
+        Returns:
+            str: The JSON encoded log entry.
+        """
+        # NOTE: Only the message is part of the output, so the time and
+        # exception text set by logging.Formatter.format are not computed.
+        record.message = record.getMessage()
+        parts = [
+            self.record_prefixes[record.levelno],
+            encode_basestring_ascii(record.message),
+        ]
+
+        trace_ctx = record.__dict__.get("trace_context", trace_context.get())
+        if trace_ctx:
+            inferred_trace = trace_ctx.get("trace_id", None)
+            if inferred_trace is not None and self.trace_prefix is not None:
+                parts.append(', "logging.googleapis.com/trace": ')
+                parts.append(
+                    encode_basestring_ascii(f"{self.trace_prefix}{inferred_trace}")
+                )
+
+            inferred_span = trace_ctx.get("span_id", None)
+            if inferred_span is not None:
+                parts.append(', "logging.googleapis.com/spanId": ')
+                parts.append(encode_value(inferred_span))
+
+            inferred_sampled = trace_ctx.get("trace_sampled", None)
+            if inferred_sampled is not None:
+                parts.append(', "logging.googleapis.com/trace_sampled": ')
+                parts.append(encode_value(inferred_sampled))
+
+        labels = getattr(record, "labels", None)
+        if labels is not None:
+            parts.append(', "logging.googleapis.com/labels": ')
+            parts.append(encode_basestring_ascii(labels_encoder.encode(labels)))
+
+        parts.append("}")
+        return "".join(parts)
 
     def parse_record(self, record: logging.LogRecord) -> dict[str, Any]:
         """
@@ -43,13 +102,15 @@ class CloudLoggingFormatter(logging.Formatter):
             "message": record.message,
         }
 
-        trace_ctx = trace_context.get()
+        # NOTE: Records passed through a CloudLoggingQueueHandler carry the trace
+        # context of the request that emitted them.
+        trace_ctx = record.__dict__.get("trace_context", trace_context.get())
         if trace_ctx:
             inferred_trace = trace_ctx.get("trace_id", None)
-            if inferred_trace is not None and self.project is not None:
+            if inferred_trace is not None and self.trace_prefix is not None:
                 # NOTE: Add full path for detected trace
                 log["logging.googleapis.com/trace"] = (
-                    f"projects/{self.project}/traces/{inferred_trace}"
+                    f"{self.trace_prefix}{inferred_trace}"
                 )
 
             inferred_span = trace_ctx.get("span_id", None)
@@ -69,34 +130,197 @@ class CloudLoggingFormatter(logging.Formatter):
         return log
 
 
+def encode_value(value: Any) -> str:
+    """
+    Encode a single value exactly like `json.dumps` does.
+
+    Args:
+        value (Any): The value to encode.
+    Returns:
+        str: The JSON encoded value.
+    """
+    # NOTE: This is the string encoder json.dumps uses with `ensure_ascii=True`.
+    if type(value) is str:
+        return encode_basestring_ascii(value)
+    if type(value) is bool:
+        return "true" if value else "false"
+    return json.dumps(value)
+
+
+class CloudLoggingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler that hands records to a background listener thread, so
+    formatting and writing logs does not block the event loop. The trace
+    context of the current request is captured when a record is emitted. If
+    the queue is full, records are dropped and counted instead of blocking.
+    Until the listener is started with `start_log_queues`, records are handled
+    synchronously, e.g. during server startup and shutdown.
+
+    Attributes:
+        dropped (int): Number of records dropped because the queue was full.
+        running (bool): Whether the listener thread is running.
+    """
+
+    listener: logging.handlers.QueueListener | None
+
+    def __init__(self, queue: Queue[Any]) -> None:
+        super().__init__(queue)
+        # NOTE: Typed reference, as QueueHandler only types `queue` as put-able.
+        self._queue = queue
+        self.listener = None
+        self.dropped = 0
+        self.running = False
+
+    def start(self) -> None:
+        """
+        Start the listener thread.
+        """
+        if self.listener is not None and not self.running:
+            self.listener.start()
+            self.running = True
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        Stop the listener thread after it handled every queued record. If the
+        queue is still full after `timeout` seconds, the oldest records are
+        dropped to make room for the stop signal, so shutdown always finishes.
+
+        Args:
+            timeout (float): Seconds to wait for the listener to make room.
+        """
+        if self.listener is not None and self.running:
+            # NOTE: Records emitted from here on are handled synchronously, so
+            # nothing competes with the stop signal for room in the queue.
+            self.running = False
+            deadline = time.monotonic() + timeout
+            while self._queue.full() and time.monotonic() < deadline:
+                time.sleep(0.01)
+            while self._queue.full():
+                try:
+                    self._queue.get_nowait()
+                except Empty:
+                    break
+                self._queue.task_done()
+                self.dropped += 1
+            try:
+                self.listener.stop()
+            except Full:
+                logging.getLogger("app").warning(
+                    "Failed to stop the log queue listener, the queue is full"
+                )
+            if self.dropped:
+                logging.getLogger("app").warning(
+                    "Dropped %d log records because the log queue was full",
+                    self.dropped,
+                )
+                self.dropped = 0
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if not self.running and self.listener is not None:
+            self.listener.handle(record)
+            return
+        super().emit(record)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # NOTE: Unlike the default implementation, the message is not formatted
+        # here, so the listener's formatter sees the same record as a
+        # synchronous handler would. Arguments and exception info are dropped
+        # to not keep request objects and stack frames alive in the queue.
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        record.exc_text = None
+        record.trace_context = trace_context.get()
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except Full:
+            self.dropped += 1
+
+
+def log_queues() -> list[CloudLoggingQueueHandler]:
+    """
+    Return every configured CloudLoggingQueueHandler.
+
+    Returns:
+        list[CloudLoggingQueueHandler]: The configured queue handlers.
+    """
+    handlers = (logging.getHandlerByName(name) for name in logging.getHandlerNames())
+    return [h for h in handlers if isinstance(h, CloudLoggingQueueHandler)]
+
+
+def start_log_queues() -> None:
+    """
+    Start the listener threads of every configured CloudLoggingQueueHandler.
+    """
+    for handler in log_queues():
+        handler.start()
+
+
+def stop_log_queues() -> None:
+    """
+    Flush and stop the listener threads of every configured
+    CloudLoggingQueueHandler.
+    """
+    for handler in log_queues():
+        handler.stop()
+
+
 # //////////////////////////////////////////////////////////////////////////////
 
 trace_context: ContextVar[dict[str, Any] | None] = ContextVar(
     "trace_context", default=None
 )
 
+# NOTE: The trace header patterns are compiled once instead of on every request.
+# See https://www.w3.org/TR/trace-context/#traceparent-header-field-values
+TRACE_PARENT_PATTERN = re.compile(
+    r"^\s?((?!ff)[a-f\d]{2})-((?![0]{32})[a-f\d]{32})-((?![0]{16})[a-f\d]{16})"
+    r"-([a-f\d]{2})(-.*)?\s?$"
+)
+XCLOUD_TRACE_PATTERN = re.compile(r"([\w-]+)?(\/?([\w-]+))?(;?o=(\d))?")
+
 
-class CloudLoggingMiddleware(BaseHTTPMiddleware):
+class CloudLoggingMiddleware:
     """
     Middleware to load Cloud Logging trace context from headers.
     """
 
-    async def dispatch(self, request: Request, call_next: Any) -> Any:
-        header = request.headers.get("Traceparent")
-        trace_id, span_id, trace_sampled = self.parse_trace_parent(header)
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        traceparent = xcloud_trace = None
+        for key, value in scope["headers"]:
+            if key == b"traceparent":
+                traceparent = value.decode("latin-1")
+            elif key == b"x-cloud-trace-context":
+                xcloud_trace = value.decode("latin-1")
+
+        trace_id, span_id, trace_sampled = self.parse_trace_parent(traceparent)
         if trace_id is None:
             # NOTE: traceparent not found. look for xcloud_trace_context header
-            header = request.headers.get("X-Cloud-Trace-Context")
-            trace_id, span_id, trace_sampled = self.parse_xcloud_trace(header)
+            trace_id, span_id, trace_sampled = self.parse_xcloud_trace(xcloud_trace)
 
-        trace_context.set(
+        token = trace_context.set(
             {
                 "trace_id": trace_id,
                 "span_id": span_id,
                 "trace_sampled": trace_sampled,
             }
         )
-        return await call_next(request)
+        await self.app(scope, receive, send)
+        # NOTE: The context is only reset after a successful request. Unhandled
+        # exceptions are logged by Starlette's ServerErrorMiddleware, which runs
+        # outside of this middleware and should still see the trace context.
+        trace_context.reset(token)
 
     def parse_trace_parent(
         self, header: str | None
@@ -116,23 +340,15 @@ class CloudLoggingMiddleware(BaseHTTPMiddleware):
         trace_id = span_id = None
         trace_sampled = False
         if header:
-            try:
-                VERSION_PART = r"(?!ff)[a-f\d]{2}"
-                TRACE_ID_PART = r"(?![0]{32})[a-f\d]{32}"
-                PARENT_ID_PART = r"(?![0]{16})[a-f\d]{16}"
-                FLAGS_PART = r"[a-f\d]{2}"
-                regex = f"^\\s?({VERSION_PART})-({TRACE_ID_PART})-({PARENT_ID_PART})-({FLAGS_PART})(-.*)?\\s?$"
-                match = re.match(regex, header)
-                trace_id = match.group(2)  # type: ignore[union-attr]
-                span_id = match.group(3)  # type: ignore[union-attr]
+            match = TRACE_PARENT_PATTERN.match(header)
+            if match is not None:
+                trace_id = match.group(2)
+                span_id = match.group(3)
                 # NOTE: trace-flag component is an 8-bit bit field. Read as an int.
-                int_flag = int(match.group(4), 16)  # type: ignore[union-attr]
+                int_flag = int(match.group(4), 16)
                 # NOTE: trace_sampled is set if the right-most bit in flag
                 # component is set.
                 trace_sampled = bool(int_flag & 1)
-            except (IndexError, AttributeError):
-                # Could not parse header as expected. Return None.
-                pass
         return trace_id, span_id, trace_sampled
 
     def parse_xcloud_trace(
@@ -162,23 +378,22 @@ class CloudLoggingMiddleware(BaseHTTPMiddleware):
         #   * span_id (optional, 16-bit hex string): "0000000000000001"
         #   * trace_sampled (optional, bool): true
         if header:
-            try:
-                regexp = r"([\w-]+)?(\/?([\w-]+))?(;?o=(\d))?"
-                match = re.match(regexp, header)
-                trace_id = match.group(1)  # type: ignore[union-attr]
-                span_id = match.group(3)  # type: ignore[union-attr]
-                trace_sampled = match.group(5) == "1"  # type: ignore[union-attr]
+            # NOTE: Every group of the pattern is optional, so it always matches.
+            match = XCLOUD_TRACE_PATTERN.match(header)
+            trace_id = match.group(1)  # type: ignore[union-attr]
+            span_id = match.group(3)  # type: ignore[union-attr]
+            trace_sampled = match.group(5) == "1"  # type: ignore[union-attr]
 
-                # NOTE: Convert the span ID to 16-bit hexadecimal instead of decimal
+            # NOTE: Convert the span ID to 16-bit hexadecimal instead of decimal.
+            # A missing span ID is skipped up front, as raising and catching the
+            # TypeError costs more than parsing the whole header.
+            if span_id is not None:
                 try:
                     span_id_int = int(span_id)
                     if span_id_int > 0 and span_id_int < 2**64:
                         span_id = f"{span_id_int:016x}"
                     else:
                         span_id = None
-                except (ValueError, TypeError):
+                except ValueError:
                     span_id = None
-
-            except IndexError:
-                pass
         return trace_id, span_id, trace_sampled
@@ -0,0 +1,277 @@
+import importlib
+import zlib
+from collections.abc import Callable
+from typing import Any, Protocol
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.utils.http_status import body_allowed
+
+# //////////////////////////////////////////////////////////////////////////////
+
+
+class Compressor(Protocol):
+    """
+    Incremental compressor for a single response body.
+    """
+
+    def compress(self, data: bytes) -> bytes:
+        """
+        Compress a chunk and flush it, so the client can decode everything
+        sent so far.
+        """
+        ...
+
+    def finish(self) -> bytes:
+        """
+        Return the remaining compressed data and end the stream.
+        """
+        ...
+
+
+class GzipCompressor:
+    def __init__(self, level: int) -> None:
+        # NOTE: wbits=31 selects the gzip container instead of raw deflate.
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(
+            zlib.Z_SYNC_FLUSH
+        )
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class BrotliCompressor:
+    def __init__(self, level: int) -> None:
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return bytes(self._compressor.process(data) + self._compressor.flush())
+
+    def finish(self) -> bytes:
+        return bytes(self._compressor.finish())
+
+
+class ZstdCompressor:
+    def __init__(self, level: int) -> None:
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return bytes(
+            self._compressor.compress(data)
+            + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        )
+
+    def finish(self) -> bytes:
+        return bytes(self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH))
+
+
+def import_optional(name: str) -> Any:
+    """
+    Import an optional dependency.
+
+    Args:
+        name (str): The module name.
+    Returns:
+        Any: The module, or None if it is not installed.
+    """
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
+
+
+# NOTE: Brotli and Zstandard are optional. Install `brotli` or `zstandard` to
+# enable the `br` and `zstd` content codings.
+brotli = import_optional("brotli")
+zstandard = import_optional("zstandard")
+
+CODECS: dict[str, Callable[[int], Compressor]] = {"gzip": GzipCompressor}
+if brotli is not None:
+    CODECS["br"] = BrotliCompressor
+if zstandard is not None:
+    CODECS["zstd"] = ZstdCompressor
+
+
+def select_encoding(accept_encoding: str, encodings: list[str]) -> str | None:
+    """
+    Pick the content coding to use for a response from the Accept-Encoding
+    request header. The client's quality values win; ties are broken by the
+    order of `encodings`.
+    See https://www.rfc-editor.org/rfc/rfc9110#name-accept-encoding
+
+    Args:
+        accept_encoding (str): The Accept-Encoding request header.
+        encodings (list[str]): The supported encodings, most preferred first.
+    Returns:
+        str | None: The selected encoding, or None to send the body as is.
+    """
+    qualities: dict[str, float] = {}
+    for item in accept_encoding.lower().split(","):
+        coding, _, params = item.partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[coding.strip()] = quality
+
+    wildcard = qualities.get("*", 0.0)
+    selected: str | None = None
+    best = 0.0
+    for encoding in encodings:
+        quality = qualities.get(encoding, wildcard)
+        if quality > best:
+            selected, best = encoding, quality
+    return selected
+
+
+def mark_negotiated(headers: MutableHeaders) -> None:
+    """
+    Mark a response to a request that negotiated a content coding. Its body may
+    be compressed, so caches must vary on Accept-Encoding, and strong ETags are
+    weakened as required by RFC 9110 for a different representation.
+    See https://www.rfc-editor.org/rfc/rfc9110#name-weak-versus-strong
+
+    Args:
+        headers (MutableHeaders): The response headers to update.
+    """
+    headers.add_vary_header("Accept-Encoding")
+    etag = headers.get("ETag")
+    if etag is not None and not etag.startswith("W/"):
+        headers["ETag"] = f"W/{etag}"
+
+
+# //////////////////////////////////////////////////////////////////////////////
+
+
+class CompressionMiddleware:
+    """
+    Middleware that compresses response bodies with the best content coding
+    the client accepts. Bodies smaller than `minimum_size` are sent as is.
+    Streaming bodies are compressed chunk by chunk and flushed after each
+    chunk, so streaming clients keep receiving data as it is produced.
+
+    NOTE: Every response to a request that negotiated a coding gets the same
+    Vary header and weakened ETag, whether or not its body was compressed. A
+    304 Not Modified thus carries the validator of the 200 it revalidates.
+
+    Attributes:
+        levels (dict[str, int]): Compression level per content coding, most
+            preferred first. Codings whose library is missing are skipped.
+        minimum_size (int): The minimum body size in bytes to compress.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        levels: dict[str, int],
+        minimum_size: int = 500,
+    ) -> None:
+        self.app = app
+        self.levels = {name: level for name, level in levels.items() if name in CODECS}
+        self.encodings = list(self.levels)
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            return await self.app(scope, receive, send)
+
+        accept_encoding = Headers(scope=scope).get("Accept-Encoding")
+        encoding = (
+            select_encoding(accept_encoding, self.encodings)
+            if accept_encoding
+            else None
+        )
+        if encoding is None:
+            return await self.app(scope, receive, send)
+
+        start: Message | None = None
+        compressor: Compressor | None = None
+        passthrough = False
+        pending = b""
+
+        async def custom_send(message: Message) -> None:
+            """
+            Custom send function that holds back the response start until
+            enough of the body arrived to know whether it is worth compressing.
+
+            Args:
+                message (Message): The message to send.
+            """
+            nonlocal start, compressor, passthrough, pending
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                status_code = message["status"]
+                content_length = headers.get("content-length")
+                if (
+                    "content-encoding" in headers
+                    or headers.get("content-type", "").startswith("text/event-stream")
+                    or (not body_allowed(status_code) and status_code != 304)
+                ):
+                    passthrough = True
+                    await send(message)
+                    return
+                if status_code == 304 or (
+                    content_length is not None
+                    and content_length.isdigit()
+                    and int(content_length) < self.minimum_size
+                ):
+                    passthrough = True
+                    mark_negotiated(MutableHeaders(scope=message))
+                    await send(message)
+                    return
+                start = message
+                return
+
+            if message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+
+            body: bytes = message.get("body", b"")
+            more_body: bool = message.get("more_body", False)
+
+            if compressor is None:
+                # NOTE: Small chunks are buffered until the minimum size is
+                # reached, since a body may arrive in several messages.
+                pending += body
+                if len(pending) < self.minimum_size:
+                    if more_body:
+                        return
+                    passthrough = True
+                    mark_negotiated(MutableHeaders(scope=start))
+                    await send(start)
+                    await send({"type": "http.response.body", "body": pending})
+                    return
+
+                body, pending = pending, b""
+                compressor = CODECS[encoding](self.levels[encoding])
+                headers = MutableHeaders(scope=start)
+                headers["Content-Encoding"] = encoding
+                mark_negotiated(headers)
+                if not more_body:
+                    body = compressor.compress(body) + compressor.finish()
+                    headers["Content-Length"] = str(len(body))
+                    await send(start)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                del headers["Content-Length"]
+                await send(start)
+
+            data = compressor.compress(body) if body else b""
+            if not more_body:
+                data += compressor.finish()
+            await send(
+                {"type": "http.response.body", "body": data, "more_body": more_body}
+            )
+
+        await self.app(scope, receive, custom_send)
@@ -0,0 +1,42 @@
+import hashlib
+
+
+def make_etag(*parts: object) -> str:
+    """
+    Build a strong entity tag from the given parts. Equal parts always produce
+    the same tag, so it can be recomputed without rendering the response body.
+
+    Args:
+        *parts (object): Values identifying the version of a representation.
+    Returns:
+        str: The quoted entity tag.
+    """
+    value = "\x1f".join(str(part) for part in parts)
+    digest = hashlib.blake2b(value.encode(), digest_size=16).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    Check whether an If-None-Match header matches an entity tag. As required
+    for If-None-Match, the weak comparison is used, so a `W/` prefix on a
+    client tag is ignored.
+    See https://www.rfc-editor.org/rfc/rfc9110#name-if-none-match
+
+    Args:
+        if_none_match (str | None): The If-None-Match request header.
+        etag (str): The quoted entity tag of the current representation.
+    Returns:
+        bool: True if the client already holds the current representation.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
@@ -4,10 +4,64 @@ from fastapi import HTTPException, Request, Response, status
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
 
+from src.utils.http_status import body_allowed
+from src.utils.log_sampler import LogSampler
+from src.utils.routing import route_template
+
 # //////////////////////////////////////////////////////////////////////////////
 
 logger = logging.getLogger("app")
 
+log_sampler: LogSampler | None = None
+
+
+def init_log_sampler(limit: int, window: float) -> LogSampler | None:
+    """
+    Initialize the sampler that rate limits the error logs of the exception
+    handlers.
+
+    Args:
+        limit (int): Number of records logged per handler, route and error type
+            within a window. Set to 0 to log every record.
+        window (float): Length of a window in seconds.
+    Returns:
+        LogSampler | None: The sampler, or None if sampling is disabled.
+    """
+    global log_sampler
+    log_sampler = (
+        LogSampler(logger, limit, window) if limit > 0 and window > 0 else None
+    )
+    return log_sampler
+
+
+def close_log_sampler() -> None:
+    """
+    Report the records suppressed so far and disable sampling.
+    """
+    global log_sampler
+    if log_sampler is not None:
+        log_sampler.flush()
+    log_sampler = None
+
+
+def log_error(request: Request, key: tuple[str, str], msg: str, *args: object) -> None:
+    """
+    Log an error through the log sampler, if enabled.
+
+    Args:
+        request (Request): The request that failed.
+        key (tuple[str, str]): The handler and error type.
+        msg (str): The log message, formatted with `args`.
+        *args (object): The arguments of the log message.
+    """
+    if log_sampler is None:
+        logger.error(msg, *args)
+        return
+    # NOTE: Key by route template, so requests for different IDs share a key.
+    route = route_template(request.scope) or request.url.path
+    log_sampler.log((key[0], route, key[1]), logging.ERROR, msg, *args)
+
+
 # //////////////////////////////////////////////////////////////////////////////
 
 
@@ -24,6 +78,7 @@ async def handle_validation_exception(
         JSONResponse: Response with code and message.
     """
     summarized_errors = []
+    error_types = set()
     for error in exc.errors():
         if not isinstance(error, dict):
             summarized_errors.append(error)
@@ -34,10 +89,13 @@ async def handle_validation_exception(
             summarized_error["loc"] = error["loc"]
         if "type" in error:
             summarized_error["type"] = error["type"]
+            error_types.add(str(error["type"]))
 
         summarized_errors.append(summarized_error)
 
-    logger.error(
+    log_error(
+        request,
+        ("validation", ",".join(sorted(error_types))),
         "Handled validation error on %s: %s",
         request.url.path,
         summarized_errors,
@@ -49,25 +107,24 @@ async def handle_validation_exception(
 
 
 async def handle_http_exception(
-    _: Request, exc: HTTPException
+    request: Request, exc: HTTPException
 ) -> Response | JSONResponse:
     """
     Handle HTTPExceptions raised in our API. This includes 404, 500, and any
     other non-validation exceptions.
 
     Args:
-        _ (Request): The request object.
+        request (Request): The request object.
         exc (HTTPException): The exception object.
     Returns:
         Response: Response with code and message.
     """
     headers = getattr(exc, "headers", None)
     status_code = getattr(exc, "status_code", status.HTTP_500_INTERNAL_SERVER_ERROR)
-    body_allowed = not (status_code < 200 or status_code in {204, 205, 304})
     # NOTE: Don't log 404 errors, as they might spam Cloud Logging.
     if status_code != 404:
-        logger.error("Handled HTTP error: %s", exc)
-    if not body_allowed:
+        log_error(request, ("http", str(status_code)), "Handled HTTP error: %s", exc)
+    if not body_allowed(status_code):
         return Response(status_code=status_code, headers=headers)
     return JSONResponse(
         content={"code": status_code, "message": exc.detail},
@@ -76,18 +133,18 @@ async def handle_http_exception(
     )
 
 
-async def handle_general_exception(_: Request, exc: Exception) -> JSONResponse:
+async def handle_general_exception(request: Request, exc: Exception) -> JSONResponse:
     """
     Catch-all handler for unhandled exceptions. Returns a generic 500 response
     without leaking internal error details to callers.
 
     Args:
-        _ (Request): The request object.
+        request (Request): The request object.
         exc (Exception): The exception object.
     Returns:
         Response: Response with code and message.
     """
-    logger.error("Handled server error: %s", exc)
+    log_error(request, ("general", type(exc).__name__), "Handled server error: %s", exc)
     return JSONResponse(
         content={"code": 500, "message": "Internal Server Error"},
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -0,0 +1,13 @@
+def body_allowed(status_code: int) -> bool:
+    """
+    Check whether a response with the given status code may have a body.
+    Informational, 204 No Content, 205 Reset Content and 304 Not Modified
+    responses never do.
+    See https://www.rfc-editor.org/rfc/rfc9110#name-content-length
+
+    Args:
+        status_code (int): The HTTP status code of the response.
+    Returns:
+        bool: True if the response may have a body.
+    """
+    return not (status_code < 200 or status_code in {204, 205, 304})
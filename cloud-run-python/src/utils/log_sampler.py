@@ -0,0 +1,172 @@
+import asyncio
+import contextvars
+import logging
+import time
+from collections.abc import Callable
+
+
+class SampleWindow:
+    """
+    Number of records seen for a single key since `start`.
+    """
+
+    __slots__ = ("start", "count", "level", "timer")
+
+    def __init__(self, start: float) -> None:
+        self.start = start
+        self.count = 0
+        self.level = logging.NOTSET
+        # NOTE: Scheduled to report the window once it ends, as soon as the
+        # first record was suppressed.
+        self.timer: asyncio.TimerHandle | None = None
+
+
+class LogSampler:
+    """
+    Rate limiter for log records. For every key (e.g. handler, route and error
+    type), the first `limit` records within `window` seconds are logged. Later
+    records are only counted and reported in a single summary when the window
+    ends. Used from a running event loop, the summary is scheduled on the loop;
+    otherwise it is logged by the next call after the window ended. The sampler
+    is not thread-safe; it is meant to be used from a single event loop.
+
+    Attributes:
+        logger (logging.Logger): The logger records are written to.
+        limit (int): Number of records logged per key and window.
+        window (float): Length of a window in seconds.
+        max_keys (int): Maximum number of keys tracked at the same time.
+        suppressed (int): Total number of records that were not logged.
+    """
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        limit: int,
+        window: float,
+        max_keys: int = 1024,
+        timer: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.logger = logger
+        self.limit = limit
+        self.window = window
+        self.max_keys = max_keys
+        self.suppressed = 0
+        self._timer = timer
+        self._windows: dict[tuple[str, ...], SampleWindow] = {}
+        self._next_sweep = timer() + window
+
+    def log(self, key: tuple[str, ...], level: int, msg: str, *args: object) -> None:
+        """
+        Log a record, unless `limit` records were already logged for the key in
+        the current window.
+
+        Args:
+            key (tuple[str, ...]): Identifies records that are alike.
+            level (int): The log level.
+            msg (str): The log message, formatted with `args`.
+            *args (object): The arguments of the log message.
+        """
+        now = self._timer()
+        if now >= self._next_sweep:
+            self._sweep(now)
+
+        window = self._windows.get(key)
+        if window is None or now - window.start >= self.window:
+            if window is not None:
+                self._summarize(key, window)
+            elif len(self._windows) >= self.max_keys:
+                # NOTE: Dicts keep insertion order, so this is the oldest key.
+                oldest = next(iter(self._windows))
+                self._summarize(oldest, self._windows.pop(oldest))
+            window = self._windows[key] = SampleWindow(now)
+
+        window.count += 1
+        if window.count <= self.limit:
+            self.logger.log(level, msg, *args)
+            return
+        window.level = max(window.level, level)
+        self.suppressed += 1
+        if window.timer is None:
+            window.timer = self._schedule(key, window, now)
+
+    def flush(self) -> None:
+        """
+        Report the records suppressed in every open window and reset them.
+        """
+        for key, window in self._windows.items():
+            self._summarize(key, window)
+        self._windows.clear()
+
+    def _schedule(
+        self, key: tuple[str, ...], window: SampleWindow, now: float
+    ) -> asyncio.TimerHandle | None:
+        """
+        Schedule the summary of a window at its end on the running event loop.
+
+        Args:
+            key (tuple[str, ...]): The key of the window.
+            window (SampleWindow): The window to report.
+            now (float): The current time.
+        Returns:
+            asyncio.TimerHandle | None: The scheduled call, or None if no event
+                loop is running.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return None
+        delay = max(window.start + self.window - now, 0.0)
+        # NOTE: Run in a fresh context, so the summary is not logged with the
+        # trace context of the request that happened to start the timer.
+        return loop.call_later(
+            delay, self._expire, key, window, context=contextvars.Context()
+        )
+
+    def _expire(self, key: tuple[str, ...], window: SampleWindow) -> None:
+        """
+        Report a window that ended, unless it was already reported.
+
+        Args:
+            key (tuple[str, ...]): The key of the window.
+            window (SampleWindow): The window to report.
+        """
+        if self._windows.get(key) is window:
+            self._summarize(key, self._windows.pop(key))
+
+    def _sweep(self, now: float) -> None:
+        """
+        Report and remove every window that ended, so summaries are written even
+        if no further record arrives for their key.
+
+        Args:
+            now (float): The current time.
+        """
+        expired = [
+            key
+            for key, window in self._windows.items()
+            if now - window.start >= self.window
+        ]
+        for key in expired:
+            self._summarize(key, self._windows.pop(key))
+        self._next_sweep = now + self.window
+
+    def _summarize(self, key: tuple[str, ...], window: SampleWindow) -> None:
+        """
+        Log how many records of a window were suppressed, if any.
+
+        Args:
+            key (tuple[str, ...]): The key of the window.
+            window (SampleWindow): The window to report.
+        """
+        if window.timer is not None:
+            window.timer.cancel()
+            window.timer = None
+        suppressed = window.count - self.limit
+        if suppressed > 0:
+            self.logger.log(
+                window.level,
+                "Suppressed %d similar log records for %s within %g seconds",
+                suppressed,
+                " ".join(key),
+                self.window,
+            )
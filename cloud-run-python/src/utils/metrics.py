@@ -0,0 +1,201 @@
+import time
+from bisect import bisect_left
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.utils.routing import route_template
+
+# //////////////////////////////////////////////////////////////////////////////
+
+# NOTE: Upper bounds in seconds, from fast cache hits to slow Firestore scans.
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+# NOTE: Requests that matched no route or use an unknown method share one label
+# value, so scans for random paths can't create an unbounded number of series.
+UNMATCHED_ROUTE = "unmatched"
+METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"})
+OTHER_METHOD = "other"
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LABEL_ESCAPES = str.maketrans({"\\": "\\\\", '"': '\\"', "\n": "\\n"})
+
+
+class Histogram:
+    """
+    Histogram with fixed bucket bounds. The bucket counts are allocated once,
+    so observing a value only increments two integers and a float.
+
+    Attributes:
+        bounds (tuple[float, ...]): The sorted upper bounds of the buckets.
+        counts (list[int]): Observations per bucket, not cumulative. The last
+            entry counts observations above the largest bound.
+        sum (float): The sum of all observed values.
+        count (int): The number of observed values.
+    """
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: tuple[float, ...]) -> None:
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """
+        Record a single value.
+
+        Args:
+            value (float): The value to record.
+        """
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def format_labels(labels: dict[str, str]) -> str:
+    """
+    Render labels in the Prometheus text format, e.g. `{method="GET"}`.
+
+    Args:
+        labels (dict[str, str]): The label names and values.
+    Returns:
+        str: The rendered labels.
+    """
+    values = ",".join(
+        f'{name}="{value.translate(LABEL_ESCAPES)}"' for name, value in labels.items()
+    )
+    return f"{{{values}}}"
+
+
+class HttpMetrics:
+    """
+    Request metrics of the HTTP server. All updates happen on the event loop,
+    so plain integers are used instead of locks or atomics.
+
+    Attributes:
+        buckets (tuple[float, ...]): The bucket bounds of the duration
+            histograms, in seconds.
+        durations (dict[tuple[str, str, str], Histogram]): Request durations by
+            route template, method and status code.
+        in_flight (dict[str, int]): Requests currently being handled by method.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self.durations: dict[tuple[str, str, str], Histogram] = {}
+        self.in_flight: dict[str, int] = {}
+
+    def observe(self, route: str, method: str, status: str, duration: float) -> None:
+        """
+        Record the duration of a finished request.
+
+        Args:
+            route (str): The route template.
+            method (str): The request method.
+            status (str): The response status code.
+            duration (float): The request duration in seconds.
+        """
+        key = (route, method, status)
+        histogram = self.durations.get(key)
+        if histogram is None:
+            histogram = self.durations[key] = Histogram(self.buckets)
+        histogram.observe(duration)
+
+    def render(self) -> str:
+        """
+        Render all metrics in the Prometheus text exposition format.
+        See https://prometheus.io/docs/instrumenting/exposition_formats/
+
+        Returns:
+            str: The rendered metrics.
+        """
+        lines = [
+            "# HELP http_requests_in_flight Requests currently being handled.",
+            "# TYPE http_requests_in_flight gauge",
+        ]
+        for method, value in sorted(self.in_flight.items()):
+            lines.append(
+                f"http_requests_in_flight{format_labels({'method': method})} {value}"
+            )
+
+        lines.append("# HELP http_request_duration_seconds Duration of HTTP requests.")
+        lines.append("# TYPE http_request_duration_seconds histogram")
+        bounds = [*(repr(bound) for bound in self.buckets), "+Inf"]
+        for (route, method, status), histogram in sorted(self.durations.items()):
+            labels = {"route": route, "method": method, "status": status}
+            cumulative = 0
+            for bound, count in zip(bounds, histogram.counts, strict=True):
+                cumulative += count
+                bucket_labels = format_labels({**labels, "le": bound})
+                lines.append(
+                    f"http_request_duration_seconds_bucket{bucket_labels} {cumulative}"
+                )
+            rendered = format_labels(labels)
+            lines.append(f"http_request_duration_seconds_sum{rendered} {histogram.sum}")
+            lines.append(
+                f"http_request_duration_seconds_count{rendered} {histogram.count}"
+            )
+        return "\n".join(lines) + "\n"
+
+
+# //////////////////////////////////////////////////////////////////////////////
+
+
+class MetricsMiddleware:
+    """
+    Middleware that records the duration of every HTTP request by route
+    template, method and status code, and the number of requests in flight.
+    The duration includes sending the response body.
+    """
+
+    def __init__(self, app: ASGIApp, metrics: HttpMetrics) -> None:
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        metrics = self.metrics
+        method: str = scope["method"] if scope["method"] in METHODS else OTHER_METHOD
+        status = "500"
+
+        async def custom_send(message: Message) -> None:
+            """
+            Custom send function that captures the response status code.
+
+            Args:
+                message (Message): The message to send.
+            """
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        metrics.in_flight[method] = metrics.in_flight.get(method, 0) + 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, custom_send)
+        finally:
+            duration = time.perf_counter() - start
+            metrics.in_flight[method] -= 1
+            # NOTE: The router stores the matched route in the scope, so the
+            # template is known once the request was handled.
+            route = route_template(scope) or UNMATCHED_ROUTE
+            metrics.observe(route, method, status, duration)
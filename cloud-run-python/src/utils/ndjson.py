@@ -0,0 +1,86 @@
+from collections.abc import AsyncIterable, AsyncIterator
+
+import pydantic_core
+from pydantic import BaseModel
+
+# NOTE: Firestore documents are at most 1 MiB, so no valid row is longer.
+MAX_LINE_LENGTH = 1024 * 1024
+
+
+class LineTooLong(Exception):
+    """
+    Exception raised when a line exceeds the maximum line length.
+
+    Attributes:
+        max_line_length (int): The maximum line length in bytes.
+    """
+
+    def __init__(self, max_line_length: int):
+        self.max_line_length = max_line_length
+        super().__init__(f"Line exceeds the maximum of {max_line_length} bytes")
+
+
+async def iter_lines(
+    chunks: AsyncIterable[bytes], max_line_length: int = MAX_LINE_LENGTH
+) -> AsyncIterator[bytes]:
+    """
+    Split a stream of byte chunks into newline-delimited lines without reading
+    the whole stream into memory. Empty lines are skipped and a trailing line
+    without a newline is still yielded. At most one line is buffered, so a
+    line longer than `max_line_length` ends the stream with an error.
+
+    Args:
+        chunks (AsyncIterable[bytes]): The byte chunks, e.g. a request body
+            stream.
+        max_line_length (int): The maximum length of a line in bytes, without
+            its line terminator.
+    Yields:
+        bytes: The next non-empty line, without its line terminator.
+    Raises:
+        LineTooLong: If a line is longer than `max_line_length`.
+    """
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line = line.rstrip(b"\r")
+            if len(line) > max_line_length:
+                raise LineTooLong(max_line_length)
+            if line.strip():
+                yield line
+        # NOTE: The terminator of the buffered line may still arrive.
+        if len(buffer) > max_line_length + 1:
+            raise LineTooLong(max_line_length)
+    buffer = buffer.rstrip(b"\r")
+    if len(buffer) > max_line_length:
+        raise LineTooLong(max_line_length)
+    if buffer.strip():
+        yield buffer
+
+
+async def encode_lines(
+    items: AsyncIterable[BaseModel], batch_size: int = 100
+) -> AsyncIterator[bytes]:
+    """
+    Encode models as newline-delimited JSON. Models are serialized straight to
+    bytes by pydantic-core, and up to `batch_size` lines are sent per chunk, so
+    downstream middleware handles one message per batch instead of one per
+    model.
+
+    Args:
+        items (AsyncIterable[BaseModel]): The models to encode.
+        batch_size (int): The maximum number of lines per chunk.
+    Yields:
+        bytes: One or more JSON encoded models, each followed by a newline.
+    """
+    lines: list[bytes] = []
+    async for item in items:
+        lines.append(pydantic_core.to_json(item))
+        if len(lines) >= batch_size:
+            lines.append(b"")
+            yield b"\n".join(lines)
+            lines = []
+    if lines:
+        lines.append(b"")
+        yield b"\n".join(lines)
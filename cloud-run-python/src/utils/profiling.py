@@ -0,0 +1,111 @@
+import cProfile
+import hmac
+import io
+import logging
+import pstats
+import time
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from src.utils.routing import route_template
+
+# //////////////////////////////////////////////////////////////////////////////
+
+logger = logging.getLogger("app")
+
+PROFILE_HEADER = "X-Profile-Token"
+
+
+def format_profile(profile: cProfile.Profile, limit: int) -> str:
+    """
+    Render the functions of a profile that took the most time, including the
+    time of the functions they called.
+
+    Args:
+        profile (cProfile.Profile): The finished profile.
+        limit (int): The number of functions to include.
+    Returns:
+        str: The rendered functions, one per line.
+    """
+    output = io.StringIO()
+    stats = pstats.Stats(profile, stream=output)
+    stats.strip_dirs().sort_stats(pstats.SortKey.CUMULATIVE).print_stats(limit)
+    return output.getvalue().strip()
+
+
+class ProfilingMiddleware:
+    """
+    Middleware that profiles a single request with cProfile, if it sends the
+    secret token in the X-Profile-Token header, and logs the hottest functions.
+    Only one request is profiled at a time; other requests with the header are
+    handled as usual. Requests without the header only pay for a header lookup.
+
+    The middleware has to run inside CloudLoggingMiddleware, so the log entry
+    carries the trace context of the profiled request.
+
+    NOTE: cProfile profiles the whole thread. Requests that run concurrently on
+    the same event loop show up in the profile too, so profile in a quiet
+    moment or on an instance with `--concurrency 1`.
+
+    Attributes:
+        token (bytes): The secret that triggers profiling.
+        limit (int): The number of functions to log.
+        active (bool): Whether a request is being profiled.
+    """
+
+    def __init__(self, app: ASGIApp, token: str, limit: int = 30) -> None:
+        self.app = app
+        self.token = token.encode("latin-1")
+        self.limit = limit
+        self.active = False
+        self._header = PROFILE_HEADER.lower().encode("latin-1")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self.active:
+            return await self.app(scope, receive, send)
+
+        for key, value in scope["headers"]:
+            if key == self._header:
+                if hmac.compare_digest(value, self.token):
+                    return await self.profile(scope, receive, send)
+                break
+
+        await self.app(scope, receive, send)
+
+    async def profile(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """
+        Handle a request under the profiler and log the result.
+
+        Args:
+            scope (Scope): The ASGI scope.
+            receive (Receive): The ASGI receive function.
+            send (Send): The ASGI send function.
+        """
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # NOTE: Another profiler (e.g. a debugger) is already active.
+            return await self.app(scope, receive, send)
+
+        self.active = True
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profile.disable()
+            duration = time.perf_counter() - start
+            self.active = False
+            route = route_template(scope) or scope["path"]
+            logger.info(
+                "Profile of %s %s\n%s",
+                scope["method"],
+                route,
+                format_profile(profile, self.limit),
+                extra={
+                    "labels": {
+                        "profile_route": route,
+                        "profile_duration_ms": round(duration * 1000, 1),
+                    }
+                },
+            )
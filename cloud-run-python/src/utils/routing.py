@@ -0,0 +1,24 @@
+from starlette.types import Scope
+
+
+def route_template(scope: Scope) -> str | None:
+    """
+    Return the route template of a routed request, e.g. `/v1/books/{book_id}`
+    for `/v1/books/abc`. The route stored in the scope only knows its own path,
+    not the prefixes of the routers it was included with, so the prefix is
+    recovered from the request path.
+
+    Args:
+        scope (Scope): The ASGI scope, after the request was routed.
+    Returns:
+        str | None: The route template, or None if no route matched.
+    """
+    route = scope.get("route")
+    path_format: str | None = getattr(route, "path_format", None)
+    if path_format is None:
+        return None
+    path: str = scope["path"]
+    matched = path_format.format(**scope.get("path_params", {}))
+    if not path.endswith(matched):
+        return path_format
+    return path[: len(path) - len(matched)] + path_format
@@ -0,0 +1,204 @@
+import functools
+import inspect
+import logging
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+
+from fastapi.routing import APIRoute
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import MutableHeaders
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.utils.cloud_logging import trace_context
+
+# //////////////////////////////////////////////////////////////////////////////
+
+logger = logging.getLogger("app")
+
+
+class Timings:
+    """
+    Durations of the phases of a single request. Phases that run several times
+    or concurrently (e.g. two Firestore queries) are summed up.
+
+    Attributes:
+        durations (dict[str, float]): Duration per phase in seconds.
+        counters (dict[str, int]): Counters of the request, e.g. the number of
+            Firestore calls. Only logged, not sent in the header.
+        endpoint_end (float | None): When the endpoint returned, as a
+            `time.perf_counter` value.
+    """
+
+    __slots__ = ("durations", "counters", "endpoint_end")
+
+    def __init__(self) -> None:
+        self.durations: dict[str, float] = {}
+        self.counters: dict[str, int] = {}
+        self.endpoint_end: float | None = None
+
+    def add(self, name: str, duration: float) -> None:
+        """
+        Add to the duration of a phase.
+
+        Args:
+            name (str): The name of the phase.
+            duration (float): The duration to add in seconds.
+        """
+        self.durations[name] = self.durations.get(name, 0.0) + duration
+
+    def increment(self, name: str, value: int = 1) -> None:
+        """
+        Add to a counter.
+
+        Args:
+            name (str): The name of the counter.
+            value (int): The value to add.
+        """
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def header_value(self) -> str:
+        """
+        Render the durations as a Server-Timing header value.
+        See https://www.w3.org/TR/server-timing/
+
+        Returns:
+            str: The Server-Timing header value, e.g. `firestore;dur=12.3`.
+        """
+        return ", ".join(
+            f"{name};dur={duration * 1000:.1f}"
+            for name, duration in self.durations.items()
+        )
+
+
+server_timing: ContextVar[Timings | None] = ContextVar("server_timing", default=None)
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    """
+    Measure the enclosed block as a phase of the current request. Does nothing
+    outside of a request handled by ServerTimingMiddleware.
+
+    Args:
+        name (str): The name of the phase.
+    """
+    timings = server_timing.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - start)
+
+
+# //////////////////////////////////////////////////////////////////////////////
+
+
+class ServerTimingRoute(APIRoute):
+    """
+    Route that measures its endpoint and the time FastAPI spends validating and
+    serializing the endpoint's result. Use as `APIRouter(route_class=...)`.
+    Like FastAPI itself, sync endpoints are run in the threadpool.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        is_coroutine = inspect.iscoroutinefunction(endpoint)
+
+        @functools.wraps(endpoint)
+        async def timed_endpoint(*args: Any, **kwargs: Any) -> Any:
+            with timed("endpoint"):
+                if is_coroutine:
+                    result = await endpoint(*args, **kwargs)
+                else:
+                    result = await run_in_threadpool(endpoint, *args, **kwargs)
+            timings = server_timing.get()
+            if timings is not None:
+                timings.endpoint_end = time.perf_counter()
+            return result
+
+        super().__init__(path, timed_endpoint, **kwargs)
+
+    def get_route_handler(self) -> Callable[[Request], Any]:
+        handler = super().get_route_handler()
+
+        async def timed_handler(request: Request) -> Response:
+            response: Response = await handler(request)
+            timings = server_timing.get()
+            if timings is not None and timings.endpoint_end is not None:
+                timings.add("serialize", time.perf_counter() - timings.endpoint_end)
+            return response
+
+        return timed_handler
+
+
+# //////////////////////////////////////////////////////////////////////////////
+
+
+class ServerTimingMiddleware:
+    """
+    Middleware that collects the phase timings of every request and sends them
+    in the Server-Timing response header, together with the total time until
+    the response started. Bodies that are streamed after the header was sent
+    (e.g. NDJSON exports) are not included.
+
+    Attributes:
+        log_labels (bool): Whether to also log the timings of every request as
+            structured log labels.
+    """
+
+    def __init__(self, app: ASGIApp, log_labels: bool = False) -> None:
+        self.app = app
+        self.log_labels = log_labels
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        timings = Timings()
+        start = time.perf_counter()
+        request_trace: dict[str, Any] | None = None
+
+        async def custom_send(message: Message) -> None:
+            """
+            Custom send function that adds the Server-Timing header and
+            captures the trace context of the request for the log entry.
+
+            Args:
+                message (Message): The message to send.
+            """
+            nonlocal request_trace
+            if message["type"] == "http.response.start":
+                # NOTE: CloudLoggingMiddleware runs inside of this middleware and
+                # resets the trace context before the timings are logged.
+                request_trace = trace_context.get()
+                timings.add("total", time.perf_counter() - start)
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", timings.header_value())
+
+            await send(message)
+
+        token = server_timing.set(timings)
+        try:
+            await self.app(scope, receive, custom_send)
+        finally:
+            server_timing.reset(token)
+
+        if self.log_labels:
+            labels: dict[str, float | int] = {
+                f"timing_{name}_ms": round(duration * 1000, 1)
+                for name, duration in timings.durations.items()
+            }
+            labels.update(timings.counters)
+            logger.info(
+                "Server timing of %s %s",
+                scope["method"],
+                scope["path"],
+                extra={"labels": labels, "trace_context": request_trace},
+            )
@@ -0,0 +1,59 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+
+
+class SingleFlight[K, V]:
+    """
+    Coalesce concurrent calls for the same key into a single in-flight call.
+    The first caller starts the call; everyone arriving while it is in flight
+    awaits the same result or exception. The call runs as its own task, so a
+    cancelled caller does not cancel the call for the others.
+
+    Attributes:
+        shared (int): Number of callers that joined an in-flight call instead
+            of starting their own.
+    """
+
+    def __init__(self) -> None:
+        self.shared = 0
+        self._calls: dict[K, asyncio.Future[V]] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: K, fn: Callable[[], Awaitable[V]]) -> V:
+        """
+        Run `fn` for a key unless a call for the same key is already in flight.
+
+        Args:
+            key (K): The key identifying the call.
+            fn (Callable[[], Awaitable[V]]): Factory for the call to run.
+        Returns:
+            V: The result of the (possibly shared) call.
+        """
+        call = self._calls.get(key)
+        if call is None:
+            call = asyncio.ensure_future(fn())
+            self._calls[key] = call
+            call.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.shared += 1
+        return await asyncio.shield(call)
+
+    def forget(self, key: K) -> None:
+        """
+        Detach the in-flight call for a key so that later callers start a new
+        call. Callers already waiting still receive the detached result.
+
+        Args:
+            key (K): The key to forget.
+        """
+        self._calls.pop(key, None)
+
+    def _finish(self, key: K, call: asyncio.Future[V]) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        # NOTE: Mark the exception as retrieved in case every caller was
+        # cancelled, so asyncio does not warn about it.
+        if not call.cancelled():
+            call.exception()
@@ -0,0 +1,143 @@
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+
+
+class TTLCache[K, V]:
+    """
+    Bounded in-memory cache whose entries expire after a fixed time-to-live.
+    Once `max_entries` is reached, the least recently used entry is evicted.
+    Values loaded with `begin_load`/`finish_load` are only stored if their key
+    was not invalidated while loading. The cache is not thread-safe; it is
+    meant to be used from a single event loop.
+
+    Attributes:
+        ttl (float): Seconds after which an entry expires.
+        max_entries (int): Maximum number of entries kept in the cache.
+        hits (int): Number of lookups answered from the cache.
+        misses (int): Number of lookups that found no fresh entry.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        max_entries: int,
+        timer: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._timer = timer
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        # NOTE: The loads in flight per key. Only keys that are being loaded
+        # are tracked, so invalidating other keys costs no memory.
+        self._loads: dict[K, set[int]] = {}
+        self._next_load = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: K) -> V | None:
+        """
+        Return the cached value for a key and mark it as recently used.
+
+        Args:
+            key (K): The key to look up.
+        Returns:
+            V | None: The cached value, or None if it is missing or expired.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= self._timer():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: K, value: V) -> None:
+        """
+        Store a value, evicting the least recently used entry if the cache is
+        full.
+
+        Args:
+            key (K): The key to store the value under.
+            value (V): The value to cache.
+        """
+        self._entries[key] = (self._timer() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def begin_load(self, key: K) -> int:
+        """
+        Register a load of a value, e.g. a database read, for a key.
+
+        Args:
+            key (K): The key being loaded.
+        Returns:
+            int: The ID of the load, to pass to `finish_load`.
+        """
+        self._next_load += 1
+        self._loads.setdefault(key, set()).add(self._next_load)
+        return self._next_load
+
+    def finish_load(self, key: K, load: int, value: V | None) -> bool:
+        """
+        Complete a load and store its value, unless the key was invalidated
+        since the load began. Must be called for every load, also when it
+        failed.
+
+        Args:
+            key (K): The key that was loaded.
+            load (int): The ID returned by `begin_load`.
+            value (V | None): The loaded value, or None if there is nothing to
+                store.
+        Returns:
+            bool: Whether the value was stored.
+        """
+        loads = self._loads.get(key)
+        if loads is None or load not in loads:
+            return False
+        loads.discard(load)
+        if not loads:
+            del self._loads[key]
+        if value is None:
+            return False
+        self.set(key, value)
+        return True
+
+    def invalidate(self, key: K) -> None:
+        """
+        Remove a key from the cache if present. Loads of the key in flight
+        will not be stored.
+
+        Args:
+            key (K): The key to remove.
+        """
+        self._entries.pop(key, None)
+        self._loads.pop(key, None)
+
+    def clear(self) -> None:
+        """
+        Remove all entries and reset the hit and miss counters. No load in
+        flight will be stored.
+        """
+        self._entries.clear()
+        self._loads.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict[str, int]:
+        """
+        Return the current cache counters.
+
+        Returns:
+            dict[str, int]: The number of hits, misses and cached entries.
+        """
+        return {"hits": self.hits, "misses": self.misses, "size": len(self)}
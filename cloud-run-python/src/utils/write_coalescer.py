@@ -0,0 +1,141 @@
+import asyncio
+import contextvars
+import logging
+from collections.abc import Awaitable, Callable
+
+# //////////////////////////////////////////////////////////////////////////////
+
+logger = logging.getLogger("app")
+
+
+class WriteCoalescer[T]:
+    """
+    Collect writes submitted concurrently and commit them with a single batched
+    write. A batch is committed once it holds `max_items` items, or `window`
+    seconds after its first item arrived. If the batched write fails, every
+    item of the batch is retried with its own write, so each caller receives
+    the result or error of its own item.
+
+    NOTE: Batches are written in a fresh context, so the Server-Timing phases
+    and counters of a shared write are not attributed to whichever request
+    happened to start the batch.
+
+    Attributes:
+        window (float): Seconds to wait for more items after the first one.
+        max_items (int): The number of items that commits a batch right away.
+        batches (int): Number of batches committed.
+        items (int): Number of items written.
+        fallbacks (int): Number of failed batches retried item by item.
+    """
+
+    def __init__(
+        self,
+        write_many: Callable[[list[T]], Awaitable[None]],
+        write_one: Callable[[T], Awaitable[None]],
+        window: float,
+        max_items: int,
+    ) -> None:
+        self.window = window
+        self.max_items = max_items
+        self.batches = 0
+        self.items = 0
+        self.fallbacks = 0
+        self._write_many = write_many
+        self._write_one = write_one
+        self._pending: list[tuple[T, asyncio.Future[None]]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._writes: set[asyncio.Task[None]] = set()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    async def submit(self, item: T) -> None:
+        """
+        Add an item to the current batch and wait until it was written. A
+        cancelled caller does not cancel the write of its item.
+
+        Args:
+            item (T): The item to write.
+        Raises:
+            Exception: The error of the write of this item.
+        """
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[None] = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_items:
+            self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(
+                self.window, self.flush, context=contextvars.Context()
+            )
+        await future
+
+    def flush(self) -> None:
+        """
+        Start writing the current batch without waiting for the window to end.
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        task = asyncio.create_task(self._write(batch), context=contextvars.Context())
+        self._writes.add(task)
+        task.add_done_callback(self._writes.discard)
+
+    async def close(self) -> None:
+        """
+        Write the current batch and wait for all writes in flight.
+        """
+        self.flush()
+        await asyncio.gather(*self._writes)
+
+    def stats(self) -> dict[str, int]:
+        """
+        Return the current counters.
+
+        Returns:
+            dict[str, int]: The number of batches, items, fallbacks and pending
+                items.
+        """
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "fallbacks": self.fallbacks,
+            "pending": len(self),
+        }
+
+    # //////////////////////////////////////////////////////////////////////////
+
+    async def _write(self, batch: list[tuple[T, asyncio.Future[None]]]) -> None:
+        self.batches += 1
+        self.items += len(batch)
+        # NOTE: A batch of one is written on its own, so a lone item neither
+        # pays for a batch nor needs a second attempt.
+        if len(batch) > 1:
+            try:
+                await self._write_many([item for item, _ in batch])
+            except Exception as e:
+                self.fallbacks += 1
+                logger.warning(
+                    "Failed to write batch of %d items, writing them one by one: %s",
+                    len(batch),
+                    e,
+                )
+            else:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_result(None)
+                return
+
+        results = await asyncio.gather(
+            *(self._write_one(item) for item, _ in batch), return_exceptions=True
+        )
+        for (_, future), result in zip(batch, results, strict=True):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(None)
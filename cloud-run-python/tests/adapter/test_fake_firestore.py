@@ -0,0 +1,213 @@
+import asyncio
+import time
+
+import pytest
+from google.cloud import exceptions
+
+from src.adapter.book_repository import MAX_BATCH_WRITES
+from src.adapter.fake_firestore import FakeClient
+
+# //////////////////////////////////////////////////////////////////////////////
+# Helpers
+
+
+@pytest.fixture
+def client() -> FakeClient:
+    client = FakeClient()
+    for i in range(5):
+        client.add("books", f"book-{i}", {"title": f"Title {i}"})
+    return client
+
+
+async def stream_ids(query) -> list[str]:
+    return [doc.id async for doc in query.stream()]
+
+
+# //////////////////////////////////////////////////////////////////////////////
+# Documents
+
+
+async def test_get_returns_stored_document(client):
+    doc = await client.collection("books").document("book-1").get()
+
+    assert doc.exists
+    assert doc.id == "book-1"
+    assert doc.to_dict() == {"title": "Title 1"}
+    assert doc.update_time is not None
+
+
+async def test_get_of_missing_document_does_not_exist(client):
+    doc = await client.document("books", "missing").get()
+
+    assert not doc.exists
+    assert doc.to_dict() is None
+    assert doc.update_time is None
+
+
+async def test_set_update_and_delete(client):
+    ref = client.document("books", "new")
+
+    await ref.set({"title": "New", "author": "Author"})
+    result = await ref.update({"title": "Updated"})
+    assert (await ref.get()).to_dict() == {"title": "Updated", "author": "Author"}
+    assert result.update_time == (await ref.get()).update_time
+
+    await ref.delete()
+    assert not (await ref.get()).exists
+
+
+async def test_update_of_missing_document_raises_not_found(client):
+    with pytest.raises(exceptions.NotFound):
+        await client.document("books", "missing").update({"title": "Updated"})
+
+    assert "missing" not in client.store["books"]
+
+
+# //////////////////////////////////////////////////////////////////////////////
+# Queries
+
+
+async def test_stream_orders_by_id_with_cursor_and_limit(client):
+    query = client.collection("books").order_by("__name__")
+
+    assert await stream_ids(query) == [f"book-{i}" for i in range(5)]
+    assert await stream_ids(query.start_after({"__name__": "book-1"}).limit(2)) == [
+        "book-2",
+        "book-3",
+    ]
+
+
+def test_order_by_other_fields_is_rejected(client):
+    with pytest.raises(ValueError, match="__name__"):
+        client.collection("books").order_by("title")
+
+
+async def test_stream_takes_one_rpc_per_response():
+    client = FakeClient(stream_batch_size=2)
+    for i in range(5):
+        client.add("books", f"book-{i}", {})
+
+    await stream_ids(client.collection("books"))
+    await stream_ids(client.collection("empty"))
+
+    assert client.rpcs["stream"] == 4
+
+
+async def test_count_counts_matching_documents(client):
+    results = await client.collection("books").count(alias="total").get()
+
+    assert results[0][0].alias == "total"
+    assert results[0][0].value == 5
+
+
+async def test_get_all_returns_snapshots_in_request_order(client):
+    collection = client.collection("books")
+    refs = [collection.document("book-3"), collection.document("missing")]
+
+    docs = [doc async for doc in client.get_all(refs)]
+
+    assert [(doc.id, doc.exists) for doc in docs] == [
+        ("book-3", True),
+        ("missing", False),
+    ]
+    assert client.rpcs["get_all"] == 1
+
+
+# //////////////////////////////////////////////////////////////////////////////
+# Batches
+
+
+async def test_batch_commit_applies_all_writes(client):
+    batch = client.batch()
+    batch.set(client.document("books", "new"), {"title": "New"})
+    batch.update(client.document("books", "new"), {"author": "Author"})
+    batch.delete(client.document("books", "book-0"))
+
+    results = await batch.commit()
+
+    assert len(results) == 3
+    assert client.store["books"]["new"][0] == {"title": "New", "author": "Author"}
+    assert "book-0" not in client.store["books"]
+
+
+async def test_failed_batch_applies_no_writes(client):
+    batch = client.batch()
+    batch.set(client.document("books", "new"), {"title": "New"})
+    batch.update(client.document("books", "missing"), {"title": "Updated"})
+
+    with pytest.raises(exceptions.NotFound):
+        await batch.commit()
+
+    assert "new" not in client.store["books"]
+
+
+async def test_batch_rejects_too_many_writes(client):
+    batch = client.batch()
+    for i in range(MAX_BATCH_WRITES + 1):
+        batch.set(client.document("books", f"new-{i}"), {})
+
+    with pytest.raises(exceptions.BadRequest):
+        await batch.commit()
+
+
+# //////////////////////////////////////////////////////////////////////////////
+# Latency, failures and counters
+
+
+async def test_rpcs_are_counted(client):
+    ref = client.document("books", "book-0")
+    await ref.get()
+    await ref.get()
+    await ref.set({})
+
+    assert client.rpcs == {"get": 2, "set": 1}
+
+
+async def test_rpcs_wait_for_their_latency_concurrently():
+    client = FakeClient(latency=0.05, rpc_latency={"set": 0.0})
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client.document("books", str(i)).get() for i in range(10)))
+    gets = time.perf_counter() - start
+
+    start = time.perf_counter()
+    await client.document("books", "a").set({})
+    sets = time.perf_counter() - start
+
+    assert 0.05 <= gets < 0.2
+    assert sets < 0.05
+
+
+async def test_jitter_is_reproducible_with_seed(monkeypatch):
+    delays: list[float] = []
+
+    async def record_sleep(delay: float) -> None:
+        delays.append(delay)
+
+    monkeypatch.setattr(asyncio, "sleep", record_sleep)
+    for _ in range(2):
+        client = FakeClient(latency=0.01, jitter=0.005, seed=42)
+        for _ in range(3):
+            await client.document("books", "a").get()
+
+    assert delays[:3] == delays[3:]
+    assert all(0.005 <= delay <= 0.015 for delay in delays)
+    assert len(set(delays)) == 3
+
+
+async def test_injected_failures_are_raised_once(client):
+    client.inject_failure("get", exceptions.ServiceUnavailable("down"))
+    ref = client.document("books", "book-0")
+
+    with pytest.raises(exceptions.ServiceUnavailable):
+        await ref.get()
+    assert (await ref.get()).exists
+
+
+async def test_failure_rate_fails_rpcs():
+    client = FakeClient(failure_rate=1.0)
+
+    with pytest.raises(exceptions.ServiceUnavailable):
+        await client.document("books", "a").set({})
+
+    assert client.store == {}
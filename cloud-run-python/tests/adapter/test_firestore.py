@@ -3,6 +3,8 @@ from unittest.mock import MagicMock, patch
 import pytest
 
 from src.adapter import firestore as fs
+from src.adapter.fake_firestore import FakeClient
+from src.adapter.instrumentation import InstrumentedClient
 
 
 @pytest.fixture(autouse=True)
@@ -39,14 +41,31 @@ def test_init_client_returns_existing_client_without_creating_new_one():
     assert result is existing
 
 
+def test_init_fake_client_creates_fake_client():
+    result = fs.init_fake_client(latency=0.01, failure_rate=0.5, seed=1)
+    assert isinstance(result, FakeClient)
+    assert fs.client is result
+    assert result.latency == 0.01
+    assert result.failure_rate == 0.5
+
+
+def test_init_fake_client_returns_existing_client():
+    existing = MagicMock()
+    fs.client = existing
+    assert fs.init_fake_client() is existing
+
+
 # //////////////////////////////////////////////////////////////////////////////
 # get_client
 
 
-def test_get_client_returns_initialized_client():
+def test_get_client_returns_instrumented_client():
     mock_instance = MagicMock()
     fs.client = mock_instance
-    assert fs.get_client() is mock_instance
+    result = fs.get_client()
+    assert isinstance(result, InstrumentedClient)
+    assert result.target is mock_instance
+    assert result.stats is fs.stats
 
 
 def test_get_client_raises_runtime_error_when_not_initialized():
@@ -0,0 +1,238 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.adapter.instrumentation import (
+    FirestoreStats,
+    InstrumentedClient,
+    InstrumentedDocument,
+    OperationStats,
+)
+from src.utils.server_timing import Timings, server_timing
+
+# //////////////////////////////////////////////////////////////////////////////
+# Helpers
+
+
+async def async_gen(items):
+    for item in items:
+        yield item
+
+
+async def failing_gen():
+    yield "doc"
+    raise RuntimeError("stream broke")
+
+
+@pytest.fixture
+def stats() -> FirestoreStats:
+    return FirestoreStats()
+
+
+@pytest.fixture
+def target() -> MagicMock:
+    return MagicMock()
+
+
+@pytest.fixture
+def client(target, stats) -> InstrumentedClient:
+    return InstrumentedClient(target, stats)
+
+
+# //////////////////////////////////////////////////////////////////////////////
+# FirestoreStats
+
+
+def test_record_counts_calls_documents_and_errors(stats):
+    stats.record("get", 0.002, documents=1)
+    stats.record("get", 0.004, error=True)
+
+    operation = stats.operations["get"]
+    assert operation.calls == 2
+    assert operation.documents == 1
+    assert operation.errors == 1
+    assert operation.latency.count == 2
+
+
+def test_record_adds_to_timings_of_current_request(stats):
+    timings = Timings()
+    token = server_timing.set(timings)
+    try:
+        stats.record("stream", 0.010, documents=3)
+        stats.record("get", 0.005, documents=1)
+    finally:
+        server_timing.reset(token)
+
+    assert timings.durations == {"firestore": pytest.approx(0.015)}
+    assert timings.counters == {"firestore_calls": 2, "firestore_documents": 4}
+
+
+def test_snapshot_reports_bucket_percentiles(stats):
+    for _ in range(90):
+        stats.record("get", 0.002)
+    for _ in range(10):
+        stats.record("get", 0.2)
+    stats.record("delete", 0.001)
+
+    snapshot = stats.snapshot()
+
+    assert list(snapshot) == ["delete", "get"]
+    latency = snapshot["get"]["latency_ms"]
+    assert latency["mean"] == pytest.approx(21.8)
+    assert latency["p50"] == pytest.approx(2.5)
+    assert latency["p95"] == pytest.approx(250.0)
+    assert latency["p99"] == pytest.approx(250.0)
+
+
+def test_snapshot_without_calls_has_no_latency():
+    assert OperationStats().snapshot()["latency_ms"] == {
+        "mean": None,
+        "p50": None,
+        "p95": None,
+        "p99": None,
+    }
+
+
+# //////////////////////////////////////////////////////////////////////////////
+# InstrumentedClient
+
+
+async def test_document_get_is_recorded(client, target, stats):
+    snapshot = MagicMock()
+    target.collection.return_value.document.return_value.get = AsyncMock(
+        return_value=snapshot
+    )
+
+    result = await client.collection("books").document("abc").get()
+
+    assert result is snapshot
+    target.collection.assert_called_once_with("books")
+    assert stats.operations["get"].calls == 1
+    assert stats.operations["get"].documents == 1
+
+
+async def test_document_writes_are_recorded(client, target, stats):
+    doc = target.document.return_value
+    doc.set = AsyncMock()
+    doc.update = AsyncMock()
+    doc.delete = AsyncMock()
+
+    ref = client.document("books", "abc")
+    await ref.set({"title": "A"})
+    await ref.update({"title": "B"})
+    await ref.delete()
+
+    doc.set.assert_awaited_once_with({"title": "A"})
+    doc.update.assert_awaited_once_with({"title": "B"})
+    assert {name: op.calls for name, op in stats.operations.items()} == {
+        "set": 1,
+        "update": 1,
+        "delete": 1,
+    }
+
+
+async def test_document_errors_are_recorded_and_reraised(client, target, stats):
+    target.document.return_value.update = AsyncMock(side_effect=KeyError("missing"))
+
+    with pytest.raises(KeyError):
+        await client.document("books", "abc").update({"title": "B"})
+
+    assert stats.operations["update"].errors == 1
+
+
+async def test_stream_counts_documents_of_refined_query(client, target, stats):
+    query = target.collection.return_value.order_by.return_value.limit.return_value
+    query.stream.return_value = async_gen(["a", "b", "c"])
+
+    docs = [
+        doc
+        async for doc in client.collection("books")
+        .order_by("__name__")
+        .limit(3)
+        .stream()
+    ]
+
+    assert docs == ["a", "b", "c"]
+    assert stats.operations["stream"].calls == 1
+    assert stats.operations["stream"].documents == 3
+
+
+async def test_stream_records_error(client, target, stats):
+    target.collection.return_value.stream.return_value = failing_gen()
+
+    with pytest.raises(RuntimeError):
+        async for _ in client.collection("books").stream():
+            pass
+
+    assert stats.operations["stream"].errors == 1
+    assert stats.operations["stream"].documents == 1
+
+
+async def test_stream_closed_early_is_recorded(client, target, stats):
+    target.collection.return_value.stream.return_value = async_gen(["a", "b"])
+
+    stream = client.collection("books").stream()
+    assert await anext(stream) == "a"
+    await stream.aclose()
+
+    assert stats.operations["stream"].documents == 1
+    assert stats.operations["stream"].errors == 0
+
+
+async def test_stream_closed_early_closes_underlying_stream(client, target):
+    closed = False
+
+    async def underlying():
+        nonlocal closed
+        try:
+            yield "a"
+            yield "b"
+        finally:
+            closed = True
+
+    target.collection.return_value.stream.return_value = underlying()
+
+    stream = client.collection("books").stream()
+    assert await anext(stream) == "a"
+    await stream.aclose()
+
+    assert closed
+
+
+async def test_get_all_unwraps_references(client, target, stats):
+    target.get_all.return_value = async_gen(["a"])
+    ref = client.collection("books").document("a")
+
+    docs = [doc async for doc in client.get_all([ref])]
+
+    assert docs == ["a"]
+    target.get_all.assert_called_once_with([ref.target])
+    assert stats.operations["get_all"].documents == 1
+
+
+async def test_count_is_recorded(client, target, stats):
+    aggregation = target.collection.return_value.count.return_value
+    aggregation.get = AsyncMock(return_value=[[MagicMock(value=7)]])
+
+    results = await client.collection("books").count(alias="total").get()
+
+    assert results[0][0].value == 7
+    assert stats.operations["count"].calls == 1
+
+
+async def test_batch_unwraps_references_and_records_commit(client, target, stats):
+    batch = target.batch.return_value
+    batch.commit = AsyncMock()
+    ref = client.collection("books").document("a")
+    assert isinstance(ref, InstrumentedDocument)
+
+    instrumented = client.batch()
+    instrumented.set(ref, {"title": "A"})
+    await instrumented.commit()
+
+    batch.set.assert_called_once_with(ref.target, {"title": "A"})
+    assert stats.operations["commit"].calls == 1
+
+
+def test_other_attributes_are_passed_through(client, target):
+    assert client.project is target.project
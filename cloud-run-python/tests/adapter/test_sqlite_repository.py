@@ -0,0 +1,138 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from src.adapter.book_repository import NotFound, WriteError
+from src.adapter.sqlite_repository import STREAM_PAGE_SIZE, SQLiteBookRepository
+
+# //////////////////////////////////////////////////////////////////////////////
+# Helpers
+
+
+@pytest.fixture
+def repository(tmp_path):
+    repository = SQLiteBookRepository(str(tmp_path / "books.db"), readers=2)
+    yield repository
+    repository.close()
+
+
+async def seed(repository: SQLiteBookRepository, count: int) -> None:
+    await repository.set_many(
+        (f"book-{i:04d}", {"title": f"Title {i}", "author": "Author"})
+        for i in range(count)
+    )
+
+
+async def collect(items) -> list[str]:
+    return [item.id async for item in items]
+
+
+# //////////////////////////////////////////////////////////////////////////////
+# SQLiteBookRepository
+
+
+def test_database_uses_wal_mode(repository):
+    connection = sqlite3.connect(repository.path)
+    try:
+        (mode,) = connection.execute("PRAGMA journal_mode").fetchone()
+    finally:
+        connection.close()
+    assert mode == "wal"
+
+
+async def test_set_and_get(repository):
+    await repository.set("abc", {"title": "Title", "author": "Author"})
+
+    record = await repository.get("abc")
+
+    assert record is not None
+    assert record.id == "abc"
+    assert record.to_dict() == {"title": "Title", "author": "Author"}
+    assert record.update_time is not None
+    assert await repository.get("missing") is None
+
+
+async def test_get_many_skips_missing_books(repository):
+    await seed(repository, 3)
+
+    ids = await collect(repository.get_many(["book-0002", "missing", "book-0000"]))
+
+    assert sorted(ids) == ["book-0000", "book-0002"]
+
+
+async def test_scan_orders_by_id_after_cursor(repository):
+    await seed(repository, 5)
+
+    assert await collect(repository.scan(None, 2)) == ["book-0000", "book-0001"]
+    assert await collect(repository.scan("book-0001", 10)) == [
+        "book-0002",
+        "book-0003",
+        "book-0004",
+    ]
+
+
+async def test_stream_reads_all_pages(repository):
+    await seed(repository, STREAM_PAGE_SIZE + 1)
+
+    ids = await collect(repository.stream())
+
+    assert len(ids) == STREAM_PAGE_SIZE + 1
+    assert ids == sorted(ids)
+    assert await repository.count() == STREAM_PAGE_SIZE + 1
+
+
+async def test_update_merges_fields(repository):
+    await repository.set("abc", {"title": "Old", "author": "Author"})
+
+    update_time = await repository.update("abc", {"title": "New"})
+
+    record = await repository.get("abc")
+    assert record is not None
+    assert record.to_dict() == {"title": "New", "author": "Author"}
+    assert record.update_time == update_time
+
+
+async def test_update_of_missing_book_raises_not_found(repository):
+    with pytest.raises(NotFound):
+        await repository.update("missing", {"title": "New"})
+
+    assert await repository.get("missing") is None
+
+
+async def test_delete(repository):
+    await repository.set("abc", {"title": "Title"})
+
+    await repository.delete("abc")
+    await repository.delete("abc")
+
+    assert await repository.get("abc") is None
+
+
+async def test_failed_set_many_writes_nothing(repository):
+    connection = sqlite3.connect(repository.path)
+    try:
+        connection.execute(
+            "CREATE TRIGGER reject BEFORE INSERT ON books WHEN NEW.id = 'broken' "
+            "BEGIN SELECT RAISE(ABORT, 'rejected'); END"
+        )
+        connection.commit()
+    finally:
+        connection.close()
+
+    with pytest.raises(WriteError, match="rejected"):
+        await repository.set_many([("ok", {"title": "Title"}), ("broken", {})])
+
+    assert await repository.count() == 0
+
+
+async def test_reads_and_writes_run_concurrently(repository):
+    await seed(repository, 10)
+
+    results = await asyncio.gather(
+        *(repository.get(f"book-{i:04d}") for i in range(10)),
+        repository.set("new", {"title": "New"}),
+    )
+
+    assert all(record is not None for record in results[:10])
+    assert await repository.get("new") is not None
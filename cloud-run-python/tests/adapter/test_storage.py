@@ -0,0 +1,27 @@
+from unittest.mock import MagicMock
+
+from src.adapter import storage
+from src.adapter.firestore_repository import FirestoreBookRepository
+
+
+def test_repository_defaults_to_firestore():
+    assert isinstance(storage.get_repository(), FirestoreBookRepository)
+
+
+def test_init_repository_replaces_shared_repository():
+    repository = MagicMock()
+    try:
+        assert storage.init_repository(repository) is repository
+        assert storage.get_repository() is repository
+    finally:
+        storage.close_repository()
+
+
+def test_close_repository_closes_and_falls_back_to_firestore():
+    repository = MagicMock()
+    storage.init_repository(repository)
+
+    storage.close_repository()
+
+    repository.close.assert_called_once()
+    assert isinstance(storage.get_repository(), FirestoreBookRepository)
@@ -1,17 +1,30 @@
+import asyncio
+from datetime import UTC, datetime
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
+from google.api_core import exceptions
 
+from src.adapter import book_repository, firestore
+from src.adapter.fake_firestore import FakeClient
+from src.modules import books
 from src.modules.books import (
     Book,
     BookList,
     BookNotFound,
     CreateBook,
+    InvalidPageToken,
     UpdateBook,
+    batch_get_books,
+    book_from_snapshot,
     create_book,
+    decode_page_token,
     delete_book,
+    encode_page_token,
     get_book,
+    import_books,
     list_books,
+    stream_books,
     update_book,
 )
 
@@ -19,13 +32,20 @@ from src.modules.books import (
 # Helpers
 
 
-def make_doc(doc_id: str, data: dict, *, exists: bool = True) -> MagicMock:
+def make_doc(
+    doc_id: str,
+    data: dict,
+    *,
+    exists: bool = True,
+    update_time: datetime | None = None,
+) -> MagicMock:
     """
     Build a Firestore document snapshot mock.
     """
     doc = MagicMock()
     doc.id = doc_id
     doc.exists = exists
+    doc.update_time = update_time if exists else None
     doc.to_dict.return_value = data if exists else None
     return doc
 
@@ -45,11 +65,31 @@ def make_doc_ref(doc_mock: MagicMock | None = None) -> MagicMock:
     ref = MagicMock()
     ref.get = AsyncMock(return_value=doc_mock or MagicMock())
     ref.set = AsyncMock()
-    ref.update = AsyncMock()
+    ref.update = AsyncMock(return_value=MagicMock(update_time=None))
     ref.delete = AsyncMock()
     return ref
 
 
+def make_query(mock_client: MagicMock) -> MagicMock:
+    """
+    Build an ordered books query mock whose cursor and limit methods return the
+    query itself, so tests only need to stub `stream()` once.
+    """
+    query = mock_client.collection.return_value.order_by.return_value
+    query.start_after.return_value = query
+    query.limit.return_value = query
+    return query
+
+
+def make_count(mock_client: MagicMock, total: int) -> MagicMock:
+    """
+    Build a count aggregation query mock that resolves to `total`.
+    """
+    aggregation = mock_client.collection.return_value.count.return_value
+    aggregation.get = AsyncMock(return_value=[[MagicMock(value=total)]])
+    return aggregation
+
+
 @pytest.fixture
 def mock_client() -> MagicMock:
     return MagicMock()
@@ -61,12 +101,23 @@ def patch_firestore(mock_client: MagicMock):
         yield
 
 
+@pytest.fixture
+def book_cache():
+    """
+    Enable the shared book cache for a single test.
+    """
+    cache = books.init_cache(ttl=60, max_entries=10)
+    yield cache
+    books.close_cache()
+
+
 # //////////////////////////////////////////////////////////////////////////////
 # list_books
 
 
 async def test_list_books_returns_empty_list(mock_client: MagicMock):
-    mock_client.collection.return_value.stream.return_value = async_gen([])
+    make_query(mock_client).stream.return_value = async_gen([])
+    make_count(mock_client, 0)
     result = await list_books()
     assert result == BookList(books=[], total=0)
 
@@ -76,21 +127,113 @@ async def test_list_books_returns_all_books(mock_client: MagicMock):
         make_doc("1", {"title": "Book One", "author": "Alice"}),
         make_doc("2", {"title": "Book Two", "author": "Bob"}),
     ]
-    mock_client.collection.return_value.stream.return_value = async_gen(docs)
+    make_query(mock_client).stream.return_value = async_gen(docs)
+    make_count(mock_client, 2)
     result = await list_books()
     assert result.total == 2
     assert result.books[0] == Book(id="1", title="Book One", author="Alice")
     assert result.books[1] == Book(id="2", title="Book Two", author="Bob")
+    assert result.next_page_token is None
 
 
 async def test_list_books_uses_empty_string_for_missing_fields(mock_client: MagicMock):
-    mock_client.collection.return_value.stream.return_value = async_gen(
-        [make_doc("1", {})]
-    )
-    result = await list_books()
+    make_query(mock_client).stream.return_value = async_gen([make_doc("1", {})])
+    result = await list_books(include_total=False)
     assert result.books[0] == Book(id="1", title="", author="")
 
 
+async def test_list_books_orders_by_id_and_fetches_one_extra_document(
+    mock_client: MagicMock,
+):
+    query = make_query(mock_client)
+    query.stream.return_value = async_gen([])
+    await list_books(limit=10, include_total=False)
+    mock_client.collection.return_value.order_by.assert_called_once_with("__name__")
+    query.limit.assert_called_once_with(11)
+    query.start_after.assert_not_called()
+
+
+async def test_list_books_returns_next_page_token_when_more_books_exist(
+    mock_client: MagicMock,
+):
+    docs = [make_doc(str(i), {"title": "T", "author": "A"}) for i in range(3)]
+    make_query(mock_client).stream.return_value = async_gen(docs)
+    result = await list_books(limit=2, include_total=False)
+    assert [book.id for book in result.books] == ["0", "1"]
+    assert result.next_page_token == encode_page_token("1")
+
+
+async def test_list_books_starts_after_page_token(mock_client: MagicMock):
+    query = make_query(mock_client)
+    query.stream.return_value = async_gen([])
+    await list_books(page_token=encode_page_token("abc"), include_total=False)
+    query.start_after.assert_called_once_with({"__name__": "abc"})
+
+
+async def test_list_books_raises_invalid_page_token(mock_client: MagicMock):
+    with pytest.raises(InvalidPageToken) as exc_info:
+        await list_books(page_token="%%%")
+    assert exc_info.value.page_token == "%%%"
+    mock_client.collection.return_value.order_by.return_value.stream.assert_not_called()
+
+
+async def test_list_books_total_comes_from_count_aggregation(
+    mock_client: MagicMock,
+):
+    docs = [make_doc(str(i), {"title": "T", "author": "A"}) for i in range(3)]
+    make_query(mock_client).stream.return_value = async_gen(docs)
+    aggregation = make_count(mock_client, 42)
+    result = await list_books(limit=2)
+    assert len(result.books) == 2
+    assert result.total == 42
+    mock_client.collection.return_value.count.assert_called_once_with(alias="total")
+    aggregation.get.assert_awaited_once()
+
+
+async def test_list_books_skips_count_when_total_is_not_requested(
+    mock_client: MagicMock,
+):
+    make_query(mock_client).stream.return_value = async_gen([])
+    result = await list_books(include_total=False)
+    assert result.total is None
+    mock_client.collection.return_value.count.assert_not_called()
+
+
+# //////////////////////////////////////////////////////////////////////////////
+# stream_books
+
+
+async def test_stream_books_yields_every_book(mock_client: MagicMock):
+    docs = [
+        make_doc("1", {"title": "Book One", "author": "Alice"}),
+        make_doc("2", {}),
+    ]
+    mock_client.collection.return_value.stream.return_value = async_gen(docs)
+    result = [book async for book in stream_books()]
+    assert result == [
+        Book(id="1", title="Book One", author="Alice"),
+        Book(id="2", title="", author=""),
+    ]
+    mock_client.collection.assert_called_once_with("books")
+
+
+# //////////////////////////////////////////////////////////////////////////////
+# page tokens
+
+
+@pytest.mark.parametrize(
+    "book_id", ["1", "abc", "0e5a1c9e-8f1b-4b9e-9c1d-2f3e4a5b6c7d"]
+)
+def test_page_token_round_trip(book_id: str):
+    assert decode_page_token(encode_page_token(book_id)) == book_id
+
+
+@pytest.mark.parametrize("page_token", ["", "%%%", encode_page_token("a/b")])
+def test_decode_page_token_rejects_invalid_tokens(page_token: str):
+    with pytest.raises(InvalidPageToken):
+        decode_page_token(page_token)
+
+
 # //////////////////////////////////////////////////////////////////////////////
 # get_book
 
@@ -116,6 +259,197 @@ async def test_get_book_raises_book_not_found_when_missing(mock_client: MagicMoc
     assert "missing" in str(exc_info.value)
 
 
+async def test_get_book_is_served_from_cache_on_repeated_reads(
+    mock_client: MagicMock, book_cache
+):
+    doc = make_doc("abc", {"title": "Found", "author": "Author"})
+    get = AsyncMock(return_value=doc)
+    mock_client.collection.return_value.document.return_value.get = get
+
+    first = await get_book("abc")
+    second = await get_book("abc")
+
+    assert first == second
+    get.assert_awaited_once()
+    assert book_cache.stats() == {"hits": 1, "misses": 1, "size": 1}
+
+
+async def test_get_book_does_not_cache_missing_books(
+    mock_client: MagicMock, book_cache
+):
+    doc = make_doc("missing", {}, exists=False)
+    mock_client.collection.return_value.document.return_value.get = AsyncMock(
+        return_value=doc
+    )
+    with pytest.raises(BookNotFound):
+        await get_book("missing")
+    assert len(book_cache) == 0
+
+
+@pytest.mark.parametrize("write", ["update", "delete"])
+async def test_writes_evict_cached_book(mock_client: MagicMock, book_cache, write):
+    book_cache.set("abc", Book(id="abc", title="Old", author="Author"))
+    existing = make_doc("abc", {"title": "Old", "author": "Author"})
+    doc_ref = make_doc_ref(existing)
+    mock_client.document.return_value = doc_ref
+    mock_client.collection.return_value.document.return_value = doc_ref
+
+    if write == "update":
+        await update_book("abc", UpdateBook(title="New"))
+    else:
+        await delete_book("abc")
+
+    assert book_cache.get("abc") is None
+
+
+async def test_get_book_coalesces_concurrent_reads_for_same_id(
+    mock_client: MagicMock,
+):
+    release = asyncio.Event()
+    doc = make_doc("abc", {"title": "Found", "author": "Author"})
+
+    async def get():
+        await release.wait()
+        return doc
+
+    get_mock = AsyncMock(side_effect=get)
+    mock_client.collection.return_value.document.return_value.get = get_mock
+
+    tasks = [asyncio.create_task(get_book("abc")) for _ in range(10)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*tasks)
+
+    assert all(result.id == "abc" for result in results)
+    get_mock.assert_awaited_once()
+
+
+async def test_get_book_does_not_cache_read_overtaken_by_a_write(
+    mock_client: MagicMock, book_cache
+):
+    release = asyncio.Event()
+    doc = make_doc("abc", {"title": "Old", "author": "Author"})
+
+    async def get():
+        await release.wait()
+        return doc
+
+    mock_client.collection.return_value.document.return_value.get = AsyncMock(
+        side_effect=get
+    )
+    mock_client.document.return_value = make_doc_ref()
+
+    read = asyncio.create_task(get_book("abc"))
+    # NOTE: Yield twice: once to start get_book and once to start its read task.
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    await delete_book("abc")
+    release.set()
+    await read
+
+    assert book_cache.get("abc") is None
+
+
+async def test_get_book_caches_read_overlapping_a_write_of_another_book(
+    mock_client: MagicMock, book_cache
+):
+    release = asyncio.Event()
+    doc = make_doc("hot", {"title": "Hot", "author": "Author"})
+
+    async def get():
+        await release.wait()
+        return doc
+
+    mock_client.collection.return_value.document.return_value.get = AsyncMock(
+        side_effect=get
+    )
+    mock_client.document.return_value = make_doc_ref()
+
+    read = asyncio.create_task(get_book("hot"))
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    await create_book(CreateBook(title="New"))
+    release.set()
+    await read
+
+    assert book_cache.get("hot") == book_from_snapshot(doc)
+
+
+def test_init_cache_is_disabled_for_non_positive_ttl():
+    assert books.init_cache(0, 100) is None
+    assert books.cache is None
+
+
+async def test_get_book_carries_update_time_without_serializing_it(
+    mock_client: MagicMock,
+):
+    update_time = datetime(2024, 1, 1, tzinfo=UTC)
+    doc = make_doc("abc", {"title": "T", "author": "A"}, update_time=update_time)
+    mock_client.collection.return_value.document.return_value.get = AsyncMock(
+        return_value=doc
+    )
+    result = await get_book("abc")
+    assert result.update_time == update_time
+    assert "update_time" not in result.model_dump()
+
+
+# //////////////////////////////////////////////////////////////////////////////
+# batch_get_books
+
+
+async def test_batch_get_books_returns_found_and_missing_books(
+    mock_client: MagicMock,
+):
+    docs = [
+        make_doc("2", {"title": "Book Two", "author": "Bob"}),
+        make_doc("missing", {}, exists=False),
+        make_doc("1", {"title": "Book One", "author": "Alice"}),
+    ]
+    mock_client.get_all.return_value = async_gen(docs)
+
+    result = await batch_get_books(["1", "missing", "2"])
+
+    assert [book.id for book in result.books] == ["1", "2"]
+    assert result.missing == ["missing"]
+    mock_client.get_all.assert_called_once()
+
+
+async def test_batch_get_books_deduplicates_ids(mock_client: MagicMock):
+    mock_client.get_all.return_value = async_gen(
+        [make_doc("1", {"title": "T", "author": "A"})]
+    )
+
+    result = await batch_get_books(["1", "1", "1"])
+
+    assert len(result.books) == 1
+    (refs,), _ = mock_client.get_all.call_args
+    assert len(refs) == 1
+
+
+async def test_batch_get_books_serves_cached_books_without_rpc(
+    mock_client: MagicMock, book_cache
+):
+    book_cache.set("1", Book(id="1", title="Cached", author="A"))
+    mock_client.get_all.return_value = async_gen(
+        [make_doc("2", {"title": "Fetched", "author": "B"})]
+    )
+
+    result = await batch_get_books(["1", "2"])
+
+    assert [book.title for book in result.books] == ["Cached", "Fetched"]
+    mock_client.collection.return_value.document.assert_called_once_with("2")
+    assert book_cache.get("2") == Book(id="2", title="Fetched", author="B")
+
+
+async def test_batch_get_books_skips_rpc_when_all_books_are_cached(
+    mock_client: MagicMock, book_cache
+):
+    book_cache.set("1", Book(id="1", title="Cached", author="A"))
+    result = await batch_get_books(["1"])
+    assert result.missing == []
+    mock_client.get_all.assert_not_called()
+
+
 # //////////////////////////////////////////////////////////////////////////////
 # create_book
 
@@ -164,14 +498,114 @@ async def test_create_book_persists_to_firestore(mock_client: MagicMock):
     doc_ref.set.assert_called_once_with(result.model_dump())
 
 
+# //////////////////////////////////////////////////////////////////////////////
+# import_books
+
+
+def make_batches(mock_client: MagicMock, *, fail: bool = False) -> list[MagicMock]:
+    """
+    Record every write batch handed out by the client. Commits raise a
+    Firestore error when `fail` is set.
+    """
+    batches: list[MagicMock] = []
+
+    def batch():
+        b = MagicMock()
+        b.commit = AsyncMock(
+            side_effect=firestore.exceptions.ServiceUnavailable("down")
+            if fail
+            else None
+        )
+        batches.append(b)
+        return b
+
+    mock_client.batch.side_effect = batch
+    return batches
+
+
+async def test_import_books_writes_rows_in_batches(mock_client: MagicMock):
+    batches = make_batches(mock_client)
+    lines = [b'{"title": "T%d", "author": "A"}' % i for i in range(5)]
+
+    result = await import_books(async_gen(lines), batch_size=2)
+
+    assert result.created == 5
+    assert result.failures == []
+    assert [b.set.call_count for b in batches] == [2, 2, 1]
+    assert all(b.commit.await_count == 1 for b in batches)
+
+
+async def test_import_books_reports_invalid_rows_and_writes_the_rest(
+    mock_client: MagicMock,
+):
+    batches = make_batches(mock_client)
+    lines = [b'{"title": "ok"}', b"not json", b'{"title": 1}', b'{"author": "ok"}']
+
+    result = await import_books(async_gen(lines))
+
+    assert result.created == 2
+    assert [failure.line for failure in result.failures] == [2, 3]
+    assert result.failures[1].message.startswith("title:")
+    assert batches[0].set.call_count == 2
+
+
+async def test_import_books_reports_every_row_of_a_failed_batch(
+    mock_client: MagicMock,
+):
+    make_batches(mock_client, fail=True)
+    lines = [b"{}", b"{}", b"{}"]
+
+    result = await import_books(async_gen(lines), batch_size=2)
+
+    assert result.created == 0
+    assert [failure.line for failure in result.failures] == [1, 2, 3]
+
+
+async def test_import_books_reports_rows_of_a_batch_failing_with_any_error(
+    mock_client: MagicMock,
+):
+    errors = iter([None, exceptions.RetryError("Deadline exceeded", None), None])
+    mock_client.batch.side_effect = lambda: MagicMock(
+        commit=AsyncMock(side_effect=next(errors))
+    )
+    lines = [b"{}"] * 5
+
+    result = await import_books(async_gen(lines), batch_size=2)
+
+    assert result.created == 3
+    assert [failure.line for failure in result.failures] == [3, 4]
+
+
+async def test_import_books_limits_concurrent_commits(mock_client: MagicMock):
+    in_flight = 0
+    peak = 0
+
+    async def commit():
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0)
+        in_flight -= 1
+
+    mock_client.batch.return_value.commit = AsyncMock(side_effect=commit)
+    lines = [b"{}"] * 20
+
+    result = await import_books(async_gen(lines), batch_size=1, max_in_flight=3)
+
+    assert result.created == 20
+    assert peak == 3
+
+
 # //////////////////////////////////////////////////////////////////////////////
 # update_book
 
 
 async def test_update_book_applies_field_updates(mock_client: MagicMock):
-    existing = make_doc("abc", {"title": "Old Title", "author": "Old Author"})
-    doc_ref = make_doc_ref(existing)
+    stored = make_doc("abc", {"title": "New Title", "author": "Old Author"})
+    doc_ref = make_doc_ref(stored)
     mock_client.document.return_value = doc_ref
+    # NOTE: Books are read back through the collection.
+    mock_client.collection.return_value.document.return_value = doc_ref
 
     result = await update_book("abc", UpdateBook(title="New Title"))
 
@@ -180,12 +614,48 @@ async def test_update_book_applies_field_updates(mock_client: MagicMock):
     doc_ref.update.assert_called_once_with({"title": "New Title"})
 
 
+async def test_update_book_reads_back_after_partial_update(mock_client: MagicMock):
+    order: list[str] = []
+    doc_ref = make_doc_ref(make_doc("abc", {"title": "New", "author": "A"}))
+    doc_ref.update.side_effect = lambda _: (
+        order.append("update") or doc_ref.update.return_value
+    )
+    doc_ref.get.side_effect = lambda: order.append("get") or doc_ref.get.return_value
+    mock_client.document.return_value = doc_ref
+    # NOTE: Books are read back through the collection.
+    mock_client.collection.return_value.document.return_value = doc_ref
+
+    await update_book("abc", UpdateBook(title="New"))
+
+    assert order == ["update", "get"]
+
+
+async def test_update_book_skips_read_when_every_field_is_updated(
+    mock_client: MagicMock,
+):
+    doc_ref = make_doc_ref()
+    mock_client.document.return_value = doc_ref
+
+    update_time = datetime(2024, 1, 1, tzinfo=UTC)
+    doc_ref.update.return_value = MagicMock(update_time=update_time)
+
+    result = await update_book("abc", UpdateBook(title="New", author="Author"))
+
+    assert result == Book(
+        id="abc", title="New", author="Author", update_time=update_time
+    )
+    doc_ref.update.assert_awaited_once_with({"title": "New", "author": "Author"})
+    doc_ref.get.assert_not_called()
+
+
 async def test_update_book_skips_firestore_write_when_payload_is_empty(
     mock_client: MagicMock,
 ):
     existing = make_doc("abc", {"title": "Title", "author": "Author"})
     doc_ref = make_doc_ref(existing)
     mock_client.document.return_value = doc_ref
+    # NOTE: Books are read back through the collection.
+    mock_client.collection.return_value.document.return_value = doc_ref
 
     result = await update_book("abc", UpdateBook())
 
@@ -202,19 +672,34 @@ async def test_update_book_id_field_in_stored_doc_does_not_cause_error(
     existing = make_doc("abc", {"id": "abc", "title": "Title", "author": "Author"})
     doc_ref = make_doc_ref(existing)
     mock_client.document.return_value = doc_ref
+    # NOTE: Books are read back through the collection.
+    mock_client.collection.return_value.document.return_value = doc_ref
 
     result = await update_book("abc", UpdateBook())
     assert result.id == "abc"
 
 
 async def test_update_book_raises_book_not_found_when_missing(mock_client: MagicMock):
-    missing = make_doc("xyz", {}, exists=False)
-    doc_ref = make_doc_ref(missing)
+    doc_ref = make_doc_ref()
+    doc_ref.update.side_effect = firestore.exceptions.NotFound("missing")
     mock_client.document.return_value = doc_ref
 
     with pytest.raises(BookNotFound) as exc_info:
         await update_book("xyz", UpdateBook(title="New"))
     assert exc_info.value.book_id == "xyz"
+    doc_ref.get.assert_not_called()
+
+
+async def test_update_book_with_empty_payload_raises_book_not_found_when_missing(
+    mock_client: MagicMock,
+):
+    doc_ref = make_doc_ref(make_doc("xyz", {}, exists=False))
+    mock_client.document.return_value = doc_ref
+    # NOTE: Books are read back through the collection.
+    mock_client.collection.return_value.document.return_value = doc_ref
+
+    with pytest.raises(BookNotFound):
+        await update_book("xyz", UpdateBook())
 
 
 # //////////////////////////////////////////////////////////////////////////////
@@ -255,3 +740,107 @@ def test_book_not_found_stores_book_id():
 def test_book_not_found_message_contains_id():
     exc = BookNotFound("42")
     assert "42" in str(exc)
+
+
+# //////////////////////////////////////////////////////////////////////////////
+# FakeClient
+
+
+@pytest.fixture
+def fake_client():
+    """
+    Run a test against the in-memory fake instead of mocks.
+    """
+    client = FakeClient()
+    with patch("src.adapter.firestore.get_client", return_value=client):
+        yield client
+
+
+async def test_books_lifecycle_against_fake_client(fake_client: FakeClient):
+    created = [
+        await create_book(CreateBook(title=f"Title {i}", author="Author"))
+        for i in range(3)
+    ]
+    ids = sorted(book.id for book in created)
+
+    first = await list_books(limit=2)
+    second = await list_books(limit=2, page_token=first.next_page_token)
+    assert [book.id for book in first.books + second.books] == ids
+    assert first.total == 3
+    assert second.next_page_token is None
+
+    updated = await update_book(ids[0], UpdateBook(title="Updated"))
+    assert updated.title == "Updated"
+    assert (await get_book(ids[0])).title == "Updated"
+
+    await delete_book(ids[0])
+    batch = await batch_get_books(ids)
+    assert batch.missing == [ids[0]]
+    assert fake_client.rpcs["get_all"] == 1
+
+
+async def test_update_book_raises_not_found_against_fake_client(
+    fake_client: FakeClient,
+):
+    with pytest.raises(BookNotFound):
+        await update_book("missing", UpdateBook(title="Updated"))
+
+    assert fake_client.rpcs == {"update": 1}
+
+
+# //////////////////////////////////////////////////////////////////////////////
+# Create batching
+
+
+@pytest.fixture
+async def create_batching():
+    coalescer = books.init_create_batching(window=0.01, max_items=10)
+    yield coalescer
+    await books.close_create_batching()
+
+
+@pytest.mark.parametrize(("window", "max_items"), [(0, 10), (0.01, 1)])
+def test_init_create_batching_is_disabled(window, max_items):
+    assert books.init_create_batching(window, max_items) is None
+    assert books.create_writes is None
+
+
+def test_init_create_batching_caps_batch_size():
+    coalescer = books.init_create_batching(0.01, 10_000)
+    assert coalescer is not None
+    assert coalescer.max_items == book_repository.MAX_BATCH_WRITES
+    books.create_writes = None
+
+
+async def test_concurrent_creates_are_committed_as_one_batch(
+    fake_client: FakeClient, create_batching
+):
+    created = await asyncio.gather(
+        *(create_book(CreateBook(title=f"Title {i}")) for i in range(5))
+    )
+
+    assert fake_client.rpcs == {"commit": 1}
+    assert sorted(fake_client.store["books"]) == sorted(book.id for book in created)
+    assert create_batching.stats()["items"] == 5
+
+
+async def test_creates_of_failed_batch_are_written_one_by_one(
+    fake_client: FakeClient, create_batching
+):
+    fake_client.inject_failure(
+        "commit", firestore.exceptions.ServiceUnavailable("down")
+    )
+    fake_client.inject_failure("set", firestore.exceptions.ServiceUnavailable("down"))
+
+    results = await asyncio.gather(
+        *(create_book(CreateBook(title=f"Title {i}")) for i in range(3)),
+        return_exceptions=True,
+    )
+
+    failed = [result for result in results if isinstance(result, Exception)]
+    created = [result for result in results if isinstance(result, Book)]
+    assert len(failed) == 1
+    assert isinstance(failed[0], firestore.exceptions.ServiceUnavailable)
+    assert sorted(fake_client.store["books"]) == sorted(book.id for book in created)
+    assert fake_client.rpcs == {"commit": 1, "set": 3}
+    assert create_batching.fallbacks == 1
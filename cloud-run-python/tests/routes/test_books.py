@@ -3,11 +3,30 @@ Integration-style tests. The Firestore adapter is mocked at the module function
 level so each test only exercises the HTTP layer in isolation.
 """
 
-from unittest.mock import AsyncMock, patch
+import asyncio
+import json
+from datetime import UTC, datetime
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
-
-from src.modules.books import Book, BookList, BookNotFound
+from httpx import ASGITransport, AsyncClient
+
+from src.adapter import firestore, storage
+from src.adapter.fake_firestore import FakeClient
+from src.adapter.firestore_repository import FirestoreBookRepository
+from src.adapter.instrumentation import FirestoreStats, InstrumentedClient
+from src.adapter.sqlite_repository import SQLiteBookRepository
+from src.modules.books import (
+    Book,
+    BookBatch,
+    BookImport,
+    BookList,
+    BookNotFound,
+    InvalidPageToken,
+)
+from src.runtime import create_runtime
+from src.settings import Settings
+from src.utils import ndjson
 
 # //////////////////////////////////////////////////////////////////////////////
 # security headers expected on every response
@@ -69,6 +88,131 @@ async def test_list_books_returns_all_books(async_client):
     assert body["books"][1]["title"] == "Book Two"
 
 
+async def test_list_books_forwards_pagination_params(async_client):
+    list_books = AsyncMock(
+        return_value=BookList(books=[], total=0, next_page_token="next")
+    )
+    with patch("src.modules.books.list_books", new=list_books):
+        response = await async_client.get(
+            "/v1/books",
+            params={"limit": 10, "page_token": "token", "include_total": "false"},
+        )
+    assert response.status_code == 200
+    assert response.json()["next_page_token"] == "next"
+    list_books.assert_awaited_once_with(
+        limit=10, page_token="token", include_total=False
+    )
+
+
+@pytest.mark.parametrize("limit", [0, 501])
+async def test_list_books_rejects_out_of_range_limit(async_client, limit):
+    response = await async_client.get("/v1/books", params={"limit": limit})
+    assert response.status_code == 400
+
+
+async def test_list_books_returns_400_for_invalid_page_token(async_client):
+    with patch(
+        "src.modules.books.list_books",
+        new=AsyncMock(side_effect=InvalidPageToken("bad")),
+    ):
+        response = await async_client.get("/v1/books", params={"page_token": "bad"})
+    assert response.status_code == 400
+    body = response.json()
+    assert body["code"] == 400
+    assert "bad" in body["message"]
+
+
+async def test_list_books_returns_304_when_page_etag_matches(async_client):
+    books = [
+        Book(
+            id="1", title="A", author="A", update_time=datetime(2024, 1, 1, tzinfo=UTC)
+        ),
+        Book(
+            id="2", title="B", author="B", update_time=datetime(2024, 1, 3, tzinfo=UTC)
+        ),
+    ]
+    with patch(
+        "src.modules.books.list_books",
+        new=AsyncMock(return_value=BookList(books=books, total=2)),
+    ):
+        etag = (await async_client.get("/v1/books")).headers["ETag"]
+        response = await async_client.get("/v1/books", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+
+async def test_list_books_etag_changes_when_a_book_is_removed(async_client):
+    books = [
+        Book(
+            id="1", title="A", author="A", update_time=datetime(2024, 1, 1, tzinfo=UTC)
+        ),
+        Book(
+            id="2", title="B", author="B", update_time=datetime(2024, 1, 1, tzinfo=UTC)
+        ),
+    ]
+    with patch(
+        "src.modules.books.list_books",
+        new=AsyncMock(return_value=BookList(books=books, total=2)),
+    ):
+        before = (await async_client.get("/v1/books")).headers["ETag"]
+    with patch(
+        "src.modules.books.list_books",
+        new=AsyncMock(return_value=BookList(books=books[:1], total=1)),
+    ):
+        after = (await async_client.get("/v1/books")).headers["ETag"]
+    assert before != after
+
+
+async def test_list_books_streams_ndjson_when_requested(async_client):
+    async def stream_books():
+        yield Book(id="1", title="Book One", author="Alice")
+        yield Book(id="2", title="Book Two", author="Bob")
+
+    list_books = AsyncMock()
+    with (
+        patch("src.modules.books.stream_books", new=stream_books),
+        patch("src.modules.books.list_books", new=list_books),
+    ):
+        response = await async_client.get(
+            "/v1/books", headers={"Accept": "application/x-ndjson"}
+        )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = response.text.splitlines()
+    assert [json.loads(line)["id"] for line in lines] == ["1", "2"]
+    list_books.assert_not_awaited()
+
+
+@pytest.mark.parametrize(
+    "accept",
+    [
+        "application/x-ndjson;q=0",
+        "application/json, application/x-ndjson;q=0.5",
+        "*/*",
+    ],
+)
+async def test_list_books_returns_json_unless_ndjson_is_preferred(async_client, accept):
+    with patch(
+        "src.modules.books.list_books",
+        new=AsyncMock(return_value=BookList(books=[], total=0)),
+    ):
+        response = await async_client.get("/v1/books", headers={"Accept": accept})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+
+
+async def test_list_books_rejects_page_params_for_ndjson(async_client):
+    stream_books = MagicMock()
+    with patch("src.modules.books.stream_books", new=stream_books):
+        response = await async_client.get(
+            "/v1/books?limit=10&page_token=abc",
+            headers={"Accept": "application/x-ndjson"},
+        )
+    assert response.status_code == 400
+    assert "limit, page_token" in response.json()["message"]
+    stream_books.assert_not_called()
+
+
 # //////////////////////////////////////////////////////////////////////////////
 # POST /v1/books
 
@@ -99,6 +243,86 @@ async def test_create_book_with_empty_body_uses_defaults(async_client):
     assert response.json()["id"] == "gen-id"
 
 
+async def test_concurrent_creates_are_committed_as_one_batch_when_enabled():
+    app = create_runtime(
+        Settings(FIRESTORE_FAKE_ENABLED=True, BOOK_CREATE_BATCH_WINDOW_MS=50)
+    )
+    async with app.router.lifespan_context(app):
+        fake = firestore.client
+        assert isinstance(fake, FakeClient)
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            responses = await asyncio.gather(
+                *(client.post("/v1/books", json={"title": f"T{i}"}) for i in range(5))
+            )
+        rpcs = dict(fake.rpcs)
+        stored = {data["title"] for data, _ in fake.store["books"].values()}
+    assert [response.status_code for response in responses] == [200] * 5
+    assert rpcs == {"commit": 1}
+    assert stored == {f"T{i}" for i in range(5)}
+
+
+# //////////////////////////////////////////////////////////////////////////////
+# POST /v1/books:import
+
+
+async def test_import_books_streams_request_lines_to_module(async_client):
+    received: list[bytes] = []
+
+    async def import_books(lines):
+        received.extend([line async for line in lines])
+        return BookImport(created=len(received), failures=[])
+
+    with patch("src.modules.books.import_books", new=import_books):
+        response = await async_client.post(
+            "/v1/books:import",
+            content=b'{"title": "A"}\n\n{"title": "B"}\n',
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+    assert response.status_code == 200
+    assert response.json() == {"created": 2, "failures": []}
+    assert received == [b'{"title": "A"}', b'{"title": "B"}']
+
+
+async def test_import_books_rejects_lines_over_maximum_length(async_client):
+    response = await async_client.post(
+        "/v1/books:import",
+        content=b'{"title": "%s"}\n' % (b"A" * ndjson.MAX_LINE_LENGTH),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == 413
+
+
+# //////////////////////////////////////////////////////////////////////////////
+# POST /v1/books:batchGet
+
+
+async def test_batch_get_books_returns_found_and_missing(async_client):
+    batch = BookBatch(
+        books=[Book(id="1", title="Book One", author="Alice")], missing=["2"]
+    )
+    batch_get_books = AsyncMock(return_value=batch)
+    with patch("src.modules.books.batch_get_books", new=batch_get_books):
+        response = await async_client.post(
+            "/v1/books:batchGet", json={"ids": ["1", "2"]}
+        )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["books"][0]["id"] == "1"
+    assert body["missing"] == ["2"]
+    batch_get_books.assert_awaited_once_with(["1", "2"])
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [{"ids": []}, {"ids": ["a/b"]}, {"ids": [""]}, {"ids": ["x"] * 101}, {}],
+)
+async def test_batch_get_books_rejects_invalid_payloads(async_client, payload):
+    response = await async_client.post("/v1/books:batchGet", json=payload)
+    assert response.status_code == 400
+
+
 # //////////////////////////////////////////////////////////////////////////////
 # GET /v1/books/{id}
 
@@ -114,6 +338,28 @@ async def test_get_book_returns_book(async_client):
     assert response.json()["id"] == "abc"
 
 
+async def test_get_book_sends_server_timing(async_client, mock_firestore_client):
+    doc = mock_firestore_client.collection.return_value.document.return_value
+    doc.get = AsyncMock(
+        return_value=MagicMock(
+            id="abc",
+            exists=True,
+            update_time=None,
+            to_dict=MagicMock(return_value={"title": "Found", "author": "Author"}),
+        )
+    )
+
+    instrumented = InstrumentedClient(mock_firestore_client, FirestoreStats())
+    with patch("src.adapter.firestore.get_client", return_value=instrumented):
+        response = await async_client.get("/v1/books/abc")
+
+    assert response.status_code == 200
+    phases = [
+        entry.split(";")[0] for entry in response.headers["Server-Timing"].split(", ")
+    ]
+    assert phases == ["firestore", "model", "endpoint", "serialize", "total"]
+
+
 async def test_get_book_returns_404_when_not_found(async_client):
     with patch(
         "src.modules.books.get_book",
@@ -126,6 +372,65 @@ async def test_get_book_returns_404_when_not_found(async_client):
     assert "missing" in body["message"]
 
 
+async def test_get_book_returns_etag_from_update_time(async_client):
+    book = Book(
+        id="abc",
+        title="Found",
+        author="Author",
+        update_time=datetime(2024, 1, 1, tzinfo=UTC),
+    )
+    with patch("src.modules.books.get_book", new=AsyncMock(return_value=book)):
+        # NOTE: Without content negotiation, the ETag is not weakened.
+        response = await async_client.get(
+            "/v1/books/abc", headers={"Accept-Encoding": "identity"}
+        )
+    assert response.status_code == 200
+    assert response.headers["ETag"].startswith('"')
+    assert "update_time" not in response.json()
+
+
+async def test_get_book_returns_304_when_etag_matches(async_client):
+    book = Book(
+        id="abc",
+        title="Found",
+        author="Author",
+        update_time=datetime(2024, 1, 1, tzinfo=UTC),
+    )
+    with patch("src.modules.books.get_book", new=AsyncMock(return_value=book)):
+        etag = (await async_client.get("/v1/books/abc")).headers["ETag"]
+        response = await async_client.get(
+            "/v1/books/abc", headers={"If-None-Match": etag}
+        )
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+
+
+async def test_get_book_returns_200_when_book_changed(async_client):
+    book = Book(
+        id="abc",
+        title="Found",
+        author="Author",
+        update_time=datetime(2024, 1, 1, tzinfo=UTC),
+    )
+    updated = book.model_copy(update={"update_time": datetime(2024, 1, 2, tzinfo=UTC)})
+    with patch("src.modules.books.get_book", new=AsyncMock(return_value=book)):
+        etag = (await async_client.get("/v1/books/abc")).headers["ETag"]
+    with patch("src.modules.books.get_book", new=AsyncMock(return_value=updated)):
+        response = await async_client.get(
+            "/v1/books/abc", headers={"If-None-Match": etag}
+        )
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+async def test_get_book_omits_etag_without_update_time(async_client):
+    book = Book(id="abc", title="Found", author="Author")
+    with patch("src.modules.books.get_book", new=AsyncMock(return_value=book)):
+        response = await async_client.get("/v1/books/abc")
+    assert "etag" not in response.headers
+
+
 # //////////////////////////////////////////////////////////////////////////////
 # PATCH /v1/books/{id}
 
@@ -166,6 +471,136 @@ async def test_delete_book_returns_200(async_client):
     assert response.status_code == 200
 
 
+# //////////////////////////////////////////////////////////////////////////////
+# Caching headers
+
+
+async def test_book_routes_are_not_cached_in_development(async_client):
+    with patch(
+        "src.modules.books.list_books",
+        new=AsyncMock(return_value=BookList(books=[], total=0)),
+    ):
+        response = await async_client.get("/v1/books")
+    assert response.headers["Cache-Control"] == "no-cache, no-store, must-revalidate"
+    assert "Accept" in response.headers["Vary"]
+
+
+async def test_book_routes_are_cacheable_in_production():
+    app = create_runtime(Settings(PYTHON_ENV="production"))
+    book = Book(id="abc", title="Found", author="Author")
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        with patch("src.modules.books.get_book", new=AsyncMock(return_value=book)):
+            response = await client.get("/v1/books/abc")
+        health = await client.get("/")
+    assert (
+        response.headers["Cache-Control"]
+        == "public, max-age=300, s-maxage=600, stale-while-revalidate=60"
+    )
+    assert "cache-control" not in health.headers
+
+
+async def test_cache_policies_follow_the_api_prefix():
+    app = create_runtime(Settings(PYTHON_ENV="production", API_V1_PREFIX="/v2"))
+    with patch(
+        "src.modules.books.list_books",
+        new=AsyncMock(return_value=BookList(books=[], total=0)),
+    ):
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            response = await client.get("/v2/books")
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"].startswith("public, max-age=300")
+
+
+# //////////////////////////////////////////////////////////////////////////////
+# Storage backends
+
+
+async def test_books_are_stored_in_fake_firestore_when_enabled():
+    app = create_runtime(Settings(FIRESTORE_FAKE_ENABLED=True))
+    async with app.router.lifespan_context(app):
+        assert isinstance(firestore.client, FakeClient)
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            created = await client.post("/v1/books", json={"title": "Fake"})
+            response = await client.get(f"/v1/books/{created.json()['id']}")
+    assert response.status_code == 200
+    assert response.json()["title"] == "Fake"
+    assert firestore.client is None
+
+
+async def test_list_page_with_next_page_records_firestore_stream():
+    app = create_runtime(Settings(FIRESTORE_FAKE_ENABLED=True))
+    async with app.router.lifespan_context(app):
+        fake = firestore.client
+        assert isinstance(fake, FakeClient)
+        for i in range(10):
+            fake.add("books", f"book-{i}", {"title": f"Title {i}"})
+        streams = firestore.stats.snapshot().get("stream", {}).get("calls", 0)
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            response = await client.get("/v1/books?limit=5")
+        recorded = firestore.stats.snapshot()["stream"]["calls"] - streams
+    assert response.json()["next_page_token"] is not None
+    phases = [
+        entry.split(";")[0] for entry in response.headers["Server-Timing"].split(", ")
+    ]
+    assert "firestore" in phases
+    assert recorded == 1
+
+
+async def test_books_are_stored_in_sqlite_when_selected(tmp_path):
+    app = create_runtime(
+        Settings(BOOK_STORAGE="sqlite", SQLITE_PATH=str(tmp_path / "books.db"))
+    )
+    async with app.router.lifespan_context(app):
+        assert isinstance(storage.get_repository(), SQLiteBookRepository)
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            created = await client.post("/v1/books", json={"title": "Local"})
+            book_id = created.json()["id"]
+            updated = await client.patch(
+                f"/v1/books/{book_id}", json={"author": "Author"}
+            )
+            listed = await client.get("/v1/books")
+    assert updated.json() == {"id": book_id, "title": "Local", "author": "Author"}
+    assert listed.json()["total"] == 1
+    assert isinstance(storage.get_repository(), FirestoreBookRepository)
+
+
+# //////////////////////////////////////////////////////////////////////////////
+# GET /debug/stats
+
+
+async def test_debug_stats_is_disabled_by_default(async_client):
+    response = await async_client.get("/debug/stats")
+    assert response.status_code == 404
+
+
+async def test_debug_stats_returns_firestore_and_cache_stats():
+    app = create_runtime(Settings(DEBUG_STATS_ENABLED=True))
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        with patch(
+            "src.adapter.firestore.stats.snapshot",
+            return_value={"get": {"calls": 1}},
+        ):
+            response = await client.get("/debug/stats")
+    assert response.status_code == 200
+    assert response.json() == {
+        "firestore": {"get": {"calls": 1}},
+        "book_cache": None,
+        "create_batching": None,
+    }
+
+
 # //////////////////////////////////////////////////////////////////////////////
 # Security: docs endpoints disabled
 
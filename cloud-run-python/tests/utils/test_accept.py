@@ -0,0 +1,28 @@
+import pytest
+
+from src.utils.accept import select_media_type
+
+JSON = "application/json"
+NDJSON = "application/x-ndjson"
+
+
+@pytest.mark.parametrize(
+    ("header", "expected"),
+    [
+        (NDJSON, NDJSON),
+        (JSON, JSON),
+        ("*/*", JSON),
+        ("application/*", JSON),
+        (f"{NDJSON}, {JSON}", JSON),
+        (f"{NDJSON}, */*;q=0.1", NDJSON),
+        (f"{JSON};q=0.5, {NDJSON}", NDJSON),
+        (f"{NDJSON};q=0", None),
+        (f"{NDJSON};q=0, */*", JSON),
+        (f"{NDJSON}; charset=utf-8; q=0.8", NDJSON),
+        (f"{NDJSON};q=abc", None),
+        ("text/html", None),
+        ("", None),
+    ],
+)
+def test_select_media_type(header, expected):
+    assert select_media_type(header, [JSON, NDJSON]) == expected
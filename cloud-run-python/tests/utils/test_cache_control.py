@@ -0,0 +1,139 @@
+import pytest
+from httpx import ASGITransport, AsyncClient
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, Response
+from starlette.routing import Route
+
+from src.utils.cache_control import (
+    NO_CACHE,
+    CacheControlMiddleware,
+    CachePolicy,
+)
+
+# //////////////////////////////////////////////////////////////////////////////
+# Test app
+
+POLICIES = {
+    "/books": CachePolicy(max_age=300, s_maxage=600, stale_while_revalidate=60),
+    "/books/{book_id}": CachePolicy(max_age=60, private=True),
+}
+
+
+def make_test_app(disabled: bool = False) -> CacheControlMiddleware:
+    """
+    Wrap a minimal Starlette app with CacheControlMiddleware for isolated
+    tests. FastAPI uses Starlette under the hood.
+    """
+
+    async def books(_: Request) -> PlainTextResponse:
+        return PlainTextResponse("books")
+
+    async def book(request: Request) -> Response:
+        if request.path_params["book_id"] == "missing":
+            return PlainTextResponse("not found", status_code=404)
+        if request.path_params["book_id"] == "unchanged":
+            return Response(status_code=304)
+        if request.path_params["book_id"] == "explicit":
+            return PlainTextResponse("ok", headers={"Cache-Control": "no-cache"})
+        return PlainTextResponse("book")
+
+    async def other(_: Request) -> PlainTextResponse:
+        return PlainTextResponse("other")
+
+    base = Starlette(
+        routes=[
+            Route("/books", books, methods=["GET", "POST"]),
+            Route("/books/{book_id}", book),
+            Route("/other", other),
+        ]
+    )
+    return CacheControlMiddleware(base, policies=POLICIES, disabled=disabled)
+
+
+@pytest.fixture
+async def client():
+    async with AsyncClient(
+        transport=ASGITransport(app=make_test_app()), base_url="http://test"
+    ) as c:
+        yield c
+
+
+# //////////////////////////////////////////////////////////////////////////////
+# CachePolicy.header_value
+
+
+@pytest.mark.parametrize(
+    "policy,expected",
+    [
+        (CachePolicy(), "public"),
+        (
+            CachePolicy(max_age=300, s_maxage=600, stale_while_revalidate=60),
+            "public, max-age=300, s-maxage=600, stale-while-revalidate=60",
+        ),
+        (CachePolicy(max_age=60, s_maxage=600, private=True), "private, max-age=60"),
+        (CachePolicy(max_age=60, no_store=True), "no-store"),
+    ],
+)
+def test_header_value_renders_directives(policy, expected):
+    assert policy.header_value() == expected
+
+
+# //////////////////////////////////////////////////////////////////////////////
+# CacheControlMiddleware
+
+
+async def test_policy_is_applied_by_route_template(client):
+    response = await client.get("/books")
+    assert (
+        response.headers["Cache-Control"]
+        == "public, max-age=300, s-maxage=600, stale-while-revalidate=60"
+    )
+    response = await client.get("/books/abc")
+    assert response.headers["Cache-Control"] == "private, max-age=60"
+
+
+async def test_policy_is_applied_to_304_responses(client):
+    response = await client.get("/books/unchanged")
+    assert response.status_code == 304
+    assert response.headers["Cache-Control"] == "private, max-age=60"
+
+
+async def test_uncacheable_status_codes_are_left_untouched(client):
+    response = await client.get("/books/missing")
+    assert "cache-control" not in response.headers
+
+
+async def test_routes_without_policy_are_left_untouched(client):
+    response = await client.get("/other")
+    assert "cache-control" not in response.headers
+
+
+async def test_non_get_requests_are_left_untouched(client):
+    response = await client.post("/books")
+    assert "cache-control" not in response.headers
+
+
+async def test_existing_cache_control_header_is_preserved(client):
+    response = await client.get("/books/explicit")
+    assert response.headers["Cache-Control"] == "no-cache"
+
+
+async def test_disabled_middleware_sends_no_cache_for_matched_routes():
+    async with AsyncClient(
+        transport=ASGITransport(app=make_test_app(disabled=True)),
+        base_url="http://test",
+    ) as c:
+        response = await c.get("/books")
+    assert response.headers["Cache-Control"] == NO_CACHE
+
+
+async def test_non_http_scope_is_forwarded_unmodified():
+    received_scopes: list[str] = []
+
+    async def fake_app(scope, _receive, _send):
+        received_scopes.append(scope["type"])
+
+    mw = CacheControlMiddleware(fake_app, policies=POLICIES)
+    await mw({"type": "lifespan"}, object(), object())  # type: ignore[arg-type]
+    assert received_scopes == ["lifespan"]
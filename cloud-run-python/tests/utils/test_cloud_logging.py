@@ -1,11 +1,19 @@
+import asyncio
+import io
+import json
 import logging
-from unittest.mock import MagicMock
+import logging.handlers
+import threading
+import time
+from queue import Queue
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 
 from src.utils.cloud_logging import (
     CloudLoggingFormatter,
     CloudLoggingMiddleware,
+    CloudLoggingQueueHandler,
     trace_context,
 )
 
@@ -62,6 +70,42 @@ def test_format_maps_log_level_to_cloud_severity(level, expected_severity):
     assert parsed["severity"] == expected_severity
 
 
+@pytest.mark.parametrize(
+    "message,ctx,labels",
+    [
+        ("hello", None, None),
+        ('quotes " and \\ and\nnewlines', None, None),
+        ("unicode ✓ ünïcödé", None, {"name": "ünïcödé", "n": 1}),
+        (
+            "traced",
+            {"trace_id": "abc123", "span_id": "span456", "trace_sampled": True},
+            {"env": "test"},
+        ),
+        ("partial", {"trace_id": None, "span_id": None, "trace_sampled": False}, None),
+    ],
+)
+def test_format_matches_json_dumps_of_parse_record(message, ctx, labels):
+    formatter = CloudLoggingFormatter(project="my-project")
+    record = make_record(message, logging.WARNING)
+    if labels is not None:
+        record.labels = labels  # type: ignore[attr-defined]
+    token = trace_context.set(ctx)
+    try:
+        output = formatter.format(record)
+        expected = json.dumps(formatter.parse_record(record))
+    finally:
+        trace_context.reset(token)
+
+    assert output == expected
+
+
+def test_format_sets_record_message():
+    formatter = CloudLoggingFormatter()
+    record = logging.LogRecord("app", logging.INFO, "", 0, "a %s", ("b",), None)
+    formatter.format(record)
+    assert record.message == "a b"
+
+
 def test_parse_record_includes_trace_when_project_set():
     formatter = CloudLoggingFormatter(project="my-project")
     ctx = {"trace_id": "abc123", "span_id": "span456", "trace_sampled": True}
@@ -116,6 +160,132 @@ def test_parse_record_without_trace_context():
     assert "logging.googleapis.com/spanId" not in result
 
 
+def test_parse_record_prefers_trace_context_captured_on_record():
+    formatter = CloudLoggingFormatter(project="proj")
+    record = make_record("msg")
+    record.trace_context = {"trace_id": "captured"}  # type: ignore[attr-defined]
+    token = trace_context.set({"trace_id": "current"})
+    try:
+        result = formatter.parse_record(record)
+    finally:
+        trace_context.reset(token)
+
+    assert result["logging.googleapis.com/trace"] == "projects/proj/traces/captured"
+
+
+# //////////////////////////////////////////////////////////////////////////////
+# CloudLoggingQueueHandler
+
+
+@pytest.fixture
+def log_stream():
+    return io.StringIO()
+
+
+@pytest.fixture
+def queue_handler(log_stream):
+    target = logging.StreamHandler(log_stream)
+    target.setFormatter(CloudLoggingFormatter(project="proj"))
+    handler = CloudLoggingQueueHandler(Queue(maxsize=10))
+    handler.listener = logging.handlers.QueueListener(handler.queue, target)
+    yield handler
+    handler.stop()
+
+
+def read_logs(stream: io.StringIO) -> list[dict]:
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_queue_handler_captures_trace_context_at_emit_time(queue_handler, log_stream):
+    queue_handler.start()
+    token = trace_context.set({"trace_id": "abc123", "span_id": "span456"})
+    try:
+        queue_handler.handle(make_record("in request"))
+    finally:
+        trace_context.reset(token)
+    queue_handler.stop()
+
+    (log,) = read_logs(log_stream)
+    assert log["message"] == "in request"
+    assert log["logging.googleapis.com/trace"] == "projects/proj/traces/abc123"
+    assert log["logging.googleapis.com/spanId"] == "span456"
+
+
+def test_queue_handler_keeps_message_and_labels(queue_handler, log_stream):
+    queue_handler.start()
+    record = logging.LogRecord("app", logging.ERROR, "", 0, "failed %s", ("x",), None)
+    record.labels = {"env": "test"}  # type: ignore[attr-defined]
+    queue_handler.handle(record)
+    queue_handler.stop()
+
+    (log,) = read_logs(log_stream)
+    assert log["message"] == "failed x"
+    assert log["severity"] == "ERROR"
+    assert json.loads(log["logging.googleapis.com/labels"]) == {"env": "test"}
+
+
+def test_queue_handler_handles_records_synchronously_until_started(
+    queue_handler, log_stream
+):
+    queue_handler.handle(make_record("startup"))
+
+    assert read_logs(log_stream)[0]["message"] == "startup"
+    assert queue_handler.queue.empty()
+
+
+def test_queue_handler_flushes_queued_records_on_stop(queue_handler, log_stream):
+    queue_handler.start()
+    for i in range(5):
+        queue_handler.handle(make_record(f"msg {i}"))
+    queue_handler.stop()
+
+    assert [log["message"] for log in read_logs(log_stream)] == [
+        f"msg {i}" for i in range(5)
+    ]
+
+
+def test_queue_handler_counts_dropped_records_when_full():
+    handler = CloudLoggingQueueHandler(Queue(maxsize=1))
+    handler.running = True
+
+    handler.handle(make_record("kept"))
+    handler.handle(make_record("dropped"))
+
+    assert handler.dropped == 1
+    assert handler.queue.get_nowait().getMessage() == "kept"
+
+
+def test_queue_handler_stops_when_queue_is_full(log_stream, caplog):
+    release = threading.Event()
+
+    class BlockingHandler(logging.StreamHandler):
+        def handle(self, record):
+            release.wait()
+            return super().handle(record)
+
+    target = BlockingHandler(log_stream)
+    target.setFormatter(CloudLoggingFormatter(project="proj"))
+    handler = CloudLoggingQueueHandler(Queue(maxsize=3))
+    handler.listener = logging.handlers.QueueListener(handler.queue, target)
+    handler.start()
+    # NOTE: The listener takes the first record and blocks, the next three fill
+    # the queue and the last one is dropped.
+    for i in range(5):
+        handler.handle(make_record(f"msg {i}"))
+        time.sleep(0.01)
+    assert handler.queue.full()
+
+    threading.Timer(0.05, release.set).start()
+    with caplog.at_level(logging.WARNING, logger="app"):
+        handler.stop(timeout=0.01)
+
+    assert not handler.running
+    assert handler.listener._thread is None  # type: ignore[attr-defined]
+    assert handler.dropped == 0
+    assert "Dropped 2 log records" in caplog.text
+    assert read_logs(log_stream)[0]["message"] == "msg 0"
+
+
 # //////////////////////////////////////////////////////////////////////////////
 # CloudLoggingMiddleware.parse_trace_parent
 
@@ -160,6 +330,40 @@ def test_parse_trace_parent_returns_nones_for_all_zeros_trace(middleware):
     assert trace_id is None
 
 
+@pytest.mark.parametrize(
+    "header",
+    [
+        # Version ff is forbidden
+        "ff-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01",
+        # All-zero parent id
+        "00-0af7651916cd43dd8448eb211c80319c-0000000000000000-01",
+        # Upper case hex digits
+        "00-0AF7651916CD43DD8448EB211C80319C-b7ad6b7169203331-01",
+        # Misplaced separator
+        "00-0af7651916cd43dd8448eb211c8031-9c-b7ad6b7169203331-01",
+        # Non-hex flags
+        "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-zz",
+    ],
+)
+def test_parse_trace_parent_rejects_invalid_fixed_width_headers(middleware, header):
+    assert middleware.parse_trace_parent(header) == (None, None, False)
+
+
+@pytest.mark.parametrize(
+    "header",
+    [
+        " 00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01",
+        "01-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01-future",
+    ],
+)
+def test_parse_trace_parent_accepts_variable_width_headers(middleware, header):
+    assert middleware.parse_trace_parent(header) == (
+        "0af7651916cd43dd8448eb211c80319c",
+        "b7ad6b7169203331",
+        True,
+    )
+
+
 # //////////////////////////////////////////////////////////////////////////////
 # CloudLoggingMiddleware.parse_xcloud_trace
 
@@ -199,43 +403,97 @@ def test_parse_xcloud_trace_span_id_non_numeric_is_excluded(middleware):
 
 
 # //////////////////////////////////////////////////////////////////////////////
-# CloudLoggingMiddleware.dispatch
+# CloudLoggingMiddleware.__call__
 
 
-async def test_dispatch_sets_trace_context_from_traceparent():
-    """Middleware propagates W3C traceparent to the trace_context ContextVar."""
+def make_scope(headers: dict[str, str], scope_type: str = "http") -> dict:
+    return {
+        "type": scope_type,
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+    }
+
+
+async def run_middleware(scope: dict) -> dict:
     captured: dict = {}
 
     async def fake_app(_scope, _receive, _send):
         captured.update(trace_context.get() or {})
 
     mw = CloudLoggingMiddleware(app=fake_app)
+    await mw(scope, AsyncMock(), AsyncMock())
+    return captured
 
-    from unittest.mock import AsyncMock, MagicMock
 
-    request = MagicMock()
-    request.headers.get = lambda key: (
-        "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
-        if key == "Traceparent"
-        else None
+async def test_call_sets_trace_context_from_traceparent():
+    """Middleware propagates W3C traceparent to the trace_context ContextVar."""
+    captured = await run_middleware(
+        make_scope(
+            {"Traceparent": "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"}
+        )
     )
 
-    call_next = AsyncMock(return_value=MagicMock())
-    await mw.dispatch(request, call_next)
-    call_next.assert_awaited_once()
+    assert captured == {
+        "trace_id": "0af7651916cd43dd8448eb211c80319c",
+        "span_id": "b7ad6b7169203331",
+        "trace_sampled": True,
+    }
 
 
-async def test_dispatch_falls_back_to_xcloud_trace_context():
-    mw = CloudLoggingMiddleware(app=MagicMock())
-    request = MagicMock()
-    request.headers.get = lambda key: (
-        "105445aa7843bc8bf206b12000100000/1;o=1"
-        if key == "X-Cloud-Trace-Context"
-        else None
+async def test_call_falls_back_to_xcloud_trace_context():
+    captured = await run_middleware(
+        make_scope({"X-Cloud-Trace-Context": "105445aa7843bc8bf206b12000100000/1;o=1"})
     )
 
-    from unittest.mock import AsyncMock
+    assert captured == {
+        "trace_id": "105445aa7843bc8bf206b12000100000",
+        "span_id": "0000000000000001",
+        "trace_sampled": True,
+    }
+
+
+async def test_call_sets_empty_trace_context_without_headers():
+    captured = await run_middleware(make_scope({}))
+
+    assert captured == {"trace_id": None, "span_id": None, "trace_sampled": False}
+
+
+async def test_call_resets_trace_context_after_request():
+    await run_middleware(
+        make_scope(
+            {"Traceparent": "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"}
+        )
+    )
+
+    assert trace_context.get() is None
+
+
+async def test_call_keeps_trace_context_for_unhandled_exceptions():
+    async def failing_app(_scope, _receive, _send):
+        raise RuntimeError("boom")
+
+    mw = CloudLoggingMiddleware(app=failing_app)
+    scope = make_scope(
+        {"Traceparent": "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"}
+    )
+
+    async def run() -> dict | None:
+        with pytest.raises(RuntimeError):
+            await mw(scope, AsyncMock(), AsyncMock())
+        return trace_context.get()
+
+    # NOTE: Run in a separate task so the context does not leak into the test.
+    ctx = await asyncio.create_task(run())
+
+    assert ctx is not None
+    assert ctx["trace_id"] == "0af7651916cd43dd8448eb211c80319c"
+
+
+async def test_call_passes_through_non_http_scopes():
+    captured = await run_middleware(
+        make_scope(
+            {"Traceparent": "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"},
+            scope_type="lifespan",
+        )
+    )
 
-    call_next = AsyncMock(return_value=MagicMock())
-    await mw.dispatch(request, call_next)
-    call_next.assert_awaited_once()
+    assert captured == {}
@@ -0,0 +1,209 @@
+import gzip
+import zlib
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from src.utils.compression import CompressionMiddleware, select_encoding
+
+# //////////////////////////////////////////////////////////////////////////////
+# Test app
+
+LARGE_BODY = "book " * 500
+
+
+def make_test_app(minimum_size: int = 500) -> CompressionMiddleware:
+    """
+    Wrap a minimal Starlette app with CompressionMiddleware for isolated
+    tests. FastAPI uses Starlette under the hood.
+    """
+
+    async def large(_: Request) -> PlainTextResponse:
+        return PlainTextResponse(LARGE_BODY, headers={"ETag": '"abc"'})
+
+    async def small(_: Request) -> PlainTextResponse:
+        return PlainTextResponse("ok", headers={"ETag": '"abc"'})
+
+    async def stream(_: Request) -> StreamingResponse:
+        async def lines():
+            for i in range(100):
+                yield f"line {i}\n".encode()
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    async def not_modified(_: Request) -> Response:
+        return Response(status_code=304, headers={"ETag": '"abc"'})
+
+    async def encoded(_: Request) -> Response:
+        return Response(
+            gzip.compress(LARGE_BODY.encode()), headers={"Content-Encoding": "gzip"}
+        )
+
+    base = Starlette(
+        routes=[
+            Route("/large", large),
+            Route("/small", small),
+            Route("/stream", stream),
+            Route("/not-modified", not_modified),
+            Route("/encoded", encoded),
+        ]
+    )
+    return CompressionMiddleware(
+        base, levels={"zstd": 3, "br": 4, "gzip": 6}, minimum_size=minimum_size
+    )
+
+
+@pytest.fixture
+async def client():
+    async with AsyncClient(
+        transport=ASGITransport(app=make_test_app()), base_url="http://test"
+    ) as c:
+        yield c
+
+
+GZIP = {"Accept-Encoding": "gzip"}
+
+
+# //////////////////////////////////////////////////////////////////////////////
+# select_encoding
+
+
+@pytest.mark.parametrize(
+    "header,expected",
+    [
+        ("gzip", "gzip"),
+        ("gzip, br", "br"),
+        ("gzip;q=1.0, br;q=0.5", "gzip"),
+        ("br, zstd, gzip", "zstd"),
+        ("*", "zstd"),
+        ("*, zstd;q=0", "br"),
+        ("identity", None),
+        ("gzip;q=0", None),
+        ("gzip;q=abc", None),
+        ("", None),
+    ],
+)
+def test_select_encoding(header, expected):
+    assert select_encoding(header, ["zstd", "br", "gzip"]) == expected
+
+
+# //////////////////////////////////////////////////////////////////////////////
+# CompressionMiddleware
+
+
+async def test_large_body_is_compressed(client):
+    response = await client.get("/large", headers=GZIP)
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert int(response.headers["Content-Length"]) < len(LARGE_BODY)
+    # NOTE: httpx transparently decodes the body.
+    assert response.text == LARGE_BODY
+
+
+async def test_compressed_body_weakens_etag(client):
+    response = await client.get("/large", headers=GZIP)
+    assert response.headers["ETag"] == 'W/"abc"'
+
+
+async def test_small_body_is_not_compressed(client):
+    response = await client.get("/small", headers=GZIP)
+    assert "content-encoding" not in response.headers
+    assert response.text == "ok"
+    # NOTE: Marked like a compressed body, so a 304 for it can match.
+    assert response.headers["ETag"] == 'W/"abc"'
+    assert "Accept-Encoding" in response.headers["Vary"]
+
+
+async def test_body_is_not_compressed_without_accept_encoding(client):
+    response = await client.get("/large", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert response.headers["ETag"] == '"abc"'
+
+
+async def test_streaming_body_is_compressed_without_content_length(client):
+    response = await client.get("/stream", headers=GZIP)
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert response.text.splitlines()[-1] == "line 99"
+
+
+async def test_short_streaming_body_below_minimum_size_is_not_compressed():
+    app = make_test_app(minimum_size=100_000)
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as c:
+        response = await c.get("/stream", headers=GZIP)
+    assert "content-encoding" not in response.headers
+    assert len(response.text.splitlines()) == 100
+
+
+async def test_not_modified_response_carries_validator_of_compressed_body(client):
+    compressed = await client.get("/large", headers=GZIP)
+    response = await client.get("/not-modified", headers=GZIP)
+    assert response.status_code == 304
+    assert "content-encoding" not in response.headers
+    assert response.headers["ETag"] == compressed.headers["ETag"]
+    assert response.headers["Vary"] == compressed.headers["Vary"]
+
+
+async def test_not_modified_response_without_negotiation_is_left_untouched(client):
+    response = await client.get(
+        "/not-modified", headers={"Accept-Encoding": "identity"}
+    )
+    assert response.status_code == 304
+    assert response.headers["ETag"] == '"abc"'
+    assert "vary" not in response.headers
+
+
+async def test_already_encoded_response_is_left_untouched(client):
+    response = await client.get("/encoded", headers=GZIP)
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.text == LARGE_BODY
+
+
+async def test_streamed_chunks_are_flushed_individually():
+    """
+    Every compressed chunk must be decodable on its own, so streaming clients
+    are not stalled until the response ends.
+    """
+    sent: list[dict] = []
+
+    async def fake_app(_scope, _receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send(
+            {"type": "http.response.body", "body": b"a" * 600, "more_body": True}
+        )
+        await send(
+            {"type": "http.response.body", "body": b"b" * 10, "more_body": False}
+        )
+
+    async def send(message):
+        sent.append(message)
+
+    mw = CompressionMiddleware(fake_app, levels={"gzip": 6})
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "headers": [(b"accept-encoding", b"gzip")],
+    }
+    await mw(scope, None, send)  # type: ignore[arg-type]
+
+    decoder = zlib.decompressobj(31)
+    assert decoder.decompress(sent[1]["body"]) == b"a" * 600
+    assert decoder.decompress(sent[2]["body"]) == b"b" * 10
+    assert decoder.eof
+
+
+async def test_non_http_scope_is_forwarded_unmodified():
+    received_scopes: list[str] = []
+
+    async def fake_app(scope, _receive, _send):
+        received_scopes.append(scope["type"])
+
+    mw = CompressionMiddleware(fake_app, levels={"gzip": 6})
+    await mw({"type": "lifespan"}, object(), object())  # type: ignore[arg-type]
+    assert received_scopes == ["lifespan"]
@@ -0,0 +1,34 @@
+import pytest
+
+from src.utils.etag import etag_matches, make_etag
+
+# //////////////////////////////////////////////////////////////////////////////
+# make_etag
+
+
+def test_make_etag_is_quoted_and_deterministic():
+    etag = make_etag("abc", "2024-01-01T00:00:00+00:00")
+    assert etag.startswith('"') and etag.endswith('"')
+    assert etag == make_etag("abc", "2024-01-01T00:00:00+00:00")
+
+
+def test_make_etag_changes_with_any_part():
+    assert make_etag("abc", 1) != make_etag("abc", 2)
+    assert make_etag("ab", "c") != make_etag("a", "bc")
+
+
+# //////////////////////////////////////////////////////////////////////////////
+# etag_matches
+
+
+@pytest.mark.parametrize(
+    "header",
+    ['"x"', '"a", "x"', 'W/"x"', "*", ' "b" ,"x" '],
+)
+def test_etag_matches_accepts_matching_headers(header):
+    assert etag_matches(header, '"x"') is True
+
+
+@pytest.mark.parametrize("header", [None, "", '"y"', "x", '"a", "b"'])
+def test_etag_matches_rejects_other_headers(header):
+    assert etag_matches(header, '"x"') is False
@@ -1,15 +1,18 @@
 import json
 import logging
 
+import pytest
 from fastapi import HTTPException
 from fastapi.exceptions import RequestValidationError
 from pydantic import BaseModel, ValidationError
 from starlette.requests import Request
 
 from src.utils.exception_handlers import (
+    close_log_sampler,
     handle_general_exception,
     handle_http_exception,
     handle_validation_exception,
+    init_log_sampler,
 )
 
 # //////////////////////////////////////////////////////////////////////////////
@@ -177,3 +180,61 @@ async def test_handle_general_exception_logs_the_original_error(caplog):
     with caplog.at_level(logging.ERROR, logger="app"):
         await handle_general_exception(make_request(), exc)
     assert any(r.levelno == logging.ERROR for r in caplog.records)
+
+
+# //////////////////////////////////////////////////////////////////////////////
+# log sampling
+
+
+@pytest.fixture
+def log_sampler():
+    sampler = init_log_sampler(limit=2, window=60)
+    yield sampler
+    close_log_sampler()
+
+
+async def test_handlers_log_every_error_without_sampler(caplog):
+    with caplog.at_level(logging.ERROR, logger="app"):
+        for _ in range(5):
+            await handle_general_exception(make_request(), ValueError("broke"))
+    assert len(caplog.records) == 5
+
+
+async def test_handlers_sample_repeated_errors(log_sampler, caplog):
+    exc = HTTPException(status_code=500, detail="Boom")
+    with caplog.at_level(logging.ERROR, logger="app"):
+        for _ in range(5):
+            response = await handle_http_exception(make_request(), exc)
+            assert response.status_code == 500
+
+    assert len(caplog.records) == 2
+    assert log_sampler.suppressed == 3
+
+
+@pytest.mark.usefixtures("log_sampler")
+async def test_handlers_sample_by_path_and_error_type(caplog):
+    with caplog.at_level(logging.ERROR, logger="app"):
+        for path, exc in [
+            ("/a", ValueError("x")),
+            ("/a", ValueError("x")),
+            ("/a", ValueError("x")),
+            ("/b", ValueError("x")),
+            ("/a", KeyError("x")),
+        ]:
+            await handle_general_exception(make_request(path), exc)
+
+    assert len(caplog.records) == 4
+
+
+@pytest.mark.usefixtures("log_sampler")
+async def test_close_log_sampler_reports_suppressed_errors(caplog):
+    exc = make_validation_exc({"loc": ("body", "title"), "type": "missing"})
+    with caplog.at_level(logging.ERROR, logger="app"):
+        for _ in range(3):
+            await handle_validation_exception(make_request("/v1/books"), exc)
+        close_log_sampler()
+
+    assert caplog.records[-1].getMessage() == (
+        "Suppressed 1 similar log records for validation /v1/books missing "
+        "within 60 seconds"
+    )
@@ -0,0 +1,173 @@
+import asyncio
+import logging
+
+import pytest
+
+from src.utils.cloud_logging import trace_context
+from src.utils.log_sampler import LogSampler
+
+# //////////////////////////////////////////////////////////////////////////////
+# Helpers
+
+
+class FakeTimer:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def timer() -> FakeTimer:
+    return FakeTimer()
+
+
+@pytest.fixture
+def sampler(timer: FakeTimer) -> LogSampler:
+    return LogSampler(logging.getLogger("app"), limit=2, window=60, timer=timer)
+
+
+def messages(caplog) -> list[str]:
+    return [r.getMessage() for r in caplog.records]
+
+
+# //////////////////////////////////////////////////////////////////////////////
+# LogSampler
+
+
+def test_log_emits_first_records_of_window(sampler, caplog):
+    with caplog.at_level(logging.ERROR, logger="app"):
+        for i in range(5):
+            sampler.log(("http", "/v1/books", "500"), logging.ERROR, "error %d", i)
+
+    assert messages(caplog) == ["error 0", "error 1"]
+    assert sampler.suppressed == 3
+
+
+def test_log_samples_keys_independently(sampler, caplog):
+    with caplog.at_level(logging.ERROR, logger="app"):
+        for key in [("a",), ("a",), ("a",), ("b",)]:
+            sampler.log(key, logging.ERROR, "error %s", key[0])
+
+    assert messages(caplog) == ["error a", "error a", "error b"]
+
+
+def test_log_summarizes_suppressed_records_in_next_window(sampler, timer, caplog):
+    with caplog.at_level(logging.ERROR, logger="app"):
+        for _ in range(5):
+            sampler.log(("http", "/v1/books", "500"), logging.ERROR, "error")
+        timer.now = 61
+        sampler.log(("http", "/v1/books", "500"), logging.ERROR, "error")
+
+    assert messages(caplog) == [
+        "error",
+        "error",
+        "Suppressed 3 similar log records for http /v1/books 500 within 60 seconds",
+        "error",
+    ]
+    assert caplog.records[2].levelno == logging.ERROR
+
+
+def test_log_summarizes_expired_windows_of_other_keys(sampler, timer, caplog):
+    with caplog.at_level(logging.ERROR, logger="app"):
+        for _ in range(3):
+            sampler.log(("a",), logging.ERROR, "error")
+        timer.now = 61
+        sampler.log(("b",), logging.ERROR, "other")
+
+    assert messages(caplog)[2:] == [
+        "Suppressed 1 similar log records for a within 60 seconds",
+        "other",
+    ]
+
+
+def test_log_evicts_oldest_key_when_full(timer, caplog):
+    sampler = LogSampler(
+        logging.getLogger("app"), limit=1, window=60, max_keys=2, timer=timer
+    )
+    with caplog.at_level(logging.ERROR, logger="app"):
+        sampler.log(("a",), logging.ERROR, "a")
+        sampler.log(("a",), logging.ERROR, "a")
+        sampler.log(("b",), logging.ERROR, "b")
+        sampler.log(("c",), logging.ERROR, "c")
+
+    assert messages(caplog) == [
+        "a",
+        "b",
+        "Suppressed 1 similar log records for a within 60 seconds",
+        "c",
+    ]
+
+
+def test_flush_reports_open_windows(sampler, caplog):
+    with caplog.at_level(logging.ERROR, logger="app"):
+        for _ in range(4):
+            sampler.log(("a",), logging.ERROR, "error")
+        sampler.flush()
+        sampler.flush()
+
+    assert messages(caplog)[2:] == [
+        "Suppressed 2 similar log records for a within 60 seconds"
+    ]
+
+
+def test_flush_without_suppressed_records_logs_nothing(sampler, caplog):
+    with caplog.at_level(logging.ERROR, logger="app"):
+        sampler.log(("a",), logging.ERROR, "error")
+        sampler.flush()
+
+    assert messages(caplog) == ["error"]
+
+
+async def test_log_summarizes_window_at_its_end_without_further_records(caplog):
+    sampler = LogSampler(logging.getLogger("app"), limit=1, window=0.05)
+    with caplog.at_level(logging.ERROR, logger="app"):
+        for _ in range(3):
+            sampler.log(("http", "/v1/books", "500"), logging.ERROR, "error")
+        await asyncio.sleep(0.1)
+
+    assert messages(caplog) == [
+        "error",
+        "Suppressed 2 similar log records for http /v1/books 500 within 0.05 seconds",
+    ]
+    assert sampler._windows == {}
+
+
+async def test_scheduled_summary_is_logged_outside_of_the_request_context(caplog):
+    sampler = LogSampler(logging.getLogger("app"), limit=1, window=0.05)
+    token = trace_context.set({"trace": "request"})
+    try:
+        with caplog.at_level(logging.ERROR, logger="app"):
+            for _ in range(2):
+                sampler.log(("a",), logging.ERROR, "error")
+    finally:
+        trace_context.reset(token)
+
+    contexts: list[object] = []
+
+    class ContextHandler(logging.Handler):
+        def emit(self, _record: logging.LogRecord) -> None:
+            contexts.append(trace_context.get())
+
+    handler = ContextHandler()
+    logger = logging.getLogger("app")
+    logger.addHandler(handler)
+    try:
+        with caplog.at_level(logging.ERROR, logger="app"):
+            await asyncio.sleep(0.1)
+    finally:
+        logger.removeHandler(handler)
+
+    assert contexts == [None]
+
+
+async def test_flush_cancels_scheduled_summaries(caplog):
+    sampler = LogSampler(logging.getLogger("app"), limit=1, window=0.05)
+    with caplog.at_level(logging.ERROR, logger="app"):
+        for _ in range(2):
+            sampler.log(("a",), logging.ERROR, "error")
+        sampler.flush()
+        await asyncio.sleep(0.1)
+
+    assert len(messages(caplog)) == 2
@@ -0,0 +1,148 @@
+import pytest
+from fastapi import APIRouter, FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from src.runtime import create_runtime
+from src.settings import Settings
+from src.utils.metrics import (
+    UNMATCHED_ROUTE,
+    Histogram,
+    HttpMetrics,
+    MetricsMiddleware,
+    format_labels,
+)
+
+# //////////////////////////////////////////////////////////////////////////////
+# Test app
+
+
+def make_test_app(metrics: HttpMetrics) -> MetricsMiddleware:
+    app = FastAPI()
+    books = APIRouter(prefix="/books")
+
+    @books.get("/{book_id}")
+    async def get_book() -> dict[str, str]:
+        return {"id": "1"}
+
+    @books.get("")
+    async def fail() -> None:
+        raise RuntimeError("boom")
+
+    app.include_router(books, prefix="/v1")
+    return MetricsMiddleware(app, metrics=metrics)
+
+
+@pytest.fixture
+def metrics() -> HttpMetrics:
+    return HttpMetrics(buckets=(0.1, 1.0))
+
+
+@pytest.fixture
+async def client(metrics):
+    async with AsyncClient(
+        transport=ASGITransport(app=make_test_app(metrics), raise_app_exceptions=False),
+        base_url="http://test",
+    ) as c:
+        yield c
+
+
+# //////////////////////////////////////////////////////////////////////////////
+# Histogram
+
+
+def test_histogram_counts_values_per_bucket():
+    histogram = Histogram((0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value)
+
+    assert histogram.counts == [2, 1, 1]
+    assert histogram.count == 4
+    assert histogram.sum == pytest.approx(2.65)
+
+
+# //////////////////////////////////////////////////////////////////////////////
+# HttpMetrics.render
+
+
+def test_format_labels_escapes_values():
+    assert format_labels({"route": 'a"b\\c\nd'}) == '{route="a\\"b\\\\c\\nd"}'
+
+
+def test_render_outputs_cumulative_buckets(metrics):
+    metrics.observe("/v1/books", "GET", "200", 0.05)
+    metrics.observe("/v1/books", "GET", "200", 0.5)
+    metrics.observe("/v1/books", "GET", "200", 5.0)
+
+    lines = metrics.render().splitlines()
+
+    labels = 'route="/v1/books",method="GET",status="200"'
+    assert f'http_request_duration_seconds_bucket{{{labels},le="0.1"}} 1' in lines
+    assert f'http_request_duration_seconds_bucket{{{labels},le="1.0"}} 2' in lines
+    assert f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 3' in lines
+    assert f"http_request_duration_seconds_sum{{{labels}}} 5.55" in lines
+    assert f"http_request_duration_seconds_count{{{labels}}} 3" in lines
+    assert "# TYPE http_request_duration_seconds histogram" in lines
+
+
+def test_render_outputs_in_flight_gauges(metrics):
+    metrics.in_flight["GET"] = 2
+
+    assert 'http_requests_in_flight{method="GET"} 2' in metrics.render().splitlines()
+
+
+# //////////////////////////////////////////////////////////////////////////////
+# MetricsMiddleware
+
+
+async def test_middleware_records_route_template(client, metrics):
+    await client.get("/v1/books/abc")
+    await client.get("/v1/books/def")
+
+    histogram = metrics.durations[("/v1/books/{book_id}", "GET", "200")]
+    assert histogram.count == 2
+    assert metrics.in_flight == {"GET": 0}
+
+
+async def test_middleware_groups_unmatched_routes(client, metrics):
+    await client.get("/random/path")
+
+    assert metrics.durations[(UNMATCHED_ROUTE, "GET", "404")].count == 1
+
+
+async def test_middleware_groups_unknown_methods(client, metrics):
+    await client.request("BREW", "/v1/books/abc")
+
+    assert list(metrics.durations) == [("/v1/books/{book_id}", "other", "405")]
+
+
+async def test_middleware_records_unhandled_exceptions_as_500(client, metrics):
+    await client.get("/v1/books")
+
+    assert metrics.durations[("/v1/books", "GET", "500")].count == 1
+    assert metrics.in_flight == {"GET": 0}
+
+
+# //////////////////////////////////////////////////////////////////////////////
+# /metrics
+
+
+async def test_metrics_endpoint_is_disabled_by_default(async_client):
+    response = await async_client.get("/metrics")
+    assert response.status_code == 404
+
+
+async def test_metrics_endpoint_exposes_request_metrics():
+    app = create_runtime(Settings(METRICS_ENABLED=True))
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        await client.get("/")
+        response = await client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert (
+        'http_request_duration_seconds_count{route="/",method="GET",status="200"} 1'
+        in response.text.splitlines()
+    )
+    assert 'http_requests_in_flight{method="GET"} 1' in response.text.splitlines()
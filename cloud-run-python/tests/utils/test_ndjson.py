@@ -0,0 +1,93 @@
+import pytest
+from pydantic import BaseModel, Field
+
+from src.utils.ndjson import LineTooLong, encode_lines, iter_lines
+
+# //////////////////////////////////////////////////////////////////////////////
+# Helpers
+
+
+async def async_gen(items):
+    for item in items:
+        yield item
+
+
+async def collect(chunks: list[bytes]) -> list[bytes]:
+    return [line async for line in iter_lines(async_gen(chunks))]
+
+
+# //////////////////////////////////////////////////////////////////////////////
+# iter_lines
+
+
+async def test_iter_lines_splits_on_newlines():
+    assert await collect([b"a\nb\nc\n"]) == [b"a", b"b", b"c"]
+
+
+async def test_iter_lines_joins_lines_split_across_chunks():
+    assert await collect([b'{"ti', b'tle": 1}\n{"a', b'": 2}']) == [
+        b'{"title": 1}',
+        b'{"a": 2}',
+    ]
+
+
+async def test_iter_lines_yields_trailing_line_without_newline():
+    assert await collect([b"a\nb"]) == [b"a", b"b"]
+
+
+@pytest.mark.parametrize("chunks", [[], [b""], [b"\n\n"], [b"  \r\n"]])
+async def test_iter_lines_skips_empty_lines(chunks):
+    assert await collect(chunks) == []
+
+
+async def test_iter_lines_accepts_lines_of_maximum_length():
+    chunks = async_gen([b"abc", b"\r", b"\nabc\r\n", b"abc"])
+
+    assert [line async for line in iter_lines(chunks, max_line_length=3)] == [
+        b"abc",
+        b"abc",
+        b"abc",
+    ]
+
+
+@pytest.mark.parametrize("chunks", [[b"abcd\n"], [b"ab", b"cd", b"e"], [b"abcd"]])
+async def test_iter_lines_rejects_lines_over_maximum_length(chunks):
+    with pytest.raises(LineTooLong):
+        async for _ in iter_lines(async_gen(chunks), max_line_length=3):
+            pass
+
+
+async def test_iter_lines_strips_carriage_returns():
+    assert await collect([b"a\r\nb\r\n"]) == [b"a", b"b"]
+
+
+# //////////////////////////////////////////////////////////////////////////////
+# encode_lines
+
+
+class Item(BaseModel):
+    id: int
+    secret: str = Field(default="", exclude=True)
+
+
+async def encode(count: int, batch_size: int) -> list[bytes]:
+    items = async_gen([Item(id=i, secret="s") for i in range(count)])
+    return [chunk async for chunk in encode_lines(items, batch_size=batch_size)]
+
+
+async def test_encode_lines_terminates_every_line():
+    assert await encode(2, batch_size=10) == [b'{"id":0}\n{"id":1}\n']
+
+
+async def test_encode_lines_batches_lines_into_chunks():
+    chunks = await encode(5, batch_size=2)
+
+    assert chunks == [
+        b'{"id":0}\n{"id":1}\n',
+        b'{"id":2}\n{"id":3}\n',
+        b'{"id":4}\n',
+    ]
+
+
+async def test_encode_lines_yields_nothing_for_empty_streams():
+    assert await encode(0, batch_size=2) == []
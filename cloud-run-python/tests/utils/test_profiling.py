@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import sys
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from src.utils.profiling import ProfilingMiddleware
+
+# NOTE: cProfile can't be enabled while another profiler or tracer (e.g. a
+# coverage run) uses the same hooks.
+pytestmark = pytest.mark.skipif(
+    sys.monitoring.get_tool(sys.monitoring.PROFILER_ID) is not None,
+    reason="another profiler is active",
+)
+
+# //////////////////////////////////////////////////////////////////////////////
+# Helpers
+
+
+def busy_work() -> int:
+    return sum(range(1000))
+
+
+def make_test_app(events: list[str] | None = None) -> ProfilingMiddleware:
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def get_item() -> dict[str, int]:
+        if events is not None:
+            events.append("start")
+            await asyncio.sleep(0.01)
+        return {"total": busy_work()}
+
+    return ProfilingMiddleware(app, token="secret", limit=100)
+
+
+@pytest.fixture
+def middleware() -> ProfilingMiddleware:
+    return make_test_app()
+
+
+@pytest.fixture
+async def client(middleware):
+    async with AsyncClient(
+        transport=ASGITransport(app=middleware), base_url="http://test"
+    ) as client:
+        yield client
+
+
+# //////////////////////////////////////////////////////////////////////////////
+# ProfilingMiddleware
+
+
+async def test_request_without_header_is_not_profiled(client, caplog):
+    with caplog.at_level(logging.INFO, logger="app"):
+        response = await client.get("/items/1")
+
+    assert response.status_code == 200
+    assert caplog.records == []
+
+
+async def test_request_with_wrong_token_is_not_profiled(client, caplog):
+    with caplog.at_level(logging.INFO, logger="app"):
+        response = await client.get("/items/1", headers={"X-Profile-Token": "nope"})
+
+    assert response.status_code == 200
+    assert caplog.records == []
+
+
+async def test_request_with_token_logs_hot_functions(client, caplog):
+    with caplog.at_level(logging.INFO, logger="app"):
+        response = await client.get("/items/1", headers={"X-Profile-Token": "secret"})
+
+    assert response.status_code == 200
+    assert response.json() == {"total": 499500}
+    (record,) = caplog.records
+    message = record.getMessage()
+    assert message.startswith("Profile of GET /items/{item_id}\n")
+    assert "busy_work" in message
+    assert record.labels["profile_route"] == "/items/{item_id}"  # type: ignore[attr-defined]
+    assert record.labels["profile_duration_ms"] >= 0  # type: ignore[attr-defined]
+
+
+async def test_only_one_request_is_profiled_at_a_time(caplog):
+    events: list[str] = []
+    middleware = make_test_app(events)
+    headers = {"X-Profile-Token": "secret"}
+    async with AsyncClient(
+        transport=ASGITransport(app=middleware), base_url="http://test"
+    ) as client:
+        with caplog.at_level(logging.INFO, logger="app"):
+            responses = await asyncio.gather(
+                client.get("/items/1", headers=headers),
+                client.get("/items/2", headers=headers),
+            )
+
+    assert [response.status_code for response in responses] == [200, 200]
+    assert events == ["start", "start"]
+    assert len(caplog.records) == 1
+    assert middleware.active is False
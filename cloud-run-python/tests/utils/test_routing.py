@@ -0,0 +1,59 @@
+import pytest
+from fastapi import APIRouter, FastAPI, Request
+from httpx import ASGITransport, AsyncClient
+
+from src.utils.routing import route_template
+
+# //////////////////////////////////////////////////////////////////////////////
+# Test app
+
+
+def make_test_app() -> FastAPI:
+    app = FastAPI()
+    books = APIRouter(prefix="/books")
+
+    @books.get("")
+    async def list_books(request: Request) -> str | None:
+        return route_template(request.scope)
+
+    @books.get("/{book_id}")
+    async def get_book(request: Request) -> str | None:
+        return route_template(request.scope)
+
+    @books.get("/{book_id}/pages/{page:int}")
+    async def get_page(request: Request) -> str | None:
+        return route_template(request.scope)
+
+    v1 = APIRouter(prefix="/v1")
+    v1.include_router(books)
+    app.include_router(v1)
+    return app
+
+
+@pytest.fixture
+async def client():
+    async with AsyncClient(
+        transport=ASGITransport(app=make_test_app()), base_url="http://test"
+    ) as c:
+        yield c
+
+
+# //////////////////////////////////////////////////////////////////////////////
+# route_template
+
+
+@pytest.mark.parametrize(
+    "path,expected",
+    [
+        ("/v1/books", "/v1/books"),
+        ("/v1/books/abc", "/v1/books/{book_id}"),
+        ("/v1/books/abc/pages/3", "/v1/books/{book_id}/pages/{page}"),
+    ],
+)
+async def test_route_template_includes_router_prefixes(client, path, expected):
+    response = await client.get(path)
+    assert response.json() == expected
+
+
+def test_route_template_returns_none_without_route():
+    assert route_template({"type": "http", "path": "/missing"}) is None
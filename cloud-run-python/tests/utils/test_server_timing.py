@@ -0,0 +1,168 @@
+import logging
+
+from fastapi import APIRouter, FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from src.utils.cloud_logging import CloudLoggingMiddleware
+from src.utils.server_timing import (
+    ServerTimingMiddleware,
+    ServerTimingRoute,
+    Timings,
+    server_timing,
+    timed,
+)
+
+# //////////////////////////////////////////////////////////////////////////////
+# Helpers
+
+TRACEPARENT = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+
+
+async def async_gen(items):
+    for item in items:
+        yield item
+
+
+def make_test_app(log_labels: bool = False) -> ServerTimingMiddleware:
+    app = FastAPI()
+    router = APIRouter(route_class=ServerTimingRoute)
+
+    @router.get("/items")
+    async def list_items() -> list[int]:
+        with timed("firestore"):
+            items = [item async for item in async_gen([1])]
+        timings = server_timing.get()
+        if timings is not None:
+            timings.increment("firestore_documents", len(items))
+        return items
+
+    @router.get("/sync-items")
+    def list_sync_items() -> list[int]:
+        return [1]
+
+    app.include_router(router)
+    return ServerTimingMiddleware(app, log_labels=log_labels)
+
+
+def parse_header(value: str) -> dict[str, float]:
+    metrics = {}
+    for entry in value.split(", "):
+        name, _, duration = entry.partition(";dur=")
+        metrics[name] = float(duration)
+    return metrics
+
+
+# //////////////////////////////////////////////////////////////////////////////
+# Timings
+
+
+def test_timings_sum_durations_per_phase():
+    timings = Timings()
+    timings.add("firestore", 0.010)
+    timings.add("firestore", 0.0025)
+    timings.add("model", 0.001)
+
+    assert timings.header_value() == "firestore;dur=12.5, model;dur=1.0"
+
+
+def test_timings_sum_counters():
+    timings = Timings()
+    timings.increment("firestore_calls")
+    timings.increment("firestore_calls")
+    timings.increment("firestore_documents", 5)
+
+    assert timings.counters == {"firestore_calls": 2, "firestore_documents": 5}
+    assert timings.header_value() == ""
+
+
+def test_timed_records_phase_of_current_request():
+    timings = Timings()
+    token = server_timing.set(timings)
+    try:
+        with timed("model"):
+            pass
+    finally:
+        server_timing.reset(token)
+
+    assert list(timings.durations) == ["model"]
+
+
+def test_timed_does_nothing_outside_of_requests():
+    with timed("model"):
+        pass
+    assert server_timing.get() is None
+
+
+# //////////////////////////////////////////////////////////////////////////////
+# ServerTimingMiddleware
+
+
+async def test_middleware_sends_server_timing_header():
+    async with AsyncClient(
+        transport=ASGITransport(app=make_test_app()), base_url="http://test"
+    ) as client:
+        response = await client.get("/items")
+
+    assert response.json() == [1]
+    metrics = parse_header(response.headers["Server-Timing"])
+    assert list(metrics) == ["firestore", "endpoint", "serialize", "total"]
+    assert metrics["total"] >= metrics["endpoint"] >= metrics["firestore"]
+
+
+async def test_middleware_times_sync_endpoints():
+    async with AsyncClient(
+        transport=ASGITransport(app=make_test_app()), base_url="http://test"
+    ) as client:
+        response = await client.get("/sync-items")
+
+    assert response.status_code == 200
+    assert response.json() == [1]
+    metrics = parse_header(response.headers["Server-Timing"])
+    assert list(metrics) == ["endpoint", "serialize", "total"]
+
+
+async def test_middleware_logs_timings_as_labels(caplog):
+    async with AsyncClient(
+        transport=ASGITransport(app=make_test_app(log_labels=True)),
+        base_url="http://test",
+    ) as client:
+        with caplog.at_level(logging.INFO, logger="app"):
+            await client.get("/items")
+
+    (record,) = caplog.records
+    assert record.getMessage() == "Server timing of GET /items"
+    assert set(record.labels) == {  # type: ignore[attr-defined]
+        "timing_firestore_ms",
+        "timing_endpoint_ms",
+        "timing_serialize_ms",
+        "timing_total_ms",
+        "firestore_documents",
+    }
+    assert record.labels["firestore_documents"] == 1  # type: ignore[attr-defined]
+
+
+async def test_middleware_logs_timings_with_trace_context_of_request(caplog):
+    app = make_test_app(log_labels=True)
+    app.app = CloudLoggingMiddleware(app.app)
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        with caplog.at_level(logging.INFO, logger="app"):
+            await client.get("/items", headers={"traceparent": TRACEPARENT})
+
+    (record,) = caplog.records
+    assert record.trace_context == {  # type: ignore[attr-defined]
+        "trace_id": "4bf92f3577b34da6a3ce929d0e0e4736",
+        "span_id": "00f067aa0ba902b7",
+        "trace_sampled": True,
+    }
+
+
+async def test_middleware_sends_total_for_unmatched_routes():
+    async with AsyncClient(
+        transport=ASGITransport(app=make_test_app()), base_url="http://test"
+    ) as client:
+        response = await client.get("/missing")
+
+    assert response.status_code == 404
+    assert list(parse_header(response.headers["Server-Timing"])) == ["total"]
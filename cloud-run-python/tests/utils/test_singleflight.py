@@ -0,0 +1,126 @@
+import asyncio
+
+import pytest
+
+from src.utils.singleflight import SingleFlight
+
+# //////////////////////////////////////////////////////////////////////////////
+# Helpers
+
+
+def make_call(release: asyncio.Event, result: str, calls: list[str]):
+    """
+    Build a call factory that records each invocation and blocks until
+    `release` is set.
+    """
+
+    async def call() -> str:
+        calls.append(result)
+        await release.wait()
+        return result
+
+    return lambda: call()
+
+
+# //////////////////////////////////////////////////////////////////////////////
+# do
+
+
+async def test_concurrent_calls_for_same_key_share_one_call():
+    flight: SingleFlight[str, str] = SingleFlight()
+    release = asyncio.Event()
+    calls: list[str] = []
+
+    tasks = [
+        asyncio.create_task(flight.do("a", make_call(release, "result", calls)))
+        for _ in range(5)
+    ]
+    await asyncio.sleep(0)
+    assert len(flight) == 1
+    release.set()
+
+    assert await asyncio.gather(*tasks) == ["result"] * 5
+    assert calls == ["result"]
+    assert flight.shared == 4
+    assert len(flight) == 0
+
+
+async def test_calls_for_different_keys_run_independently():
+    flight: SingleFlight[str, str] = SingleFlight()
+    release = asyncio.Event()
+    calls: list[str] = []
+
+    tasks = [
+        asyncio.create_task(flight.do(key, make_call(release, key, calls)))
+        for key in ("a", "b")
+    ]
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(*tasks) == ["a", "b"]
+    assert sorted(calls) == ["a", "b"]
+
+
+async def test_sequential_calls_do_not_share_results():
+    flight: SingleFlight[str, int] = SingleFlight()
+    counter = iter(range(10))
+
+    async def call() -> int:
+        return next(counter)
+
+    assert await flight.do("a", call) == 0
+    assert await flight.do("a", call) == 1
+
+
+async def test_exception_is_propagated_to_every_caller():
+    flight: SingleFlight[str, str] = SingleFlight()
+    release = asyncio.Event()
+
+    async def call() -> str:
+        await release.wait()
+        raise KeyError("boom")
+
+    tasks = [asyncio.create_task(flight.do("a", call)) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    assert all(isinstance(result, KeyError) for result in results)
+    assert len(flight) == 0
+
+
+async def test_cancelled_caller_does_not_cancel_shared_call():
+    flight: SingleFlight[str, str] = SingleFlight()
+    release = asyncio.Event()
+    calls: list[str] = []
+
+    first = asyncio.create_task(flight.do("a", make_call(release, "result", calls)))
+    second = asyncio.create_task(flight.do("a", make_call(release, "result", calls)))
+    await asyncio.sleep(0)
+    first.cancel()
+    release.set()
+
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    assert await second == "result"
+
+
+# //////////////////////////////////////////////////////////////////////////////
+# forget
+
+
+async def test_forget_starts_a_new_call_for_later_callers():
+    flight: SingleFlight[str, str] = SingleFlight()
+    release = asyncio.Event()
+    calls: list[str] = []
+
+    before = asyncio.create_task(flight.do("a", make_call(release, "old", calls)))
+    await asyncio.sleep(0)
+    flight.forget("a")
+    after = asyncio.create_task(flight.do("a", make_call(release, "new", calls)))
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await before == "old"
+    assert await after == "new"
+    assert flight.shared == 0
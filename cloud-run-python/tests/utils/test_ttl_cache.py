@@ -0,0 +1,142 @@
+from src.utils.ttl_cache import TTLCache
+
+# //////////////////////////////////////////////////////////////////////////////
+# Helpers
+
+
+class FakeTimer:
+    """
+    Manually advanced clock used to control entry expiry.
+    """
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_cache(ttl: float = 10.0, max_entries: int = 3) -> tuple[TTLCache, FakeTimer]:
+    timer = FakeTimer()
+    return TTLCache(ttl, max_entries, timer=timer), timer
+
+
+# //////////////////////////////////////////////////////////////////////////////
+# get / set
+
+
+def test_get_returns_none_for_missing_key():
+    cache, _ = make_cache()
+    assert cache.get("missing") is None
+    assert cache.misses == 1
+    assert cache.hits == 0
+
+
+def test_get_returns_cached_value():
+    cache, _ = make_cache()
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert cache.hits == 1
+
+
+def test_entries_expire_after_ttl():
+    cache, timer = make_cache(ttl=5.0)
+    cache.set("a", 1)
+    timer.now = 4.9
+    assert cache.get("a") == 1
+    timer.now = 5.0
+    assert cache.get("a") is None
+    assert len(cache) == 0
+    assert cache.misses == 1
+
+
+def test_set_refreshes_ttl():
+    cache, timer = make_cache(ttl=5.0)
+    cache.set("a", 1)
+    timer.now = 4.0
+    cache.set("a", 2)
+    timer.now = 8.0
+    assert cache.get("a") == 2
+
+
+# //////////////////////////////////////////////////////////////////////////////
+# LRU eviction
+
+
+def test_least_recently_used_entry_is_evicted_when_full():
+    cache, _ = make_cache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # "b" is now the least recently used entry
+    cache.set("c", 3)
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+# //////////////////////////////////////////////////////////////////////////////
+# invalidate / clear / stats
+
+
+def test_invalidate_removes_entry():
+    cache, _ = make_cache()
+    cache.set("a", 1)
+    cache.invalidate("a")
+    cache.invalidate("missing")  # must not raise
+    assert cache.get("a") is None
+
+
+def test_clear_removes_entries_and_resets_counters():
+    cache, _ = make_cache()
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("b")
+    cache.clear()
+    assert cache.stats() == {"hits": 0, "misses": 0, "size": 0}
+
+
+def test_stats_reports_counters_and_size():
+    cache, _ = make_cache()
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("b")
+    assert cache.stats() == {"hits": 1, "misses": 1, "size": 1}
+
+
+def test_finish_load_stores_loaded_value():
+    cache, _ = make_cache()
+    load = cache.begin_load("a")
+    assert cache.finish_load("a", load, 1)
+    assert cache.get("a") == 1
+
+
+def test_finish_load_without_value_stores_nothing():
+    cache, _ = make_cache()
+    load = cache.begin_load("a")
+    assert not cache.finish_load("a", load, None)
+    assert len(cache) == 0
+    assert cache._loads == {}
+
+
+def test_load_of_invalidated_key_is_not_stored():
+    cache, _ = make_cache()
+    load = cache.begin_load("a")
+    cache.invalidate("a")
+    assert not cache.finish_load("a", load, 1)
+    assert cache.get("a") is None
+
+
+def test_invalidating_other_keys_keeps_load():
+    cache, _ = make_cache()
+    load = cache.begin_load("a")
+    cache.invalidate("b")
+    assert cache.finish_load("a", load, 1)
+
+
+def test_clear_discards_loads_in_flight():
+    cache, _ = make_cache()
+    load = cache.begin_load("a")
+    cache.clear()
+    assert not cache.finish_load("a", load, 1)
+    assert len(cache) == 0
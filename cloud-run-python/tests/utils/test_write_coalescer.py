@@ -0,0 +1,146 @@
+import asyncio
+
+from src.utils.server_timing import Timings, server_timing
+from src.utils.write_coalescer import WriteCoalescer
+
+# //////////////////////////////////////////////////////////////////////////////
+# Helpers
+
+
+class Store:
+    """
+    Record the writes of a coalescer, failing the items in `broken`.
+    """
+
+    def __init__(self, broken: frozenset[str] = frozenset()) -> None:
+        self.broken = broken
+        self.batches: list[list[str]] = []
+        self.singles: list[str] = []
+
+    async def write_many(self, items: list[str]) -> None:
+        await asyncio.sleep(0)
+        if self.broken.intersection(items):
+            raise RuntimeError("batch failed")
+        self.batches.append(items)
+
+    async def write_one(self, item: str) -> None:
+        await asyncio.sleep(0)
+        if item in self.broken:
+            raise ValueError(item)
+        self.singles.append(item)
+
+
+def make_coalescer(
+    store: Store, window: float = 0.01, max_items: int = 10
+) -> WriteCoalescer[str]:
+    return WriteCoalescer(store.write_many, store.write_one, window, max_items)
+
+
+# //////////////////////////////////////////////////////////////////////////////
+# submit
+
+
+async def test_items_within_window_are_written_as_one_batch():
+    store = Store()
+    coalescer = make_coalescer(store)
+
+    await asyncio.gather(*(coalescer.submit(str(i)) for i in range(5)))
+
+    assert store.batches == [["0", "1", "2", "3", "4"]]
+    assert store.singles == []
+    assert coalescer.stats() == {
+        "batches": 1,
+        "items": 5,
+        "fallbacks": 0,
+        "pending": 0,
+    }
+
+
+async def test_full_batch_is_written_without_waiting_for_window():
+    store = Store()
+    coalescer = make_coalescer(store, window=10, max_items=3)
+
+    await asyncio.wait_for(
+        asyncio.gather(*(coalescer.submit(str(i)) for i in range(6))), timeout=1
+    )
+
+    assert store.batches == [["0", "1", "2"], ["3", "4", "5"]]
+
+
+async def test_single_item_is_written_on_its_own():
+    store = Store()
+    coalescer = make_coalescer(store)
+
+    await coalescer.submit("a")
+
+    assert store.batches == []
+    assert store.singles == ["a"]
+
+
+async def test_failed_batch_is_retried_item_by_item():
+    store = Store(broken=frozenset({"1"}))
+    coalescer = make_coalescer(store)
+
+    results = await asyncio.gather(
+        *(coalescer.submit(str(i)) for i in range(3)), return_exceptions=True
+    )
+
+    assert results[0] is None
+    assert isinstance(results[1], ValueError)
+    assert results[2] is None
+    assert store.singles == ["0", "2"]
+    assert coalescer.fallbacks == 1
+
+
+async def test_cancelled_caller_does_not_cancel_its_write():
+    store = Store()
+    coalescer = make_coalescer(store)
+
+    cancelled = asyncio.create_task(coalescer.submit("a"))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+    await coalescer.submit("b")
+
+    assert store.batches == [["a", "b"]]
+
+
+async def test_batches_are_written_outside_of_the_request_context():
+    contexts: list[Timings | None] = []
+
+    async def write_many(_items: list[str]) -> None:
+        contexts.append(server_timing.get())
+
+    coalescer = WriteCoalescer(write_many, Store().write_one, 0.01, 10)
+    token = server_timing.set(Timings())
+    try:
+        await asyncio.gather(coalescer.submit("a"), coalescer.submit("b"))
+    finally:
+        server_timing.reset(token)
+
+    assert contexts == [None]
+
+
+# //////////////////////////////////////////////////////////////////////////////
+# close
+
+
+async def test_close_writes_pending_items():
+    store = Store()
+    coalescer = make_coalescer(store, window=10)
+
+    tasks = [asyncio.create_task(coalescer.submit(str(i))) for i in range(2)]
+    await asyncio.sleep(0)
+    assert len(coalescer) == 2
+    await coalescer.close()
+
+    assert store.batches == [["0", "1"]]
+    assert await asyncio.gather(*tasks) == [None, None]
+
+
+async def test_close_without_items_does_nothing():
+    store = Store()
+    coalescer = make_coalescer(store)
+
+    await coalescer.close()
+
+    assert coalescer.stats()["batches"] == 0